@@ -7,6 +7,7 @@ import asyncio
 import json
 from fastapi.responses import StreamingResponse
 
+from app.db.async_db import run_db
 from app.models.schemas import (
     ChatRequest,
     GrantPermissionRequest,
@@ -46,6 +47,7 @@ from app.models.schemas import (
     PolicyValidateResponse,
     PolicyTestRequest,
     PolicyTestResponse,
+    RateLimitCounterResponse,
     SettingsResponse,
     SettingsUpdateRequest,
     SettingsProfileCreateRequest,
@@ -69,12 +71,14 @@ from app.models.schemas import (
     ScreenCaptureResponse,
     ClipboardWriteRequest,
     ClipboardReadResponse,
+    FileEntryResponse,
+    FileIndexRefreshResponse,
     FileSearchRequest,
     FileSearchResponse,
 )
 from app.services.agent_runtime import stream_chat
 from app.services.audit import list_audit_logs
-from app.services.limits import build_run_limiter
+from app.services.limits import build_run_limiter, rate_limit_counters
 from app.services.model_sources import add_model_source, list_model_options, list_model_sources, test_model_source
 from app.services.permission_broker import check_permission, grant_permission, list_grants, revoke_permission
 from app.services.search_router import search_with_router, test_search_provider
@@ -82,7 +86,7 @@ from app.services.security_hardening import get_lockdown_status, get_security_pl
 from app.services.ollama_status import get_cached_ollama_status, record_install_prompt, remind_later
 from app.services.secret_store import has_secret, set_secret
 from app.services.settings_service import get_effective_settings, get_settings, update_settings
-from app.services.policy_dsl import parse_policy
+from app.services.policy_dsl import compile_policy
 from app.services.policy_guard import policy_allows_action
 from app.services.settings_profiles import (
     activate_profile,
@@ -106,12 +110,14 @@ from app.services.vector_index import index_documents, search_index, can_index_p
 from app.services.diagnostics import export_diagnostics
 from app.services.screen_capture import store_capture
 from app.services.clipboard_service import read_clipboard, write_clipboard
+from app.services.file_index import refresh_file_index
 from app.services.file_search import search_files
 from app.services.thinkbox import read_thinkbox_stream, submit_thinkbox_message
 from app.services.workspaces import (
     activate_workspace,
     create_workspace,
     delete_workspace,
+    get_active_workspace,
     get_workspace,
     list_workspaces,
     update_workspace,
@@ -255,8 +261,28 @@ def files_search(payload: FileSearchRequest, x_session_id: str = Header(default=
         assert_permission("filesystem.read", session_id=x_session_id, safe_mode=settings.safe_mode_default, path=payload.path)
     except PermissionError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
-    results = search_files(path=payload.path, pattern=payload.pattern, max_results=payload.max_results)
-    return FileSearchResponse(results=results)
+    walk = search_files(path=payload.path, pattern=payload.pattern, max_results=payload.max_results, query=payload.query)
+    return FileSearchResponse(
+        results=[entry.path for entry in walk.entries],
+        entries=[FileEntryResponse(**entry.as_dict()) for entry in walk.entries],
+        truncated=walk.truncated,
+        timed_out=walk.timed_out,
+    )
+
+
+@router.post("/files/index/refresh", response_model=FileIndexRefreshResponse)
+def files_index_refresh(x_session_id: str = Header(default="default")) -> FileIndexRefreshResponse:
+    workspace = get_active_workspace()
+    if not workspace or not workspace.get("scopes"):
+        raise HTTPException(status_code=400, detail="No active workspace with scopes")
+    settings = get_effective_settings()
+    try:
+        for scope in workspace["scopes"]:
+            assert_permission("filesystem.read", session_id=x_session_id, safe_mode=settings.safe_mode_default, path=scope)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc)) from exc
+    stats = refresh_file_index(workspace["id"], workspace["scopes"])
+    return FileIndexRefreshResponse(**stats.as_dict())
 
 
 @router.get("/audit/logs")
@@ -448,10 +474,11 @@ def workflow_save(payload: WorkflowSaveRequest) -> WorkflowResponse:
 
 @router.post("/workflows/{workflow_id}/run", response_model=WorkflowRunResponse)
 async def workflow_run(workflow_id: str, payload: WorkflowRunRequest, x_session_id: str = Header(default="default")) -> WorkflowRunResponse:
-    workflow = next((item for item in list_workflows() if item.id == workflow_id), None)
+    workflows = await run_db(list_workflows)
+    workflow = next((item for item in workflows if item.id == workflow_id), None)
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
-    settings = get_settings()
+    settings = await run_db(get_settings)
     result = await run_workflow(workflow, payload.inputs, session_id=x_session_id, safe_mode=settings.safe_mode_default)
     run_id = result.get("run_id")
     return WorkflowRunResponse(result=result, run_id=run_id)
@@ -554,8 +581,13 @@ def secret_status(key_name: str) -> SecretStatusResponse:
 
 @router.post("/policies/validate", response_model=PolicyValidateResponse)
 def policy_validate(payload: PolicyValidateRequest) -> PolicyValidateResponse:
-    parsed = parse_policy(payload.text or "")
-    return PolicyValidateResponse(ok=len(parsed.errors) == 0, errors=parsed.errors)
+    compiled = compile_policy(payload.text or "")
+    return PolicyValidateResponse(
+        ok=len(compiled.errors) == 0,
+        errors=list(compiled.errors),
+        text_hash=compiled.text_hash,
+        plan=compiled.plan(),
+    )
 
 
 @router.post("/policies/test", response_model=PolicyTestResponse)
@@ -564,15 +596,22 @@ def policy_test(payload: PolicyTestRequest) -> PolicyTestResponse:
     return PolicyTestResponse(allowed=allowed, reason=reason)
 
 
+@router.get("/limits/rate", response_model=list[RateLimitCounterResponse])
+def limits_rate() -> list[RateLimitCounterResponse]:
+    return [RateLimitCounterResponse(**row) for row in rate_limit_counters()]
+
+
 @router.post("/search", response_model=SearchResponse)
 async def search(payload: SearchRequest, x_session_id: str = Header(default="default")) -> SearchResponse:
-    settings = get_effective_settings()
-    limiter = build_run_limiter(
+    settings = await run_db(get_effective_settings)
+    limiter = await run_db(
+        build_run_limiter,
         {
             "max_tool_calls_per_message": settings.max_tool_calls_per_message,
             "max_tool_calls_per_minute": settings.max_tool_calls_per_minute,
             "max_files_read_per_run": settings.max_files_read_per_run,
             "max_bytes_read_per_run": settings.max_bytes_read_per_run,
+            "max_grep_matches_per_run": settings.max_grep_matches_per_run,
             "max_runtime_seconds": settings.max_runtime_seconds,
         },
         session_id=x_session_id,
@@ -595,13 +634,15 @@ async def test_search(x_session_id: str = Header(default="default")) -> SearchRe
 
 @router.post("/search/manual", response_model=SearchResponse)
 async def manual_search(payload: ManualSearchSubmitRequest, x_session_id: str = Header(default="default")) -> SearchResponse:
-    settings = get_effective_settings()
-    limiter = build_run_limiter(
+    settings = await run_db(get_effective_settings)
+    limiter = await run_db(
+        build_run_limiter,
         {
             "max_tool_calls_per_message": settings.max_tool_calls_per_message,
             "max_tool_calls_per_minute": settings.max_tool_calls_per_minute,
             "max_files_read_per_run": settings.max_files_read_per_run,
             "max_bytes_read_per_run": settings.max_bytes_read_per_run,
+            "max_grep_matches_per_run": settings.max_grep_matches_per_run,
             "max_runtime_seconds": settings.max_runtime_seconds,
         },
         session_id=x_session_id,
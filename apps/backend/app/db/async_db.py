@@ -0,0 +1,28 @@
+"""Awaitable access to the blocking SQLite helpers for async runtimes."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Dedicated threads so DB calls from streaming runtimes never queue behind (or
+# starve) sync routes in the default threadpool. Each keeps its own reader.
+DB_EXECUTOR_THREADS = 2
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="neroai-db")
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking DB-bound call on the DB executor and await its result."""
+    call = functools.partial(func, *args, **kwargs)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Non-asyncio loops (e.g. trio under the anyio test plugin) run inline.
+        return call()
+    return await loop.run_in_executor(_EXECUTOR, call)
@@ -4,249 +4,460 @@ from __future__ import annotations
 
 import sqlite3
 import json
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 DB_PATH = Path(__file__).resolve().parents[2] / "neroai.db"
 DATA_DIR = DB_PATH.parent
 
+BUSY_TIMEOUT_SECONDS = 5.0
+CACHE_SIZE_KIB = 16_384
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
 
-def connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+_writer: sqlite3.Connection | None = None
+_writer_lock = threading.RLock()
+_writer_depth = 0
+_local = threading.local()
+_readers: list[sqlite3.Connection] = []
+_readers_lock = threading.Lock()
+_generation = 0
+
+
+def open_connection(readonly: bool = False) -> sqlite3.Connection:
+    """Open a tuned connection; WAL lets readers proceed while a writer commits."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        check_same_thread=False,
+        isolation_level=None if readonly else "",
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
     return conn
 
 
-def initialize_db() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with connection() as conn:
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS model_sources (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                base_url TEXT NOT NULL,
-                is_local INTEGER NOT NULL DEFAULT 0,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS permission_grants (
-                id TEXT PRIMARY KEY,
-                permission TEXT NOT NULL,
-                scope TEXT NOT NULL,
-                session_id TEXT,
-                allowed_paths_json TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS workflows (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                definition_json TEXT NOT NULL,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id TEXT PRIMARY KEY,
-                session_id TEXT,
-                event_type TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                payload_json TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS runs (
-                id TEXT PRIMARY KEY,
-                session_id TEXT,
-                mode TEXT NOT NULL,
-                input_hash TEXT NOT NULL,
-                input_text TEXT,
-                model_source_id TEXT,
-                model_name TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                duration_ms INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS run_events (
-                id TEXT PRIMARY KEY,
-                run_id TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                payload_json TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(run_id) REFERENCES runs(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS artifacts (
-                id TEXT PRIMARY KEY,
-                run_id TEXT,
-                type TEXT NOT NULL,
-                name TEXT NOT NULL,
-                content TEXT NOT NULL,
-                metadata_json TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS memory_items (
-                id TEXT PRIMARY KEY,
-                kind TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS plugin_registry (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                version TEXT NOT NULL,
-                path TEXT NOT NULL,
-                enabled INTEGER NOT NULL DEFAULT 1,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS vector_index (
-                id TEXT PRIMARY KEY,
-                workspace_id TEXT NOT NULL,
-                path TEXT NOT NULL,
-                content_hash TEXT NOT NULL,
-                embedding_json TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS app_settings (
-                key TEXT PRIMARY KEY,
-                value_json TEXT NOT NULL,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS workspaces (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                description TEXT NOT NULL DEFAULT '',
-                default_profile_id TEXT,
-                default_model_source_id TEXT,
-                default_model TEXT,
-                logging_strictness TEXT NOT NULL DEFAULT 'standard',
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                is_active INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS workspace_scopes (
-                id TEXT PRIMARY KEY,
-                workspace_id TEXT NOT NULL,
-                path TEXT NOT NULL,
-                FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS workspace_tools (
-                id TEXT PRIMARY KEY,
-                workspace_id TEXT NOT NULL,
-                tool_name TEXT NOT NULL,
-                FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS workspace_settings (
-                workspace_id TEXT NOT NULL,
-                key TEXT NOT NULL,
-                value_json TEXT NOT NULL,
-                PRIMARY KEY (workspace_id, key),
-                FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS profiles (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                version INTEGER NOT NULL DEFAULT 1,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                is_default INTEGER NOT NULL DEFAULT 0,
-                is_active INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS profile_settings (
-                profile_id TEXT NOT NULL,
-                key TEXT NOT NULL,
-                value_json TEXT NOT NULL,
-                PRIMARY KEY (profile_id, key),
-                FOREIGN KEY(profile_id) REFERENCES profiles(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS profile_history (
-                id TEXT PRIMARY KEY,
-                profile_id TEXT NOT NULL,
-                snapshot_json TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(profile_id) REFERENCES profiles(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS settings_profiles (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                version INTEGER NOT NULL DEFAULT 1,
-                is_active INTEGER NOT NULL DEFAULT 0,
-                payload_json TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS settings_profile_versions (
-                id TEXT PRIMARY KEY,
-                profile_id TEXT NOT NULL,
-                version INTEGER NOT NULL,
-                payload_json TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(profile_id) REFERENCES settings_profiles(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS secrets (
-                id TEXT PRIMARY KEY,
-                key_name TEXT UNIQUE NOT NULL,
-                encrypted_value TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Yield the shared writer connection; the outermost block commits or rolls back."""
+    global _writer, _writer_depth
+    with _writer_lock:
+        if _writer is None:
+            _writer = open_connection()
+        conn = _writer
+        _writer_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            if _writer_depth == 1:
+                conn.rollback()
+            raise
+        else:
+            if _writer_depth == 1:
+                conn.commit()
+        finally:
+            _writer_depth -= 1
+
+
+@contextmanager
+def read_connection() -> Iterator[sqlite3.Connection]:
+    """Yield this thread's query-only connection (autocommit, sees committed writes)."""
+    cached = getattr(_local, "reader", None)
+    if cached is None or cached[0] != _generation:
+        conn = open_connection(readonly=True)
+        with _readers_lock:
+            _readers.append(conn)
+        _local.reader = (_generation, conn)
+    else:
+        conn = cached[1]
+    yield conn
+
+
+def close_connections() -> None:
+    """Close pooled connections; threads reopen lazily on next use."""
+    global _writer, _generation
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    with _readers_lock:
+        _generation += 1
+        for conn in _readers:
+            conn.close()
+        _readers.clear()
+
+
+def _migrate_base_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS model_sources (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            base_url TEXT NOT NULL,
+            is_local INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS permission_grants (
+            id TEXT PRIMARY KEY,
+            permission TEXT NOT NULL,
+            scope TEXT NOT NULL,
+            session_id TEXT,
+            allowed_paths_json TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS workflows (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            definition_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id TEXT PRIMARY KEY,
+            session_id TEXT,
+            event_type TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            payload_json TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            session_id TEXT,
+            mode TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            input_text TEXT,
+            model_source_id TEXT,
+            model_name TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS run_events (
+            id TEXT PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            payload_json TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(run_id) REFERENCES runs(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id TEXT PRIMARY KEY,
+            run_id TEXT,
+            type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata_json TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS memory_items (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS plugin_registry (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            version TEXT NOT NULL,
+            path TEXT NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS vector_index (
+            id TEXT PRIMARY KEY,
+            workspace_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            embedding_json TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS workspaces (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            default_profile_id TEXT,
+            default_model_source_id TEXT,
+            default_model TEXT,
+            logging_strictness TEXT NOT NULL DEFAULT 'standard',
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            is_active INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS workspace_scopes (
+            id TEXT PRIMARY KEY,
+            workspace_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS workspace_tools (
+            id TEXT PRIMARY KEY,
+            workspace_id TEXT NOT NULL,
+            tool_name TEXT NOT NULL,
+            FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS workspace_settings (
+            workspace_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value_json TEXT NOT NULL,
+            PRIMARY KEY (workspace_id, key),
+            FOREIGN KEY(workspace_id) REFERENCES workspaces(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS profiles (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            is_default INTEGER NOT NULL DEFAULT 0,
+            is_active INTEGER NOT NULL DEFAULT 0
+        );
 
-        conn.execute("DROP TABLE IF EXISTS ui_layouts")
-
-        # Migrate legacy settings_profiles -> profiles/profile_settings (best-effort).
-        cols = conn.execute("PRAGMA table_info(profiles)").fetchall()
-        col_names = {row[1] for row in cols}
-        if "version" not in col_names:
-            conn.execute("ALTER TABLE profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
-
-        legacy = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='settings_profiles'"
-        ).fetchone()
-        if legacy:
-            rows = conn.execute(
-                "SELECT id, name, payload_json, is_active FROM settings_profiles"
-            ).fetchall()
-            for row in rows:
+        CREATE TABLE IF NOT EXISTS profile_settings (
+            profile_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value_json TEXT NOT NULL,
+            PRIMARY KEY (profile_id, key),
+            FOREIGN KEY(profile_id) REFERENCES profiles(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS profile_history (
+            id TEXT PRIMARY KEY,
+            profile_id TEXT NOT NULL,
+            snapshot_json TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(profile_id) REFERENCES profiles(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS settings_profiles (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            is_active INTEGER NOT NULL DEFAULT 0,
+            payload_json TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS settings_profile_versions (
+            id TEXT PRIMARY KEY,
+            profile_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            payload_json TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(profile_id) REFERENCES settings_profiles(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS secrets (
+            id TEXT PRIMARY KEY,
+            key_name TEXT UNIQUE NOT NULL,
+            encrypted_value TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+    conn.execute("DROP TABLE IF EXISTS ui_layouts")
+
+    # Migrate legacy settings_profiles -> profiles/profile_settings (best-effort).
+    cols = conn.execute("PRAGMA table_info(profiles)").fetchall()
+    col_names = {row[1] for row in cols}
+    if "version" not in col_names:
+        conn.execute("ALTER TABLE profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    legacy = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='settings_profiles'"
+    ).fetchone()
+    if legacy:
+        rows = conn.execute(
+            "SELECT id, name, payload_json, is_active FROM settings_profiles"
+        ).fetchall()
+        for row in rows:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO profiles (id, name, version, is_default, is_active)
+                VALUES (?, ?, 1, 0, ?)
+                """,
+                (row["id"], row["name"], row["is_active"]),
+            )
+            try:
+                payload = json.loads(row["payload_json"])
+            except Exception:
+                payload = {}
+            for key, value in payload.items():
                 conn.execute(
                     """
-                    INSERT OR IGNORE INTO profiles (id, name, version, is_default, is_active)
-                    VALUES (?, ?, 1, 0, ?)
+                    INSERT OR REPLACE INTO profile_settings (profile_id, key, value_json)
+                    VALUES (?, ?, ?)
                     """,
-                    (row["id"], row["name"], row["is_active"]),
+                    (row["id"], key, json.dumps(value)),
                 )
-                try:
-                    payload = json.loads(row["payload_json"])
-                except Exception:
-                    payload = {}
-                for key, value in payload.items():
-                    conn.execute(
-                        """
-                        INSERT OR REPLACE INTO profile_settings (profile_id, key, value_json)
-                        VALUES (?, ?, ?)
-                        """,
-                        (row["id"], key, json.dumps(value)),
-                    )
-
-        # Legacy column cleanup compatibility: old DBs may still have auth_token.
-        cols = conn.execute("PRAGMA table_info(model_sources)").fetchall()
-        col_names = {row[1] for row in cols}
-        if "auth_token" in col_names:
-            # Kept for backward compatibility read-path; we no longer write to it.
-            pass
+
+
+def _migrate_hot_path_indexes(conn: sqlite3.Connection) -> None:
+    # Covering where the rows are small; run/audit/vector lookups index the filter column only.
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS idx_run_events_run_created ON run_events (run_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_created ON audit_logs (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_vector_index_workspace ON vector_index (workspace_id, path)",
+        "CREATE INDEX IF NOT EXISTS idx_permission_grants_lookup"
+        " ON permission_grants (permission, session_id, scope, allowed_paths_json)",
+        "CREATE INDEX IF NOT EXISTS idx_permission_grants_session ON permission_grants (session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_workspace_scopes_workspace ON workspace_scopes (workspace_id, path)",
+        "CREATE INDEX IF NOT EXISTS idx_workspace_tools_workspace ON workspace_tools (workspace_id, tool_name)",
+        "CREATE INDEX IF NOT EXISTS idx_workspaces_active ON workspaces (is_active)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_active ON profiles (is_active)",
+        "CREATE INDEX IF NOT EXISTS idx_profile_history_profile_created ON profile_history (profile_id, created_at)",
+    ):
+        conn.execute(statement)
+
+
+def _migrate_rate_limit_counters(conn: sqlite3.Connection) -> None:
+    # Shared sliding-window state for rate limits across backend worker processes.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rate_limit_counters (
+            session_id TEXT PRIMARY KEY,
+            window_start REAL NOT NULL,
+            current_count INTEGER NOT NULL DEFAULT 0,
+            previous_count INTEGER NOT NULL DEFAULT 0,
+            allowed_count INTEGER NOT NULL DEFAULT 0,
+            throttled_count INTEGER NOT NULL DEFAULT 0,
+            last_seen REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_last_seen ON rate_limit_counters (last_seen)")
+
+
+def _migrate_file_index(conn: sqlite3.Connection) -> None:
+    # Per-workspace filename metadata, refreshed incrementally by directory mtime.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS file_index (
+            id INTEGER PRIMARY KEY,
+            workspace_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            name_lower TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            UNIQUE (workspace_id, path)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS file_index_dirs (
+            workspace_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            parent TEXT,
+            mtime_ns INTEGER NOT NULL,
+            ignore_files TEXT NOT NULL DEFAULT '',
+            ignore_mtime_ns INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (workspace_id, path)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_dir ON file_index (workspace_id, dir)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_ext ON file_index (workspace_id, ext)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_dirs_parent ON file_index_dirs (workspace_id, parent)")
+    try:
+        # Trigram FTS (SQLite 3.34+) answers substring and GLOB name queries from an index.
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS file_index_trigram"
+            " USING fts5(name_lower, content='file_index', content_rowid='id', tokenize='trigram')"
+        )
+    except sqlite3.OperationalError:
+        return
+    # Names never change for a given row (upserts only touch size/mtime), so insert/delete triggers suffice.
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS file_index_trigram_ai AFTER INSERT ON file_index BEGIN
+            INSERT INTO file_index_trigram (rowid, name_lower) VALUES (new.id, new.name_lower);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS file_index_trigram_ad AFTER DELETE ON file_index BEGIN
+            INSERT INTO file_index_trigram (file_index_trigram, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+        END
+        """
+    )
+
+
+def _migrate_quarantine_objects(conn: sqlite3.Connection) -> None:
+    # Content-addressed quarantine store; size/mtime_ns detect objects changed after they were stored.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quarantine_objects (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            method TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quarantine_objects_last_used ON quarantine_objects (last_used)")
+
+
+# Append-only: each step runs once, in order, and bumps PRAGMA user_version.
+MIGRATIONS: list[tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migrate_base_schema),
+    (2, _migrate_hot_path_indexes),
+    (3, _migrate_rate_limit_counters),
+    (4, _migrate_file_index),
+    (5, _migrate_quarantine_objects),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version() -> int:
+    with read_connection() as conn:
+        return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def initialize_db() -> None:
+    """Apply pending migrations; a no-op once the database is at SCHEMA_VERSION."""
+    with connection() as conn:
+        current = int(conn.execute("PRAGMA user_version").fetchone()[0])
+        for version, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
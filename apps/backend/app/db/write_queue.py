@@ -0,0 +1,158 @@
+"""Group-commit write-behind queue for append-only log tables."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from app.db.sqlite import open_connection
+
+FLUSH_INTERVAL_SECONDS = 0.05
+MAX_BATCH_ROWS = 256
+FLUSH_TIMEOUT_SECONDS = 5.0
+# A row that still hits "database is locked" after the connection's busy timeout is retried this often.
+ROW_RETRY_ATTEMPTS = 3
+ROW_RETRY_BACKOFF_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+_Write = tuple[str, tuple[Any, ...]]
+
+
+def utc_timestamp() -> str:
+    """Match SQLite CURRENT_TIMESTAMP so queued rows keep their enqueue time."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class WriteBehindQueue:
+    """Single background writer that commits queued INSERTs in batches.
+
+    Rows are committed every ``interval_seconds`` or ``max_rows``, whichever
+    comes first. ``flush()`` blocks until everything queued before the call is
+    committed, for readers that need read-your-writes. When a batch fails,
+    rows are committed one by one: a locked database is retried with backoff,
+    and a row that still fails is logged and counted in ``dropped``.
+    """
+
+    def __init__(self, interval_seconds: float = FLUSH_INTERVAL_SECONDS, max_rows: int = MAX_BATCH_ROWS) -> None:
+        self.interval_seconds = interval_seconds
+        self.max_rows = max_rows
+        self._queue: queue.Queue[_Write | threading.Event | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="neroai-db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, sql: str, params: tuple[Any, ...]) -> None:
+        self._ensure_started()
+        self._queue.put((sql, params))
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+        if self._queue.empty() and not (self._thread and self._thread.is_alive()):
+            return True
+        self._ensure_started()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = FLUSH_TIMEOUT_SECONDS) -> None:
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        conn = open_connection()
+        try:
+            while True:
+                item = self._queue.get()
+                batch: list[_Write] = []
+                waiters: list[threading.Event] = []
+                stopping = False
+                deadline = time.monotonic() + self.interval_seconds
+                while True:
+                    if item is None:
+                        stopping = True
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        break
+                    batch.append(item)
+                    remaining = deadline - time.monotonic()
+                    if len(batch) >= self.max_rows or remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                self._commit(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list[_Write]) -> None:
+        if not batch:
+            return
+        try:
+            with conn:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+        except sqlite3.Error:
+            # One bad row must not drop the rest of the batch.
+            for sql, params in batch:
+                self._commit_row(conn, sql, params)
+
+    def _commit_row(self, conn: sqlite3.Connection, sql: str, params: tuple[Any, ...]) -> None:
+        for attempt in range(ROW_RETRY_ATTEMPTS + 1):
+            try:
+                with conn:
+                    conn.execute(sql, params)
+                return
+            except sqlite3.Error as exc:
+                if _transient(exc) and attempt < ROW_RETRY_ATTEMPTS:
+                    time.sleep(ROW_RETRY_BACKOFF_SECONDS * 2**attempt)
+                    continue
+                self.dropped += 1
+                # Parameters stay out of the log; they can carry audit metadata.
+                logger.error("Dropped queued write after %d attempt(s): %s: %s", attempt + 1, " ".join(sql.split()), exc)
+                return
+
+
+def _transient(exc: sqlite3.Error) -> bool:
+    message = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+_WRITER = WriteBehindQueue()
+
+
+def enqueue_write(sql: str, params: tuple[Any, ...]) -> None:
+    _WRITER.submit(sql, params)
+
+
+def flush_writes(timeout: float = FLUSH_TIMEOUT_SECONDS) -> bool:
+    return _WRITER.flush(timeout)
+
+
+def stop_writer() -> None:
+    _WRITER.stop()
+
+
+atexit.register(stop_writer)
@@ -6,10 +6,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
-from app.db.sqlite import initialize_db
+from app.db.async_db import run_db
+from app.db.sqlite import close_connections, initialize_db
+from app.db.write_queue import stop_writer
 from app.services.ollama_status import refresh_ollama_status
+from app.services.quarantine import gc_quarantine
 from app.services.seed import seed_defaults
 from app.services.settings_service import get_effective_settings
+from app.services.tool_runner import shutdown_tool_pool, warm_tool_pool
 
 
 app = FastAPI(title="NeroAI Backend", version="0.1.0")
@@ -32,7 +36,8 @@ async def _ollama_poll_loop() -> None:
             await refresh_ollama_status()
         except Exception:
             pass
-        interval = max(5, int(get_effective_settings().ollama_check_interval_seconds))
+        settings = await run_db(get_effective_settings)
+        interval = max(5, int(settings.ollama_check_interval_seconds))
         await asyncio.sleep(interval)
 
 
@@ -40,6 +45,14 @@ async def _ollama_poll_loop() -> None:
 async def startup() -> None:
     initialize_db()
     seed_defaults()
+    try:
+        gc_quarantine()
+    except Exception:
+        pass
+    try:
+        warm_tool_pool()
+    except Exception:
+        pass
     await refresh_ollama_status()
     global _ollama_task
     _ollama_task = asyncio.create_task(_ollama_poll_loop())
@@ -55,3 +68,6 @@ async def shutdown() -> None:
         except asyncio.CancelledError:
             pass
         _ollama_task = None
+    shutdown_tool_pool()
+    stop_writer()
+    close_connections()
@@ -243,6 +243,7 @@ class SettingsResponse(BaseModel):
     max_tool_calls_per_minute: int = 15
     max_files_read_per_run: int = 20
     max_bytes_read_per_run: int = 5_000_000
+    max_grep_matches_per_run: int = 500
     max_runtime_seconds: int = 120
     write_preview_default: bool = True
     quarantine_mode: bool = True
@@ -285,6 +286,7 @@ class SettingsUpdateRequest(BaseModel):
     max_tool_calls_per_minute: int | None = None
     max_files_read_per_run: int | None = None
     max_bytes_read_per_run: int | None = None
+    max_grep_matches_per_run: int | None = None
     max_runtime_seconds: int | None = None
     write_preview_default: bool | None = None
     quarantine_mode: bool | None = None
@@ -377,6 +379,16 @@ class PolicyValidateRequest(BaseModel):
 class PolicyValidateResponse(BaseModel):
     ok: bool
     errors: list[str] = Field(default_factory=list)
+    text_hash: str | None = None
+    plan: dict[str, Any] = Field(default_factory=dict)
+
+
+class RateLimitCounterResponse(BaseModel):
+    session_id: str
+    recent_calls: float
+    allowed: int
+    throttled: int
+    idle_seconds: float
 
 
 class PolicyTestRequest(BaseModel):
@@ -524,7 +536,28 @@ class FileSearchRequest(BaseModel):
     path: str
     pattern: str = "*"
     max_results: int = 100
+    query: str | None = None
+
+
+class FileEntryResponse(BaseModel):
+    path: str
+    size: int
+    mtime: float
 
 
 class FileSearchResponse(BaseModel):
     results: list[str] = Field(default_factory=list)
+    entries: list[FileEntryResponse] = Field(default_factory=list)
+    truncated: bool = False
+    timed_out: bool = False
+
+
+class FileIndexRefreshResponse(BaseModel):
+    workspace_id: str
+    dirs_scanned: int
+    dirs_unchanged: int
+    files_updated: int
+    files_removed: int
+    total_files: int
+    elapsed_ms: float
+    complete: bool
@@ -5,6 +5,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Protocol
 
+EXPECTED_COSTS = ("low", "medium", "high")
+
 
 @dataclass(slots=True)
 class PermissionRequirement:
@@ -12,6 +14,67 @@ class PermissionRequirement:
     path_scoped: bool = False
 
 
+@dataclass(frozen=True, slots=True)
+class PluginCapabilities:
+    """What the runner may assume about a tool; the defaults assume nothing.
+
+    ``pure`` results depend on the arguments alone. ``read_only`` tools have no
+    side effects, so workflows may run them concurrently. ``cacheable_by``
+    names the path arguments (a path or a list of paths) whose stat
+    fingerprints validate a cached result of a read-only tool.
+    """
+
+    pure: bool = False
+    read_only: bool = False
+    cacheable_by: tuple[str, ...] = ()
+    max_concurrency: int | None = None
+    expected_cost: str = "low"
+    streams_output: bool = False
+
+    @property
+    def cacheable(self) -> bool:
+        return not self.streams_output and (self.pure or (self.read_only and bool(self.cacheable_by)))
+
+    @property
+    def concurrent_safe(self) -> bool:
+        return self.pure or self.read_only
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> PluginCapabilities:
+        """Parse a manifest's ``capabilities`` object; unknown keys are ignored."""
+        cost = str(data.get("expected_cost", "low"))
+        if cost not in EXPECTED_COSTS:
+            raise ValueError(f"Invalid expected_cost: {cost}")
+        limit = data.get("max_concurrency")
+        cacheable_by = data.get("cacheable_by") or ()
+        if isinstance(cacheable_by, str):
+            cacheable_by = (cacheable_by,)
+        return cls(
+            pure=bool(data.get("pure", False)),
+            read_only=bool(data.get("read_only", data.get("pure", False))),
+            cacheable_by=tuple(str(name) for name in cacheable_by),
+            max_concurrency=max(1, int(limit)) if limit is not None else None,
+            expected_cost=cost,
+            streams_output=bool(data.get("streams_output", False)),
+        )
+
+
+NO_CAPABILITIES = PluginCapabilities()
+
+
+def plugin_capabilities(plugin: Any) -> PluginCapabilities:
+    """A plugin's optional ``capabilities`` attribute, given as ``PluginCapabilities`` or a dict."""
+    declared = getattr(plugin, "capabilities", None)
+    if isinstance(declared, PluginCapabilities):
+        return declared
+    if isinstance(declared, dict):
+        try:
+            return PluginCapabilities.from_dict(declared)
+        except (TypeError, ValueError):
+            return NO_CAPABILITIES
+    return NO_CAPABILITIES
+
+
 class ToolPlugin(Protocol):
     name: str
     description: str
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from app.plugins.base import PermissionRequirement, PluginCapabilities
+from app.plugins.file_read_batch import ByteBudget
+from app.services.file_walker import WalkEntry, walk_files
+
+MAX_GREP_THREADS = 8
+MMAP_MIN_BYTES = 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+COUNT_CHUNK_BYTES = 1024 * 1024
+MAX_LINE_CHARS = 240
+MAX_CONTEXT_LINES = 10
+MAX_OUTPUT_CHARS = 200_000
+GREP_TIME_BUDGET_SECONDS = 10.0
+_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+
+class _MatchBudget:
+    """Matches and returned line text the whole search may produce, shared by the scanner threads."""
+
+    def __init__(self, max_matches: int, max_chars: int) -> None:
+        self.matches = max_matches
+        self.chars = max_chars
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def take(self, chars: int) -> bool:
+        with self._lock:
+            if self.matches <= 0 or chars > self.chars:
+                self.exhausted = True
+                return False
+            self.matches -= 1
+            self.chars -= chars
+            return True
+
+
+def _line(buf: Any, start: int, end: int) -> str:
+    return buf[start:end].decode("utf-8", errors="replace").rstrip("\r")[:MAX_LINE_CHARS]
+
+
+def _count_newlines(buf: Any, start: int, end: int) -> int:
+    # mmap has no count(); slicing in chunks keeps the copies small.
+    count = 0
+    while start < end:
+        stop = min(end, start + COUNT_CHUNK_BYTES)
+        count += buf[start:stop].count(b"\n")
+        start = stop
+    return count
+
+
+def _before(buf: Any, line_start: int, wanted: int) -> list[str]:
+    lines: list[str] = []
+    while len(lines) < wanted and line_start > 0:
+        previous = buf.rfind(b"\n", 0, line_start - 1) + 1
+        lines.append(_line(buf, previous, line_start - 1))
+        line_start = previous
+    lines.reverse()
+    return lines
+
+
+def _after(buf: Any, line_end: int, wanted: int, endpos: int) -> list[str]:
+    lines: list[str] = []
+    pos = line_end + 1
+    while len(lines) < wanted and pos < endpos:
+        end = buf.find(b"\n", pos, endpos)
+        if end < 0:
+            end = endpos
+        lines.append(_line(buf, pos, end))
+        pos = end + 1
+    return lines
+
+
+def _scan(buf: Any, endpos: int, regex: re.Pattern[bytes], path: str, context: int, budget: _MatchBudget) -> list[dict]:
+    """One match per line; newlines are only counted up to each matching line."""
+    found: list[dict] = []
+    pos = 0
+    counted = 0
+    line_no = 1
+    while pos < endpos:
+        match = regex.search(buf, pos, endpos)
+        if match is None:
+            break
+        start = buf.rfind(b"\n", 0, match.start()) + 1
+        end = buf.find(b"\n", match.end(), endpos)
+        if end < 0:
+            end = endpos
+        line_no += _count_newlines(buf, counted, start)
+        counted = start
+        item = {
+            "path": path,
+            "line": line_no,
+            "text": _line(buf, start, end),
+            "before": _before(buf, start, context),
+            "after": _after(buf, end, context, endpos),
+        }
+        if not budget.take(len(item["text"]) + sum(len(line) for line in item["before"] + item["after"])):
+            break
+        found.append(item)
+        pos = end + 1
+    return found
+
+
+def _grep_file(
+    path: str, regex: re.Pattern[bytes], context: int, bytes_budget: ByteBudget, matches: _MatchBudget
+) -> dict[str, Any]:
+    fd = os.open(path, os.O_RDONLY | _NOFOLLOW)
+    with os.fdopen(fd, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        granted = bytes_budget.take(size)
+        head = handle.read(min(BINARY_SNIFF_BYTES, granted))
+        if b"\0" in head:
+            bytes_budget.refund(granted - len(head))
+            return {"matches": [], "bytes_read": len(head), "binary": True}
+        if size >= MMAP_MIN_BYTES and granted > len(head):
+            # Big files are scanned in place; the regex engine reads the mapping directly.
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return {"matches": _scan(mapped, granted, regex, path, context, matches), "bytes_read": granted, "binary": False}
+        buf = head + handle.read(granted - len(head))
+        bytes_budget.refund(granted - len(buf))
+        return {"matches": _scan(buf, len(buf), regex, path, context, matches), "bytes_read": len(buf), "binary": False}
+
+
+def compile_pattern(pattern: str, ignore_case: bool = False, fixed_strings: bool = False) -> re.Pattern[bytes]:
+    source = re.escape(pattern) if fixed_strings else pattern
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        return re.compile(source.encode("utf-8"), flags)
+    except re.error as exc:
+        raise ValueError(f"Invalid pattern: {exc}") from exc
+
+
+class FileGrepPlugin:
+    name = "file_grep"
+    description = "Search text file contents under a folder with a regex and return matching lines with context."
+    input_schema = {
+        "type": "object",
+        "required": ["path", "pattern"],
+        "properties": {
+            "path": {"type": "string"},
+            "pattern": {"type": "string"},
+            "glob": {"type": "string"},
+            "ignore_case": {"type": "boolean"},
+            "fixed_strings": {"type": "boolean"},
+            "context_lines": {"type": "integer"},
+            "max_matches": {"type": "integer"},
+            "max_files": {"type": "integer"},
+            "max_total_bytes": {"type": "integer"},
+        },
+    }
+    permission_requirements = [PermissionRequirement(permission="filesystem.read", path_scoped=True)]
+    # Searches usually span trees too large to fingerprint, so matches are never cached.
+    capabilities = PluginCapabilities(read_only=True, expected_cost="high", max_concurrency=2)
+
+    def run(self, payload: dict) -> dict:
+        started = time.perf_counter()
+        deadline = started + GREP_TIME_BUDGET_SECONDS
+        base = Path(payload["path"]).resolve()
+        regex = compile_pattern(payload["pattern"], bool(payload.get("ignore_case")), bool(payload.get("fixed_strings")))
+        context = max(0, min(int(payload.get("context_lines", 2)), MAX_CONTEXT_LINES))
+        limit = payload.get("max_total_bytes")
+        bytes_budget = ByteBudget(int(limit) if limit is not None else None)
+        matches = _MatchBudget(max(1, int(payload.get("max_matches", 100))), MAX_OUTPUT_CHARS)
+
+        if base.is_file():
+            walk_entries, walk_truncated, timed_out = [WalkEntry(str(base), base.name, 0, 0.0, 0)], False, False
+        else:
+            walk = walk_files(
+                str(base),
+                pattern=payload.get("glob"),
+                max_files=int(payload.get("max_files", 1000)),
+                time_budget=GREP_TIME_BUDGET_SECONDS,
+            )
+            walk_entries, walk_truncated, timed_out = walk.entries, walk.truncated, walk.timed_out
+
+        def grep_one(entry: WalkEntry) -> dict[str, Any]:
+            if matches.exhausted or time.perf_counter() > deadline:
+                return {"skipped": True}
+            try:
+                return _grep_file(entry.path, regex, context, bytes_budget, matches)
+            except OSError as exc:
+                return {"error": f"{entry.path}: {exc}"}
+
+        if len(walk_entries) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_GREP_THREADS, len(walk_entries))) as executor:
+                scanned = list(executor.map(grep_one, walk_entries))
+        else:
+            scanned = [grep_one(entry) for entry in walk_entries]
+
+        done = [item for item in scanned if "matches" in item]
+        return {
+            "path": str(base),
+            "matches": [match for item in done for match in item["matches"]],
+            "files_scanned": len(done),
+            "files_matched": sum(1 for item in done if item["matches"]),
+            "files_binary": sum(1 for item in done if item["binary"]),
+            "errors": [item["error"] for item in scanned if "error" in item],
+            "bytes_read": sum(item["bytes_read"] for item in done),
+            "truncated": matches.exhausted or walk_truncated,
+            "budget_exhausted": bytes_budget.exhausted,
+            "timed_out": timed_out or (any(item.get("skipped") for item in scanned) and not matches.exhausted),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
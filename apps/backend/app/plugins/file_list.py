@@ -2,28 +2,39 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from app.plugins.base import PermissionRequirement
+from app.plugins.base import PermissionRequirement, PluginCapabilities
+from app.services.file_walker import walk_files
+
+TEXT_EXTENSIONS = (".txt", ".md", ".py", ".json", ".yaml", ".yml", ".csv", ".log")
+LIST_TIME_BUDGET_SECONDS = 5.0
 
 
 class FileListPlugin:
     name = "file_list"
-    description = "List text files in a folder."
+    description = "List text files in a folder (breadth-first, skipping ignored and vendored directories)."
     input_schema = {
         "type": "object",
         "required": ["path"],
-        "properties": {"path": {"type": "string"}, "max_files": {"type": "integer"}},
+        "properties": {"path": {"type": "string"}, "max_files": {"type": "integer"}, "max_depth": {"type": "integer"}},
     }
     permission_requirements = [PermissionRequirement(permission="filesystem.read", path_scoped=True)]
+    capabilities = PluginCapabilities(read_only=True, cacheable_by=("path",), expected_cost="medium")
 
     def run(self, payload: dict) -> dict:
         base = Path(payload["path"]).resolve()
         max_files = int(payload.get("max_files", 25))
-        exts = {".txt", ".md", ".py", ".json", ".yaml", ".yml", ".csv", ".log"}
-        files: list[str] = []
-        for item in base.rglob("*"):
-            if item.is_file() and item.suffix.lower() in exts:
-                files.append(str(item))
-            if len(files) >= max_files:
-                break
-        return {"path": str(base), "files": files}
-
+        max_depth = payload.get("max_depth")
+        walk = walk_files(
+            str(base),
+            extensions=TEXT_EXTENSIONS,
+            max_files=max_files,
+            max_depth=int(max_depth) if max_depth is not None else None,
+            time_budget=LIST_TIME_BUDGET_SECONDS,
+        )
+        return {
+            "path": str(base),
+            "files": [entry.path for entry in walk.entries],
+            "entries": [entry.as_dict() for entry in walk.entries],
+            "truncated": walk.truncated,
+            "timed_out": walk.timed_out,
+        }
@@ -1,17 +1,257 @@
 from __future__ import annotations
 
+import base64
+import codecs
+import json
+import os
+import re
 from pathlib import Path
+from typing import BinaryIO
 
-from app.plugins.base import PermissionRequirement
+from app.plugins.base import PermissionRequirement, PluginCapabilities
+
+MAX_CHARS = 200_000
+BLOCK_BYTES = 65_536
+# Line breaks as text mode sees them: CRLF, LF or a lone CR.
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+
+def encode_continuation(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_continuation(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise ValueError("Invalid continuation token") from exc
+    if not isinstance(state, dict) or not isinstance(state.get("offset"), int):
+        raise ValueError("Invalid continuation token")
+    return state
+
+
+def _newlines(text: str) -> str:
+    """Translate ``\\r\\n`` and ``\\r`` to ``\\n`` as text-mode reads do."""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _keep_crlf(handle: BinaryIO, text: str, end: int) -> tuple[str, int]:
+    """Extend a read ending in CR by its LF so a page never splits the pair."""
+    if text.endswith("\r"):
+        handle.seek(end)
+        if handle.read(1) == b"\n":
+            return text + "\n", end + 1
+    return text, end
+
+
+def _align(handle: BinaryIO, offset: int) -> int:
+    """Move ``offset`` past UTF-8 continuation bytes so decoding starts on a character."""
+    handle.seek(offset)
+    head = handle.read(3)
+    skip = 0
+    while skip < len(head) and head[skip] & 0xC0 == 0x80:
+        skip += 1
+    return offset + skip
+
+
+def _read_chars(handle: BinaryIO, offset: int, max_chars: int, max_bytes: int | None = None) -> tuple[str, int]:
+    """Decode forward from ``offset``; returns the text and the offset just past it."""
+    handle.seek(offset)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: list[str] = []
+    chars = 0
+    budget = max_bytes
+    while chars < max_chars and (budget is None or budget > 0):
+        want = min(BLOCK_BYTES, max_chars - chars)
+        if budget is not None:
+            want = min(want, budget)
+            budget -= want
+        block = handle.read(want)
+        text = decoder.decode(block, final=not block)
+        parts.append(text)
+        chars += len(text)
+        if not block:
+            break
+    text = "".join(parts)[:max_chars]
+    # A byte budget shorter than the character at ``offset`` still returns that
+    # character, so a continuation always moves forward.
+    extra = 0
+    while not text and max_chars > 0 and extra < 3:
+        block = handle.read(1)
+        if not block:
+            break
+        extra += 1
+        text = decoder.decode(block)
+    return _keep_crlf(handle, text, offset + len(text.encode("utf-8")))
+
+
+def _read_block(handle: BinaryIO, size: int) -> bytes:
+    """Read ``size`` bytes, extended while the block ends in CR, so a CRLF is never split."""
+    block = handle.read(size)
+    while block.endswith(b"\r"):
+        extra = handle.read(1)
+        if not extra:
+            break
+        block += extra
+    return block
+
+
+def _skip_lines(handle: BinaryIO, offset: int, count: int) -> tuple[int, int]:
+    """Advance past ``count`` line breaks by block scanning; returns (offset, lines skipped)."""
+    handle.seek(offset)
+    skipped = 0
+    while skipped < count:
+        block = _read_block(handle, BLOCK_BYTES)
+        if not block:
+            break
+        for match in _LINE_BREAK.finditer(block):
+            skipped += 1
+            if skipped == count:
+                return offset + match.end(), skipped
+        offset += len(block)
+    return offset, skipped
+
+
+def _read_lines(handle: BinaryIO, offset: int, count: int | None, max_chars: int) -> tuple[str, int, int]:
+    """Read up to ``count`` lines from ``offset``; returns (text, end offset, line breaks read)."""
+    handle.seek(offset)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: list[str] = []
+    chars = 0
+    lines = 0
+    while (count is None or lines < count) and chars < max_chars:
+        # A line longer than the char budget is cut; the continuation resumes mid-line.
+        block = _read_block(handle, min(BLOCK_BYTES, max_chars - chars))
+        if not block:
+            parts.append(decoder.decode(b"", final=True))
+            break
+        for match in _LINE_BREAK.finditer(block):
+            lines += 1
+            if lines == count:
+                block = block[: match.end()]
+                break
+        text = decoder.decode(block)
+        parts.append(text)
+        chars += len(text)
+    text = "".join(parts)
+    return text, offset + len(text.encode("utf-8")), lines
+
+
+def _tail_offset(handle: BinaryIO, size: int, lines: int) -> int:
+    """Scan backwards in blocks for the start of the last ``lines`` lines."""
+    handle.seek(max(0, size - 2))
+    last = handle.read(2)
+    end = size - (2 if last == b"\r\n" else 1 if last[-1:] in (b"\n", b"\r") else 0)
+    found = 0
+    pos = end
+    while pos > 0:
+        start = max(0, pos - BLOCK_BYTES)
+        handle.seek(start)
+        # One byte past the block shows whether a CR at its end is half of a CRLF.
+        block = handle.read(pos - start + 1)
+        next_lf = block.rfind(b"\n", 0, pos - start)
+        next_cr = block.rfind(b"\r", 0, pos - start)
+        while next_lf >= 0 or next_cr >= 0:
+            if next_lf > next_cr:
+                index = next_lf
+                next_lf = block.rfind(b"\n", 0, index)
+            else:
+                index = next_cr
+                next_cr = block.rfind(b"\r", 0, index)
+                if block[index + 1 : index + 2] == b"\n":
+                    continue
+            found += 1
+            if found == lines:
+                return start + index + 1
+        pos = start
+    return 0
+
+
+def _int_arg(payload: dict, key: str, minimum: int) -> int | None:
+    value = payload.get(key)
+    if value is None:
+        return None
+    value = int(value)
+    if value < minimum:
+        raise ValueError(f"{key} must be >= {minimum}")
+    return value
 
 
 class FileReadPlugin:
     name = "file_read"
-    description = "Read text file content"
-    input_schema = {"type": "object", "required": ["path"], "properties": {"path": {"type": "string"}}}
+    description = "Read text file content, optionally a byte range, a line window or the last lines."
+    input_schema = {
+        "type": "object",
+        "required": ["path"],
+        "properties": {
+            "path": {"type": "string"},
+            "offset": {"type": "integer"},
+            "length": {"type": "integer"},
+            "start_line": {"type": "integer"},
+            "end_line": {"type": "integer"},
+            "tail_lines": {"type": "integer"},
+            "continuation": {"type": "string"},
+        },
+    }
     permission_requirements = [PermissionRequirement(permission="filesystem.read", path_scoped=True)]
+    capabilities = PluginCapabilities(read_only=True, cacheable_by=("path",))
 
     def run(self, payload: dict) -> dict:
         path = Path(payload["path"]).resolve()
-        content = path.read_text(encoding="utf-8")
-        return {"path": str(path), "content": content[:200000]}
+        st = os.stat(path)
+        size = st.st_size
+        token = payload.get("continuation")
+        tail_lines = None
+        if token:
+            state = decode_continuation(str(token))
+            if state.get("ino") != st.st_ino:
+                raise ValueError("File changed since the continuation token was issued")
+            offset, line, page, length = state["offset"], state.get("line"), state.get("page"), state.get("length")
+        else:
+            offset = _int_arg(payload, "offset", 0) or 0
+            length = _int_arg(payload, "length", 1)
+            tail_lines = _int_arg(payload, "tail_lines", 1)
+            line = _int_arg(payload, "start_line", 1)
+            end_line = _int_arg(payload, "end_line", 1)
+            page = None
+            if end_line is not None:
+                line = line or 1
+                if end_line < line:
+                    raise ValueError("end_line must be >= start_line")
+                page = end_line - line + 1
+
+        result: dict = {"path": str(path), "size": size}
+        next_state: dict | None = None
+        with path.open("rb") as handle:
+            if tail_lines is not None:
+                begin = _tail_offset(handle, size, tail_lines)
+                # Keep the end of very long tails rather than their start.
+                begin = max(begin, _align(handle, max(0, size - MAX_CHARS * 4)))
+                content, end = _read_chars(handle, begin, MAX_CHARS * 4)
+                content = content[-MAX_CHARS:]
+                result.update(content=_newlines(content), offset=end - len(content.encode("utf-8")), next_offset=end)
+            elif line is not None:
+                if not token:
+                    offset, skipped = _skip_lines(handle, 0, line - 1)
+                    line = 1 + skipped
+                content, end, lines = _read_lines(handle, offset, page, MAX_CHARS)
+                # A last line without a trailing newline still counts once the file ends.
+                complete = lines + (1 if content and not content.endswith(("\n", "\r")) and end >= size else 0)
+                result.update(content=_newlines(content), offset=offset, next_offset=end, start_line=line, end_line=line + complete - 1)
+                next_state = {"line": line + lines, "page": page}
+            else:
+                begin = _align(handle, min(offset, size))
+                content, end = _read_chars(handle, begin, MAX_CHARS, length)
+                result.update(content=_newlines(content), offset=begin, next_offset=end)
+                next_state = {"length": length}
+
+        continuation = None
+        if next_state is not None and result["next_offset"] < size:
+            next_state = {key: value for key, value in next_state.items() if value is not None}
+            next_state.update(offset=result["next_offset"], ino=st.st_ino)
+            continuation = encode_continuation(next_state)
+        result["continuation"] = continuation
+        result["truncated"] = continuation is not None
+        return result
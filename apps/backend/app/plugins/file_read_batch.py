@@ -1,8 +1,67 @@
 from __future__ import annotations
 
+import codecs
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from app.plugins.base import PermissionRequirement
+from app.plugins.base import PermissionRequirement, PluginCapabilities
+
+READ_CHUNK_BYTES = 65_536
+MAX_READ_THREADS = 8
+
+
+class ByteBudget:
+    """Bytes the whole batch may read, shared by the reader threads."""
+
+    def __init__(self, limit: int | None) -> None:
+        self.remaining = limit
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def take(self, wanted: int) -> int:
+        if self.remaining is None:
+            return wanted
+        with self._lock:
+            granted = min(wanted, self.remaining)
+            self.remaining -= granted
+            if granted < wanted:
+                self.exhausted = True
+            return granted
+
+    def refund(self, unused: int) -> None:
+        if self.remaining is not None and unused:
+            with self._lock:
+                self.remaining += unused
+
+
+def _read_prefix(path: Path, max_chars: int, budget: ByteBudget) -> tuple[str, int, bool]:
+    """Decode at most ``max_chars`` characters, reading only as many bytes as that needs."""
+    # Translate \r\n and \r to \n as text-mode reads do; a CR split across blocks is held back.
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    parts: list[str] = []
+    chars = 0
+    bytes_read = 0
+    with path.open("rb") as handle:
+        while chars < max_chars:
+            # Each remaining char needs at least one byte, so this never reads past the budget.
+            size = budget.take(min(READ_CHUNK_BYTES, max_chars - chars))
+            block = handle.read(size) if size else b""
+            budget.refund(size - len(block))
+            bytes_read += len(block)
+            if not block:
+                # End of file flushes the decoder; an exhausted budget just stops.
+                text = decoder.decode(b"", final=bool(size))
+                parts.append(text)
+                chars += len(text)
+                return "".join(parts)[:max_chars], bytes_read, bool(size == 0)
+            text = decoder.decode(block)
+            parts.append(text)
+            chars += len(text)
+        more = bool(handle.read(1))
+    return "".join(parts)[:max_chars], bytes_read, more or chars > max_chars
 
 
 class FileReadBatchPlugin:
@@ -11,19 +70,38 @@ class FileReadBatchPlugin:
     input_schema = {
         "type": "object",
         "required": ["paths"],
-        "properties": {"paths": {"type": "array", "items": {"type": "string"}}, "max_chars_per_file": {"type": "integer"}},
+        "properties": {
+            "paths": {"type": "array", "items": {"type": "string"}},
+            "max_chars_per_file": {"type": "integer"},
+            "max_total_bytes": {"type": "integer"},
+        },
     }
     permission_requirements = [PermissionRequirement(permission="filesystem.read", path_scoped=False)]
+    capabilities = PluginCapabilities(read_only=True, cacheable_by=("paths",), expected_cost="medium")
 
     def run(self, payload: dict) -> dict:
         max_chars = int(payload.get("max_chars_per_file", 5000))
-        result = []
-        for raw in payload.get("paths", []):
-            path = Path(raw).resolve()
+        limit = payload.get("max_total_bytes")
+        budget = ByteBudget(int(limit) if limit is not None else None)
+        paths = [Path(raw).resolve() for raw in payload.get("paths", [])]
+
+        def read_one(path: Path) -> dict:
+            started = time.perf_counter()
             try:
-                content = path.read_text(encoding="utf-8")
-                result.append({"path": str(path), "content": content[:max_chars]})
+                content, bytes_read, truncated = _read_prefix(path, max_chars, budget)
+                item = {"path": str(path), "content": content, "bytes_read": bytes_read, "truncated": truncated}
             except Exception as exc:
-                result.append({"path": str(path), "error": str(exc)})
-        return {"files": result}
+                item = {"path": str(path), "error": str(exc), "bytes_read": 0}
+            item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            return item
 
+        if len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_READ_THREADS, len(paths))) as executor:
+                files = list(executor.map(read_one, paths))
+        else:
+            files = [read_one(path) for path in paths]
+        return {
+            "files": files,
+            "bytes_read": sum(item["bytes_read"] for item in files),
+            "budget_exhausted": budget.exhausted,
+        }
@@ -2,8 +2,114 @@ from __future__ import annotations
 
 from pathlib import Path
 import difflib
+import hashlib
+import os
+import tempfile
 
-from app.plugins.base import PermissionRequirement
+from app.plugins.base import PermissionRequirement, PluginCapabilities
+
+DIFF_CONTEXT_LINES = 3
+# Either side bigger than this is summarized instead of diffed.
+MAX_DIFF_BYTES = 1024 * 1024
+# Changed regions longer than this (on either side) are shown as one replacement.
+MAX_DIFF_REGION_LINES = 50_000
+MAX_DIFF_HUNKS = 20
+MAX_DIFF_LINES = 400
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write to a temp file beside ``path`` and rename it over the target."""
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            os.chmod(temp, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def _range(start: int, stop: int) -> str:
+    # Same range notation as difflib.unified_diff.
+    length = stop - start
+    first = start + 1 if length else start
+    return str(first) if length == 1 else f"{first},{length}"
+
+
+def _opcode_groups(old: list[str], new: list[str]) -> tuple[list[list[tuple[str, int, int, int, int]]], str]:
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+    if prefix == old_end and prefix == new_end:
+        return [], "identical"
+    lo = max(0, prefix - DIFF_CONTEXT_LINES)
+    if max(old_end, new_end) - prefix > MAX_DIFF_REGION_LINES:
+        tag = "replace" if old_end > prefix and new_end > prefix else ("delete" if old_end > prefix else "insert")
+        codes = [("equal", lo, prefix, lo, prefix), (tag, prefix, old_end, prefix, new_end)]
+        tail = min(suffix, DIFF_CONTEXT_LINES)
+        codes.append(("equal", old_end, old_end + tail, new_end, new_end + tail))
+        return [[code for code in codes if code[1] != code[2] or code[3] != code[4]]], "replace"
+    # Compare line ids, not strings, and only over the region between the common prefix and suffix.
+    ids: dict[str, int] = {}
+    old_ids = [ids.setdefault(line, len(ids)) for line in old[lo : old_end + DIFF_CONTEXT_LINES]]
+    new_ids = [ids.setdefault(line, len(ids)) for line in new[lo : new_end + DIFF_CONTEXT_LINES]]
+    matcher = difflib.SequenceMatcher(None, old_ids, new_ids)
+    groups = [
+        [(tag, i1 + lo, i2 + lo, j1 + lo, j2 + lo) for tag, i1, i2, j1, j2 in group]
+        for group in matcher.get_grouped_opcodes(DIFF_CONTEXT_LINES)
+    ]
+    return groups, "line_hash"
+
+
+def preview_diff(path: str, prior: str, content: str) -> tuple[str, dict]:
+    """Unified diff of ``prior`` -> ``content``, bounded in hunks and lines."""
+    old, new = prior.splitlines(), content.splitlines()
+    groups, strategy = _opcode_groups(old, new)
+    lines = [f"--- {path}", f"+++ {path}"] if groups else []
+    shown = 0
+    for group in groups:
+        if shown >= MAX_DIFF_HUNKS or len(lines) >= MAX_DIFF_LINES:
+            break
+        first, last = group[0], group[-1]
+        lines.append(f"@@ -{_range(first[1], last[2])} +{_range(first[3], last[4])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend(" " + line for line in old[i1:i2])
+                continue
+            if tag in {"replace", "delete"}:
+                lines.extend("-" + line for line in old[i1:i2])
+            if tag in {"replace", "insert"}:
+                lines.extend("+" + line for line in new[j1:j2])
+        shown += 1
+    truncated = shown < len(groups) or len(lines) > MAX_DIFF_LINES
+    lines = lines[:MAX_DIFF_LINES]
+    if truncated:
+        lines.append(f"... diff truncated ({shown} of {len(groups)} hunks shown)")
+    summary = {"strategy": strategy, "hunks": len(groups), "hunks_shown": shown, "truncated": truncated}
+    return "\n".join(lines), summary
 
 
 class FileWritePlugin:
@@ -12,35 +118,43 @@ class FileWritePlugin:
     input_schema = {
         "type": "object",
         "required": ["path", "content"],
-        "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+        "properties": {"path": {"type": "string"}, "content": {"type": "string"}, "expected_sha256": {"type": "string"}},
     }
     permission_requirements = [PermissionRequirement(permission="filesystem.write", path_scoped=True)]
+    # One write at a time, so an ``expected_sha256`` check is not raced by another call.
+    capabilities = PluginCapabilities(max_concurrency=1)
 
     def run(self, payload: dict) -> dict:
         path = Path(payload["path"]).resolve()
         path.parent.mkdir(parents=True, exist_ok=True)
         content = payload["content"]
+        data = content.encode("utf-8")
         confirm = bool(payload.get("confirm", False))
         preview_only = bool(payload.get("preview_only", False))
-        prior = path.read_text(encoding="utf-8") if path.exists() else ""
-        diff = "\n".join(
-            difflib.unified_diff(
-                prior.splitlines(),
-                content.splitlines(),
-                fromfile=str(path),
-                tofile=str(path),
-                lineterm="",
-            )
-        )
+        expected = payload.get("expected_sha256")
+        exists = path.exists()
+        prior_size = path.stat().st_size if exists else 0
+
+        prior_hash = None
+        if prior_size > MAX_DIFF_BYTES or len(data) > MAX_DIFF_BYTES:
+            if expected is not None and exists:
+                prior_hash = _sha256_file(path)
+            diff = f"<too large to diff: {prior_size} -> {len(data)} bytes>"
+            summary = {"strategy": "too_large", "hunks": None, "hunks_shown": 0, "truncated": True}
+        else:
+            prior_bytes = path.read_bytes() if exists else b""
+            prior_hash = hashlib.sha256(prior_bytes).hexdigest() if exists else None
+            diff, summary = preview_diff(str(path), prior_bytes.decode("utf-8", errors="replace"), content)
+        # Optimistic concurrency: "" means the file must not exist yet.
+        if expected is not None and expected != (prior_hash or ""):
+            raise ValueError(f"precondition_failed:sha256:{prior_hash or 'missing'}")
+
+        result = {"path": str(path), "preview_diff": diff, "diff_summary": summary, "prior_sha256": prior_hash}
         if payload.get("write_preview_file"):
             preview_path = path.with_suffix(path.suffix + ".neroai.preview")
-            preview_path.write_text(content, encoding="utf-8")
-            return {"path": str(preview_path), "preview_diff": diff, "requires_confirmation": True}
-        if preview_only or (path.exists() and not confirm):
-            return {
-                "path": str(path),
-                "preview_diff": diff,
-                "requires_confirmation": True,
-            }
-        path.write_text(content, encoding="utf-8")
-        return {"path": str(path), "written_chars": len(content), "preview_diff": diff }
+            _atomic_write(preview_path, data)
+            return {**result, "path": str(preview_path), "requires_confirmation": True}
+        if preview_only or (exists and not confirm):
+            return {**result, "requires_confirmation": True}
+        _atomic_write(path, data)
+        return {**result, "written_chars": len(content), "sha256": hashlib.sha256(data).hexdigest()}
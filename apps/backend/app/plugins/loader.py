@@ -0,0 +1,135 @@
+"""Plugin specs and lazy loading, shared by the backend and tool workers.
+
+A spec says where a plugin object lives: ``{"module": ..., "attr": ...}`` for
+an importable module, or ``{"path": ..., "attr": ..., "module_name": ...}``
+for a local plugin file, which is executed under its own module name and
+re-executed when the file's mtime changes. A class attribute is
+instantiated, and an instance is used as-is. A spec that also carries
+``name`` is checked against the loaded plugin's ``name``. The backend writes the spec of
+every registered tool to a JSON index that tool workers read, so a worker
+imports only the plugins it is asked to run. Nothing here touches the
+database.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+PluginSpec = dict[str, str]
+
+BUILTIN_PLUGINS: dict[str, PluginSpec] = {
+    "file_read": {"module": "app.plugins.file_read", "attr": "FileReadPlugin"},
+    "file_write": {"module": "app.plugins.file_write", "attr": "FileWritePlugin"},
+    "file_list": {"module": "app.plugins.file_list", "attr": "FileListPlugin"},
+    "file_read_batch": {"module": "app.plugins.file_read_batch", "attr": "FileReadBatchPlugin"},
+    "file_grep": {"module": "app.plugins.file_grep", "attr": "FileGrepPlugin"},
+}
+
+
+def local_module_name(name: str) -> str:
+    return "neroai_local_plugin_" + re.sub(r"\W", "_", name)
+
+
+def _module_from_path(path: str, module_name: str):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if not spec or not spec.loader:
+        raise RuntimeError("Failed to load plugin entrypoint")
+    module = importlib.util.module_from_spec(spec)
+    # Registered like an import so dataclasses, pickling and tracebacks can find it.
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)  # type: ignore
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
+
+def load_plugin(spec: PluginSpec) -> Any:
+    if "module" in spec:
+        module = importlib.import_module(spec["module"])
+    else:
+        module = _module_from_path(spec["path"], spec.get("module_name") or local_module_name(Path(spec["path"]).stem))
+    obj = getattr(module, spec["attr"])
+    plugin = obj() if isinstance(obj, type) else obj
+    if "name" in spec and getattr(plugin, "name", None) != spec["name"]:
+        raise RuntimeError(f"Plugin {spec['path']} defines name {getattr(plugin, 'name', None)!r}, but its manifest says {spec['name']!r}")
+    return plugin
+
+
+def read_index(path: str | os.PathLike[str]) -> dict[str, PluginSpec]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def write_index(path: str | os.PathLike[str], specs: dict[str, PluginSpec]) -> None:
+    """Replace the index atomically so a starting worker never reads a partial file."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(specs, handle, sort_keys=True)
+        os.replace(temp, target)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def _mtime_ns(spec: PluginSpec) -> int | None:
+    if "path" not in spec:
+        return None
+    try:
+        return os.stat(spec["path"]).st_mtime_ns
+    except OSError:
+        return None
+
+
+class LazyPlugins:
+    """Tool name -> plugin, importing each plugin the first time it is asked for.
+
+    File-based plugins are stat'ed on every lookup and reloaded when their mtime changes.
+    """
+
+    def __init__(self, specs: dict[str, PluginSpec]) -> None:
+        self.specs = dict(specs)
+        self._loaded: dict[str, tuple[Any, int | None]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.specs
+
+    def get(self, name: str) -> Any | None:
+        spec = self.specs.get(name)
+        if spec is None:
+            return None
+        mtime = _mtime_ns(spec)
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded[1] != mtime:
+                loaded = self._loaded[name] = (load_plugin(spec), mtime)
+            return loaded[0]
+
+    def update(self, specs: dict[str, PluginSpec]) -> None:
+        """Replace the specs, forgetting plugins whose spec changed or went away."""
+        with self._lock:
+            for name in [name for name in self._loaded if specs.get(name) != self.specs.get(name)]:
+                del self._loaded[name]
+            self.specs = dict(specs)
+
+    def loaded(self) -> list[str]:
+        return sorted(self._loaded)
+
+
+__all__ = ["BUILTIN_PLUGINS", "LazyPlugins", "PluginSpec", "load_plugin", "local_module_name", "read_index", "write_index"]
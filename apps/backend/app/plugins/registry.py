@@ -1,19 +1,39 @@
 from __future__ import annotations
 
-from app.plugins.file_read import FileReadPlugin
-from app.plugins.file_read_batch import FileReadBatchPlugin
-from app.plugins.file_list import FileListPlugin
-from app.plugins.file_write import FileWritePlugin
-from app.services.plugins_local import load_local_plugins
-
-PLUGIN_REGISTRY = {
-    "file_read": FileReadPlugin(),
-    "file_write": FileWritePlugin(),
-    "file_list": FileListPlugin(),
-    "file_read_batch": FileReadBatchPlugin(),
-}
-
-try:
-    PLUGIN_REGISTRY.update(load_local_plugins())
-except Exception:
-    pass
+import threading
+
+from app.plugins.loader import BUILTIN_PLUGINS, PluginSpec, load_plugin
+from app.services.plugins_local import load_local_plugins, local_plugin_specs
+
+PLUGIN_REGISTRY = {name: load_plugin(spec) for name, spec in BUILTIN_PLUGINS.items()}
+_refresh_lock = threading.Lock()
+
+
+def refresh_local_plugins() -> bool:
+    """Sync local plugins from their manifests into ``PLUGIN_REGISTRY``; returns whether anything changed.
+
+    Built-in tools cannot be shadowed by a local plugin of the same name.
+    """
+    try:
+        local = load_local_plugins()
+    except Exception:
+        return False
+    changed = False
+    with _refresh_lock:
+        for name in [name for name in PLUGIN_REGISTRY if name not in BUILTIN_PLUGINS and name not in local]:
+            del PLUGIN_REGISTRY[name]
+            changed = True
+        for name, plugin in local.items():
+            if name not in BUILTIN_PLUGINS and PLUGIN_REGISTRY.get(name) is not plugin:
+                PLUGIN_REGISTRY[name] = plugin
+                changed = True
+    return changed
+
+
+refresh_local_plugins()
+
+
+def plugin_index() -> dict[str, PluginSpec]:
+    """Where each registered tool lives, for workers that load plugins lazily."""
+    specs = {**local_plugin_specs(), **BUILTIN_PLUGINS}
+    return {name: specs[name] for name in PLUGIN_REGISTRY if name in specs}
@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import json
+import re
 from collections.abc import AsyncGenerator
 
+from app.db.async_db import run_db
 from app.models.schemas import ChatRequest
+from app.plugins.file_read import decode_continuation
 from app.services.audit import log_event
 from app.services.model_sources import get_source
 from app.services.ollama_client import stream_ollama_chat
@@ -13,12 +16,39 @@ from app.services.limits import build_run_limiter
 from app.services.search_router import search_with_router
 from app.services.secret_store import get_secret
 from app.services.settings_service import get_effective_settings
-from app.services.tool_runner import run_tool
+from app.services.tool_runner import run_tool_async
 from app.services.run_logger import finish_run, log_run_event, start_run
 from app.services.memory import list_memory
 from app.services.intent_router import classify_intent
 from app.services.runtime_fallback import decide_runtime_route
 
+CHAT_GREP_MATCHES = 40
+# Bytes of a file put into one chat prompt; the continuation token pages through the rest.
+CHAT_FILE_PAGE_BYTES = 6000
+# "read file: <path> @<token>" continues a file from where the last page ended.
+_CONTINUATION_SUFFIX = re.compile(r"^(?P<path>.+?)\s+@(?P<token>[A-Za-z0-9_-]+)$")
+
+
+def _split_continuation(argument: str) -> tuple[str, str | None]:
+    """Split off a trailing continuation token; a suffix that does not decode stays part of the path."""
+    match = _CONTINUATION_SUFFIX.match(argument)
+    if match:
+        try:
+            decode_continuation(match.group("token"))
+        except ValueError:
+            return argument, None
+        return match.group("path"), match.group("token")
+    return argument, None
+
+
+def _format_grep(result: dict) -> str:
+    lines = []
+    for match in result.get("matches", []):
+        lines.append(f"{match['path']}:{match['line']}: {match['text']}")
+    if result.get("truncated"):
+        lines.append("(more matches not shown)")
+    return "\n".join(lines) or "(no matches)"
+
 
 async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[str, None]:
     route = await decide_runtime_route(payload.source_id, payload.model)
@@ -32,14 +62,15 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
         yield json.dumps({"type": "error", "detail": f"Ollama unavailable: {route.get('reason', 'blocked')}"})
         return
 
-    source = get_source(payload.source_id)
+    source = await run_db(get_source, payload.source_id)
     if not source:
         yield json.dumps({"type": "error", "detail": "Model source not found"})
         return
 
     safe_mode = bool(payload.context.get("safe_mode", True))
-    settings = get_effective_settings()
-    run = start_run(
+    settings = await run_db(get_effective_settings)
+    run = await run_db(
+        start_run,
         session_id=session_id,
         mode="chat",
         input_text=payload.message,
@@ -50,12 +81,14 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
     yield json.dumps({"type": "run_started", "run_id": run_id})
     intent = classify_intent(payload.message)
     log_run_event(run_id, "intent", {"intent": intent})
-    limiter = build_run_limiter(
+    limiter = await run_db(
+        build_run_limiter,
         {
             "max_tool_calls_per_message": settings.max_tool_calls_per_message,
             "max_tool_calls_per_minute": settings.max_tool_calls_per_minute,
             "max_files_read_per_run": settings.max_files_read_per_run,
             "max_bytes_read_per_run": settings.max_bytes_read_per_run,
+            "max_grep_matches_per_run": settings.max_grep_matches_per_run,
             "max_runtime_seconds": settings.max_runtime_seconds,
         },
         session_id=session_id,
@@ -79,7 +112,7 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
             perm = str(exc).split(":")[1] if ":" in str(exc) else "web.search"
             log_run_event(run_id, "permission.required", {"permission": perm})
             yield json.dumps({"type": "permission_required", "permission": perm})
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
         if search.status == "manual_required":
             log_run_event(run_id, "manual_search_required", {"query": query})
@@ -90,39 +123,80 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
                     "instructions": search.manual_instructions or "Paste manual results in Settings/Search UI.",
                 }
             )
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
         lines = [f"- {item.title} ({item.url}) {item.snippet}" for item in search.results]
         answer = "Local Ollama is unavailable. Using web search fallback:\n" + "\n".join(lines)
         log_run_event(run_id, "fallback.answer", {"provider": search.provider, "count": len(search.results)})
         yield json.dumps({"type": "token", "content": answer})
-        finish_run(run_id, run["start"])
+        await run_db(finish_run, run_id, run["start"])
         return
 
     # Deterministic tool routes keep permissions outside model control.
     if lower.startswith("read file:"):
-        path = text.split(":", 1)[1].strip()
+        path, continuation = _split_continuation(text.split(":", 1)[1].strip())
+        read_args = {"path": path, "length": CHAT_FILE_PAGE_BYTES}
+        if continuation:
+            read_args["continuation"] = continuation
         try:
-            tool_result = run_tool(
+            tool_result = await run_tool_async(
                 "file_read",
-                {"path": path},
+                read_args,
+                session_id=session_id,
+                safe_mode=safe_mode,
+                mode="chat",
+                limiter=limiter,
+                run_id=run_id,
+            )
+            payload.message = f"Summarize this file:\n{tool_result.get('content', '')}"
+            if tool_result.get("continuation"):
+                yield json.dumps(
+                    {
+                        "type": "file_continuation",
+                        "path": read_args["path"],
+                        "continuation": tool_result["continuation"],
+                        "next_offset": tool_result.get("next_offset"),
+                        "size": tool_result.get("size"),
+                    }
+                )
+        except PermissionError as exc:
+            perm = str(exc).split(":")[1] if ":" in str(exc) else "filesystem.read"
+            log_run_event(run_id, "permission.required", {"permission": perm})
+            yield json.dumps({"type": "permission_required", "permission": perm})
+            await run_db(finish_run, run_id, run["start"])
+            return
+        except Exception as exc:
+            log_run_event(run_id, "error", {"detail": str(exc)})
+            yield json.dumps({"type": "error", "detail": str(exc)})
+            await run_db(finish_run, run_id, run["start"])
+            return
+
+    if lower.startswith("grep files:"):
+        # "grep files: <regex> in <path>"
+        pattern, _, path = text.split(":", 1)[1].strip().rpartition(" in ")
+        try:
+            if not pattern or not path.strip():
+                raise ValueError("Usage: grep files: <pattern> in <path>")
+            tool_result = await run_tool_async(
+                "file_grep",
+                {"path": path.strip(), "pattern": pattern.strip(), "context_lines": 0, "max_matches": CHAT_GREP_MATCHES},
                 session_id=session_id,
                 safe_mode=safe_mode,
                 mode="chat",
                 limiter=limiter,
                 run_id=run_id,
             )
-            payload.message = f"Summarize this file:\n{tool_result.get('content', '')[:6000]}"
+            payload.message = f"These lines match `{pattern.strip()}`. Say which files look relevant:\n{_format_grep(tool_result)}"
         except PermissionError as exc:
             perm = str(exc).split(":")[1] if ":" in str(exc) else "filesystem.read"
             log_run_event(run_id, "permission.required", {"permission": perm})
             yield json.dumps({"type": "permission_required", "permission": perm})
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
         except Exception as exc:
             log_run_event(run_id, "error", {"detail": str(exc)})
             yield json.dumps({"type": "error", "detail": str(exc)})
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
 
     if lower.startswith("search web:"):
@@ -141,7 +215,7 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
             perm = str(exc).split(":")[1] if ":" in str(exc) else "web.search"
             log_run_event(run_id, "permission.required", {"permission": perm})
             yield json.dumps({"type": "permission_required", "permission": perm})
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
         if search.status == "manual_required":
             log_run_event(run_id, "manual_search_required", {"query": query})
@@ -152,12 +226,13 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
                     "instructions": search.manual_instructions or "Paste manual results in Settings/Search UI.",
                 }
             )
-            finish_run(run_id, run["start"])
+            await run_db(finish_run, run_id, run["start"])
             return
         results_block = "\n".join([f"- {item.title} ({item.url}) {item.snippet}" for item in search.results])
         payload.message = f"Use these web search results to answer:\n{results_block}"
 
-    log_event(
+    await run_db(
+        log_event,
         "model.usage",
         f"Model chat using {payload.model}",
         {"source_id": payload.source_id, "model": payload.model, "mode": payload.mode},
@@ -165,12 +240,12 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
     )
 
     if settings.use_saved_memory:
-        memories = list_memory()
+        memories = await run_db(list_memory)
         if memories:
             mem_block = "\n".join([f"- ({m['kind']}) {m['content']}" for m in memories])
             payload.message = f"Use these saved memory items as context:\n{mem_block}\n\nUser message:\n{payload.message}"
 
-    token = get_secret(f"model_source:{source.id}:auth_token")
+    token = await run_db(get_secret, f"model_source:{source.id}:auth_token")
     full_output = ""
     try:
         async for chunk in stream_ollama_chat(base_url=source.base_url, model=payload.model, message=payload.message, auth_token=token):
@@ -191,4 +266,4 @@ async def stream_chat(payload: ChatRequest, session_id: str) -> AsyncGenerator[s
             review = {"warnings": warnings, "strictness": settings.reviewer_strictness}
             log_run_event(run_id, "review", review)
             yield json.dumps({"type": "review", "warnings": warnings})
-        finish_run(run_id, run["start"])
+        await run_db(finish_run, run_id, run["start"])
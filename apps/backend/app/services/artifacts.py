@@ -6,7 +6,7 @@ import json
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 
 
 def create_artifact(
@@ -29,7 +29,7 @@ def create_artifact(
 
 
 def list_artifacts(limit: int = 100) -> list[dict[str, Any]]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT * FROM artifacts ORDER BY created_at DESC LIMIT ?",
             (limit,),
@@ -43,7 +43,7 @@ def list_artifacts(limit: int = 100) -> list[dict[str, Any]]:
 
 
 def get_artifact(artifact_id: str) -> dict[str, Any] | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
     if not row:
         return None
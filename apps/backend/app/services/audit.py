@@ -7,7 +7,8 @@ import json
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import read_connection
+from app.db.write_queue import enqueue_write, flush_writes, utc_timestamp
 from app.services.settings_service import get_effective_settings
 
 SENSITIVE_KEYS = {"token", "auth", "authorization", "password", "secret", "api_key", "key"}
@@ -46,15 +47,15 @@ def log_event(
     if not settings.verbose_logging:
         # Keep default logs minimal and safe.
         data = {k: data[k] for k in ("provider", "query_hash", "success", "num_results", "tool", "result_hash") if k in data}
-    with connection() as conn:
-        conn.execute(
-            "INSERT INTO audit_logs (id, session_id, event_type, summary, payload_json) VALUES (?, ?, ?, ?, ?)",
-            (str(uuid.uuid4()), session_id, event_type, summary, json.dumps(data)),
-        )
+    enqueue_write(
+        "INSERT INTO audit_logs (id, session_id, event_type, summary, payload_json, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (str(uuid.uuid4()), session_id, event_type, summary, json.dumps(data), utc_timestamp()),
+    )
 
 
 def list_audit_logs(limit: int = 200) -> list[dict]:
-    with connection() as conn:
+    flush_writes()
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT id, session_id, event_type, summary, payload_json, created_at FROM audit_logs ORDER BY created_at DESC LIMIT ?",
             (limit,),
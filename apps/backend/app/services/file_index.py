@@ -0,0 +1,349 @@
+"""Persistent per-workspace filename index.
+
+``file_index`` holds one row per file under the workspace scopes (path, name,
+extension, size, mtime) and ``file_index_dirs`` remembers every indexed
+directory with its mtime. A refresh stats each known directory and only
+rescans those whose mtime (or ignore files) changed; unchanged directories
+contribute their stored children without a ``scandir``. Size and mtime are
+as of the last rescan of the file's directory, since editing a file in place
+does not touch its directory. Name queries are case-insensitive and use the
+extension index or the trigram FTS table when one applies.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import stat
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from app.db.sqlite import connection, read_connection
+from app.services.file_walker import DEFAULT_IGNORED_DIRS, IGNORE_FILES, IgnoreRules, WalkEntry, WalkResult, name_matcher
+
+REFRESH_INTERVAL_SECONDS = 30.0
+# Only a single-dot suffix matches the stored ``splitext`` extension; "*.tar.gz" globs the name.
+_EXT_PATTERN = re.compile(r"^\*(\.[^*?\[\]/.]+)$")
+_GLOB_SPECIAL = re.compile(r"([*?\[])")
+
+_last_refresh: dict[tuple[str, tuple[str, ...]], float] = {}
+_refresh_locks: dict[tuple[str, tuple[str, ...]], threading.Lock] = {}
+_locks_guard = threading.Lock()
+_trigram: bool | None = None
+
+
+@dataclass
+class RefreshStats:
+    workspace_id: str
+    dirs_scanned: int = 0
+    dirs_unchanged: int = 0
+    files_updated: int = 0
+    files_removed: int = 0
+    total_files: int = 0
+    elapsed_ms: float = 0.0
+    complete: bool = True
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _DirState:
+    parent: str | None
+    mtime_ns: int
+    ignore_files: tuple[str, ...]
+    ignore_mtime_ns: int
+
+
+def _ignore_signature(directory: str, names: tuple[str, ...]) -> int:
+    signature = 0
+    for name in names:
+        try:
+            signature = max(signature, os.stat(os.path.join(directory, name)).st_mtime_ns)
+        except OSError:
+            signature = -1
+    return signature
+
+
+def _load_dirs(workspace_id: str) -> dict[str, _DirState]:
+    with read_connection() as conn:
+        rows = conn.execute(
+            "SELECT path, parent, mtime_ns, ignore_files, ignore_mtime_ns FROM file_index_dirs WHERE workspace_id = ?",
+            (workspace_id,),
+        ).fetchall()
+    return {
+        row["path"]: _DirState(
+            row["parent"],
+            row["mtime_ns"],
+            tuple(name for name in row["ignore_files"].split(",") if name),
+            row["ignore_mtime_ns"],
+        )
+        for row in rows
+    }
+
+
+def refresh_file_index(workspace_id: str, scopes: list[str], time_budget: float | None = None) -> RefreshStats:
+    """Bring the index for ``scopes`` up to date; a run cut short by ``time_budget`` keeps unseen rows."""
+    started = time.perf_counter()
+    deadline = started + time_budget if time_budget is not None else None
+    stats = RefreshStats(workspace_id)
+    stored = _load_dirs(workspace_id)
+    children: dict[str, list[str]] = defaultdict(list)
+    for path, state in stored.items():
+        if state.parent is not None:
+            children[state.parent].append(path)
+
+    seen: set[str] = set()
+    rescanned: dict[str, list[tuple[Any, ...]]] = {}
+    dir_rows: list[tuple[Any, ...]] = []
+    queue: deque[tuple[str, str | None, IgnoreRules | None, bool]] = deque(
+        (os.path.realpath(scope), None, None, False) for scope in scopes
+    )
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            stats.complete = False
+            break
+        directory, parent, rules, force = queue.popleft()
+        if directory in seen:
+            continue
+        try:
+            st = os.stat(directory)
+        except OSError:
+            continue
+        if not stat.S_ISDIR(st.st_mode):
+            continue
+        previous = stored.get(directory)
+        if previous is not None and not force and previous.mtime_ns == st.st_mtime_ns:
+            if _ignore_signature(directory, previous.ignore_files) == previous.ignore_mtime_ns:
+                seen.add(directory)
+                stats.dirs_unchanged += 1
+                if previous.ignore_files:
+                    rules = IgnoreRules.load(directory, previous.ignore_files, rules)
+                queue.extend((child, directory, rules, False) for child in children.get(directory, ()))
+                continue
+
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        if parent is not None and "pyvenv.cfg" in names:
+            continue
+        seen.add(directory)
+        ignore_files = tuple(name for name in IGNORE_FILES if name in names)
+        ignore_mtime_ns = _ignore_signature(directory, ignore_files)
+        # Changed ignore rules can hide or reveal anything below, so the whole subtree is rescanned.
+        force_children = force or (
+            previous is not None and (previous.ignore_files, previous.ignore_mtime_ns) != (ignore_files, ignore_mtime_ns)
+        )
+        if ignore_files:
+            rules = IgnoreRules.load(directory, ignore_files, rules)
+        files: list[tuple[Any, ...]] = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in DEFAULT_IGNORED_DIRS or (rules is not None and rules.ignored(entry.path, entry.name, True)):
+                        continue
+                    queue.append((entry.path, directory, rules, force_children))
+                elif entry.is_file():
+                    if rules is not None and rules.ignored(entry.path, entry.name, False):
+                        continue
+                    est = entry.stat()
+                    files.append((entry.path, entry.name, est.st_size, est.st_mtime))
+            except OSError:
+                continue
+        rescanned[directory] = files
+        dir_rows.append((workspace_id, directory, parent, st.st_mtime_ns, ",".join(ignore_files), ignore_mtime_ns))
+        stats.dirs_scanned += 1
+
+    if queue:
+        # Directories with queued children were cut short: store them as changed so the next
+        # run scans them again and reaches those children; forced children keep the force.
+        pending: dict[str, bool] = {}
+        for _, parent, _, force in queue:
+            if parent is not None:
+                pending[parent] = pending.get(parent, False) or force
+        dir_rows = [
+            row[:3] + (-1, row[4], -1 if pending[row[1]] else row[5]) if row[1] in pending else row
+            for row in dir_rows
+        ]
+
+    with connection() as conn:
+        for directory, files in rescanned.items():
+            existing = {
+                row["path"]: (row["size"], row["mtime"])
+                for row in conn.execute(
+                    "SELECT path, size, mtime FROM file_index WHERE workspace_id = ? AND dir = ?",
+                    (workspace_id, directory),
+                )
+            }
+            current = {path for path, _, _, _ in files}
+            stale = [(workspace_id, path) for path in existing if path not in current]
+            if stale:
+                conn.executemany("DELETE FROM file_index WHERE workspace_id = ? AND path = ?", stale)
+                stats.files_removed += len(stale)
+            changed = [
+                (workspace_id, path, directory, name, name.lower(), os.path.splitext(name)[1].lower(), size, mtime)
+                for path, name, size, mtime in files
+                if existing.get(path) != (size, mtime)
+            ]
+            if changed:
+                conn.executemany(
+                    """
+                    INSERT INTO file_index (workspace_id, path, dir, name, name_lower, ext, size, mtime)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(workspace_id, path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime
+                    """,
+                    changed,
+                )
+                stats.files_updated += len(changed)
+        conn.executemany(
+            """
+            INSERT INTO file_index_dirs (workspace_id, path, parent, mtime_ns, ignore_files, ignore_mtime_ns)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(workspace_id, path) DO UPDATE SET
+                parent = excluded.parent,
+                mtime_ns = excluded.mtime_ns,
+                ignore_files = excluded.ignore_files,
+                ignore_mtime_ns = excluded.ignore_mtime_ns
+            """,
+            dir_rows,
+        )
+        if stats.complete:
+            for directory in set(stored) - seen:
+                cursor = conn.execute("DELETE FROM file_index WHERE workspace_id = ? AND dir = ?", (workspace_id, directory))
+                stats.files_removed += max(cursor.rowcount, 0)
+                conn.execute("DELETE FROM file_index_dirs WHERE workspace_id = ? AND path = ?", (workspace_id, directory))
+        stats.total_files = conn.execute(
+            "SELECT COUNT(1) FROM file_index WHERE workspace_id = ?", (workspace_id,)
+        ).fetchone()[0]
+    stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return stats
+
+
+def ensure_file_index(
+    workspace_id: str,
+    scopes: list[str],
+    max_age: float = REFRESH_INTERVAL_SECONDS,
+    time_budget: float | None = None,
+) -> RefreshStats | None:
+    """Refresh when the index for these scopes is older than ``max_age`` seconds.
+
+    Returns ``None`` when the index is fresh. Stats with ``complete=False`` mean
+    the index cannot be trusted yet: the refresh ran out of ``time_budget``
+    (the next call resumes it) or another caller is refreshing these scopes.
+    """
+    key = (workspace_id, tuple(sorted(scopes)))
+    last = _last_refresh.get(key)
+    if last is not None and time.monotonic() - last < max_age:
+        return None
+    with _locks_guard:
+        lock = _refresh_locks.setdefault(key, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return RefreshStats(workspace_id, complete=False)
+    try:
+        last = _last_refresh.get(key)
+        if last is not None and time.monotonic() - last < max_age:
+            return None
+        stats = refresh_file_index(workspace_id, scopes, time_budget=time_budget)
+        if stats.complete:
+            _last_refresh[key] = time.monotonic()
+        return stats
+    finally:
+        lock.release()
+
+
+def _has_trigram() -> bool:
+    global _trigram
+    if _trigram is None:
+        with read_connection() as conn:
+            row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'file_index_trigram'").fetchone()
+        _trigram = row is not None
+    return _trigram
+
+
+def _literal_run(glob: str) -> int:
+    return max((len(part) for part in re.split(r"[*?\[\]]", glob)), default=0)
+
+
+def _name_clause(glob: str) -> tuple[str, list[Any]]:
+    ext = _EXT_PATTERN.match(glob)
+    if ext:
+        return "f.ext = ?", [ext.group(1)]
+    # The trigram index needs three literal characters to narrow the search.
+    if _literal_run(glob) >= 3 and _has_trigram():
+        return "f.id IN (SELECT rowid FROM file_index_trigram WHERE name_lower GLOB ?)", [glob]
+    return "f.name_lower GLOB ?", [glob]
+
+
+def query_file_index(
+    workspace_id: str,
+    base: str,
+    pattern: str | None = None,
+    contains: str | None = None,
+    max_results: int = 100,
+) -> WalkResult | None:
+    """Files under ``base`` matching an rglob-style ``pattern`` and/or a name substring.
+
+    Returns ``None`` when ``base`` is not an indexed directory, so callers can walk instead.
+    """
+    base = os.path.realpath(base)
+    prefix = base if base.endswith(os.sep) else base + os.sep
+    with read_connection() as conn:
+        indexed = conn.execute(
+            "SELECT 1 FROM file_index_dirs WHERE workspace_id = ? AND path = ?", (workspace_id, base)
+        ).fetchone()
+        if indexed is None:
+            return None
+        clauses = ["f.workspace_id = ?", "f.path >= ?", "f.path < ?"]
+        params: list[Any] = [workspace_id, prefix, prefix + "\U0010ffff"]
+        matcher = None
+        if pattern and pattern not in {"*", "**", "**/*"}:
+            lowered = pattern.replace("\\", "/").lower()
+            clause, values = _name_clause(lowered.rsplit("/", 1)[-1])
+            clauses.append(clause)
+            params.extend(values)
+            if "/" in lowered.strip("/"):
+                matcher = name_matcher(lowered)
+        if contains:
+            clause, values = _name_clause("*" + _GLOB_SPECIAL.sub(r"[\1]", contains.lower()) + "*")
+            clauses.append(clause)
+            params.extend(values)
+        cursor = conn.execute(
+            f"SELECT f.path, f.name, f.size, f.mtime FROM file_index f WHERE {' AND '.join(clauses)} ORDER BY f.path",
+            params,
+        )
+        found: list[WalkEntry] = []
+        truncated = False
+        for row in cursor:
+            relative = row["path"][len(prefix) :].replace(os.sep, "/")
+            if matcher is not None and not matcher(relative.lower(), row["name"].lower()):
+                continue
+            if len(found) >= max_results:
+                truncated = True
+                break
+            found.append(WalkEntry(row["path"], row["name"], row["size"], row["mtime"], relative.count("/")))
+    return WalkResult(found, truncated)
+
+
+def drop_file_index(workspace_id: str) -> None:
+    with connection() as conn:
+        conn.execute("DELETE FROM file_index WHERE workspace_id = ?", (workspace_id,))
+        conn.execute("DELETE FROM file_index_dirs WHERE workspace_id = ?", (workspace_id,))
+    with _locks_guard:
+        for key in [key for key in _last_refresh if key[0] == workspace_id]:
+            _last_refresh.pop(key, None)
+            _refresh_locks.pop(key, None)
+
+
+__all__ = [
+    "RefreshStats",
+    "drop_file_index",
+    "ensure_file_index",
+    "query_file_index",
+    "refresh_file_index",
+]
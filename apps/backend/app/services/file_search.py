@@ -2,17 +2,40 @@
 
 from __future__ import annotations
 
+import time
 from pathlib import Path
 
+from app.services.file_index import ensure_file_index, query_file_index
+from app.services.file_walker import WalkResult, walk_files
+from app.services.path_security import path_within_scopes
+from app.services.workspaces import get_active_workspace
 
-def search_files(path: str, pattern: str = "*", max_results: int = 100) -> list[str]:
+SEARCH_TIME_BUDGET_SECONDS = 10.0
+MIN_WALK_BUDGET_SECONDS = 1.0
+
+
+def search_files(path: str, pattern: str = "*", max_results: int = 100, query: str | None = None) -> WalkResult:
+    """Answer from the active workspace's filename index when ``path`` is inside its scopes, else walk.
+
+    A refresh that cannot finish within the search budget (or is already running
+    elsewhere) falls back to a walk with whatever budget is left.
+    """
+    started = time.monotonic()
     base = Path(path).resolve()
     if not base.exists():
-        return []
-    results: list[str] = []
-    for item in base.rglob(pattern):
-        if item.is_file():
-            results.append(str(item))
-            if len(results) >= max_results:
-                break
-    return results
+        return WalkResult([])
+    workspace = get_active_workspace()
+    scopes = workspace.get("scopes", []) if workspace else []
+    if scopes and path_within_scopes(str(base), scopes)[0]:
+        stats = ensure_file_index(workspace["id"], scopes, time_budget=SEARCH_TIME_BUDGET_SECONDS)
+        if stats is None or stats.complete:
+            indexed = query_file_index(workspace["id"], str(base), pattern=pattern, contains=query, max_results=max_results)
+            if indexed is not None:
+                return indexed
+    return walk_files(
+        str(base),
+        pattern=pattern,
+        contains=query,
+        max_files=max_results,
+        time_budget=max(MIN_WALK_BUDGET_SECONDS, SEARCH_TIME_BUDGET_SECONDS - (time.monotonic() - started)),
+    )
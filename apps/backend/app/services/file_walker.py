@@ -0,0 +1,299 @@
+"""Breadth-first ``os.scandir`` walker with gitignore-style pruning.
+
+Shared by the ``file_list`` plugin, ``/files/search`` and the tool result
+cache. Entries carry the size and mtime from the walk, so callers do not stat
+again. Like ``tool_protocol`` it imports nothing from ``app``, so tool workers
+load it cheaply.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+# Directory names skipped everywhere; a directory holding ``pyvenv.cfg`` is a virtualenv and skipped too.
+DEFAULT_IGNORED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        "__pycache__",
+        ".venv",
+        "venv",
+        ".tox",
+        ".nox",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".idea",
+    }
+)
+IGNORE_FILES = (".gitignore", ".ignore")
+
+
+@dataclass(slots=True)
+class WalkEntry:
+    path: str
+    name: str
+    size: int
+    mtime: float
+    depth: int
+
+    def as_dict(self) -> dict:
+        return {"path": self.path, "size": self.size, "mtime": self.mtime}
+
+
+def _translate(pattern: str) -> str:
+    """gitignore glob to regex: ``*``/``?`` stay in one segment, ``**`` spans segments."""
+    out: list[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            out.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            out.append(".*")
+            index += 2
+        elif char == "*":
+            out.append("[^/]*")
+            index += 1
+        elif char == "?":
+            out.append("[^/]")
+            index += 1
+        elif char == "[":
+            end = pattern.find("]", index + 1)
+            if end < 0:
+                out.append(re.escape(char))
+                index += 1
+            else:
+                body = pattern[index + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                index = end + 1
+        else:
+            out.append(re.escape(char))
+            index += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True, slots=True)
+class IgnoreRule:
+    regex: re.Pattern[str]
+    negated: bool
+    dir_only: bool
+    # Rules without a slash match the entry name at any depth.
+    basename_only: bool
+
+    @classmethod
+    def parse(cls, line: str) -> IgnoreRule | None:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        basename_only = "/" not in line
+        line = line.lstrip("/")
+        return cls(re.compile(_translate(line) + r"\Z"), negated, dir_only, basename_only)
+
+    def matches(self, relative: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        return bool(self.regex.match(name if self.basename_only else relative))
+
+
+class IgnoreRules:
+    """Rules from one ignore file, relative to the directory that holds it."""
+
+    def __init__(self, base: str, rules: Iterable[IgnoreRule], parent: IgnoreRules | None = None) -> None:
+        self.base = base
+        self._prefix = base if base.endswith(os.sep) else base + os.sep
+        self.rules = tuple(rules)
+        self.parent = parent
+
+    @classmethod
+    def load(cls, directory: str, names: Iterable[str], parent: IgnoreRules | None) -> IgnoreRules | None:
+        rules: list[IgnoreRule] = []
+        for name in names:
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as handle:
+                    rules.extend(rule for rule in map(IgnoreRule.parse, handle) if rule is not None)
+            except OSError:
+                continue
+        return cls(directory, rules, parent) if rules else parent
+
+    def ignored(self, path: str, name: str, is_dir: bool) -> bool:
+        """Last matching rule wins, and rules from deeper ignore files override shallower ones."""
+        relative = path[len(self._prefix) :].replace(os.sep, "/")
+        for rule in reversed(self.rules):
+            if rule.matches(relative, name, is_dir):
+                return not rule.negated
+        return self.parent.ignored(path, name, is_dir) if self.parent else False
+
+
+def name_matcher(pattern: str | None) -> Callable[[str, str], bool] | None:
+    """``rglob``-style test on ``(relative path, name)``; ``None`` matches everything."""
+    if not pattern or pattern in {"*", "**", "**/*"}:
+        return None
+    parts = [part for part in pattern.replace("\\", "/").split("/") if part and part != "**"]
+    if len(parts) == 1:
+        single = parts[0]
+        return lambda relative, name: fnmatch.fnmatch(name, single)
+    tail = "/".join(parts)
+    count = len(parts)
+    return lambda relative, name: fnmatch.fnmatch("/".join(relative.split("/")[-count:]), tail)
+
+
+class FileWalker:
+    """Breadth-first walk that prunes ignored directories and stops on a time budget."""
+
+    def __init__(
+        self,
+        root: str,
+        max_depth: int | None = None,
+        time_budget: float | None = None,
+        use_ignore_files: bool = True,
+        ignored_dirs: frozenset[str] = DEFAULT_IGNORED_DIRS,
+        accept: Callable[[str, str], bool] | None = None,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self._prefix = self.root if self.root.endswith(os.sep) else self.root + os.sep
+        # Called with (path relative to root, name) before the entry is stat'ed.
+        self.accept = accept
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.use_ignore_files = use_ignore_files
+        self.ignored_dirs = ignored_dirs
+        self.timed_out = False
+
+    def _walk(self) -> Iterator[tuple[str, list[os.DirEntry], list[str], int, IgnoreRules | None]]:
+        """Yield ``(directory, entries, ignore files, depth, rules)`` breadth-first."""
+        deadline = time.monotonic() + self.time_budget if self.time_budget is not None else None
+        queue: deque[tuple[str, int, IgnoreRules | None]] = deque([(self.root, 0, None)])
+        while queue:
+            if deadline is not None and time.monotonic() > deadline:
+                self.timed_out = True
+                return
+            directory, depth, rules = queue.popleft()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda item: item.name)
+            except OSError:
+                continue
+            names = {entry.name for entry in entries}
+            if depth and "pyvenv.cfg" in names:
+                continue
+            ignore_files = [name for name in IGNORE_FILES if name in names] if self.use_ignore_files else []
+            if ignore_files:
+                rules = IgnoreRules.load(directory, ignore_files, rules)
+            yield directory, entries, ignore_files, depth, rules
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            for entry in entries:
+                try:
+                    if not entry.is_dir(follow_symlinks=False) or entry.name in self.ignored_dirs:
+                        continue
+                except OSError:
+                    continue
+                if rules is None or not rules.ignored(entry.path, entry.name, True):
+                    queue.append((entry.path, depth + 1, rules))
+
+    def __iter__(self) -> Iterator[WalkEntry]:
+        for _, entries, _, depth, rules in self._walk():
+            for entry in entries:
+                if self.accept is not None:
+                    relative = entry.path[len(self._prefix) :].replace(os.sep, "/")
+                    if not self.accept(relative, entry.name):
+                        continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    if rules is not None and rules.ignored(entry.path, entry.name, False):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield WalkEntry(entry.path, entry.name, st.st_size, st.st_mtime, depth)
+
+    def directories(self) -> Iterator[str]:
+        """Every directory the walk visits, plus the ignore files it reads."""
+        for directory, _, ignore_files, _, _ in self._walk():
+            yield directory
+            for name in ignore_files:
+                yield os.path.join(directory, name)
+
+    def tree_stats(self) -> Iterator[tuple[str, os.stat_result | None]]:
+        """What ``directories()`` yields plus every file the walk keeps, each with its stat."""
+        for directory, entries, ignore_files, _, rules in self._walk():
+            for path in [directory, *(os.path.join(directory, name) for name in ignore_files)]:
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    yield path, None
+            for entry in entries:
+                try:
+                    if not entry.is_file() or (rules is not None and rules.ignored(entry.path, entry.name, False)):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st
+
+
+@dataclass(slots=True)
+class WalkResult:
+    entries: list[WalkEntry]
+    # More matches existed past ``max_files``.
+    truncated: bool = False
+    # The time budget ran out before the walk finished.
+    timed_out: bool = False
+
+
+def walk_files(
+    root: str,
+    pattern: str | None = None,
+    contains: str | None = None,
+    extensions: Iterable[str] | None = None,
+    max_files: int | None = None,
+    max_depth: int | None = None,
+    time_budget: float | None = None,
+) -> WalkResult:
+    """Collect files matching ``pattern`` (rglob-style), a case-insensitive name substring and ``extensions``."""
+    matcher = name_matcher(pattern)
+    needle = contains.lower() if contains else None
+    suffixes = {ext.lower() for ext in extensions} if extensions is not None else None
+
+    def accept(relative: str, name: str) -> bool:
+        if suffixes is not None and os.path.splitext(name)[1].lower() not in suffixes:
+            return False
+        if needle is not None and needle not in name.lower():
+            return False
+        return matcher is None or matcher(relative, name)
+
+    filtered = suffixes is not None or matcher is not None or needle is not None
+    walker = FileWalker(root, max_depth=max_depth, time_budget=time_budget, accept=accept if filtered else None)
+    found: list[WalkEntry] = []
+    truncated = False
+    for entry in walker:
+        if max_files is not None and len(found) >= max_files:
+            truncated = True
+            break
+        found.append(entry)
+    return WalkResult(found, truncated, walker.timed_out)
+
+
+__all__ = ["DEFAULT_IGNORED_DIRS", "FileWalker", "IgnoreRules", "WalkEntry", "WalkResult", "walk_files"]
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
+import threading
 import time
-from collections import deque
 from dataclasses import dataclass, field
+from typing import Any
 
-from app.services.policy_dsl import apply_limit_overrides, parse_policy
-from app.services.settings_profiles import get_active_profile
-from app.services.workspaces import get_active_workspace
+from app.services.policy_guard import active_policy
+from app.services.rate_limiter import get_rate_limiter
+from app.services.settings_service import get_setting
 
 
 @dataclass
@@ -19,10 +20,14 @@ class RunLimiter:
     max_bytes_read_per_run: int
     max_runtime_seconds: int
     session_id: str
+    max_grep_matches_per_run: int = 500
     start_time: float = field(default_factory=time.time)
     tool_calls: int = 0
     files_read: int = 0
     bytes_read: int = 0
+    grep_matches: int = 0
+    # Workflows run read-only tool steps concurrently against one limiter.
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
     def check_runtime(self) -> None:
         if time.time() - self.start_time > self.max_runtime_seconds:
@@ -33,9 +38,15 @@ class RunLimiter:
             raise RuntimeError("Tool call limit exceeded for this message")
 
     def record_tool_call(self) -> None:
-        self.tool_calls += 1
+        with self._lock:
+            self.check_tool_call()
+            self.tool_calls += 1
 
     def record_file_reads(self, files: int, bytes_read: int) -> None:
+        with self._lock:
+            self._record_reads(files, bytes_read)
+
+    def _record_reads(self, files: int, bytes_read: int) -> None:
         if self.files_read + files > self.max_files_read_per_run:
             raise RuntimeError("File read count limit exceeded")
         if self.bytes_read + bytes_read > self.max_bytes_read_per_run:
@@ -43,39 +54,38 @@ class RunLimiter:
         self.files_read += files
         self.bytes_read += bytes_read
 
+    def record_grep(self, matches: int, bytes_scanned: int) -> None:
+        """Content searches spend the byte budget but return lines, not files."""
+        with self._lock:
+            self._record_reads(0, bytes_scanned)
+            self.grep_matches += matches
+
 
-_CALL_WINDOW: dict[str, deque[float]] = {}
+def _rate_limiter():
+    return get_rate_limiter(shared=bool(get_setting("rate_limit_shared_state", False)))
 
 
 def enforce_rate_limit(session_id: str, max_per_minute: int) -> None:
-    now = time.time()
-    window = _CALL_WINDOW.setdefault(session_id, deque())
-    while window and now - window[0] > 60:
-        window.popleft()
-    if len(window) + 1 > max_per_minute:
+    if not _rate_limiter().hit(session_id, max_per_minute):
         raise RuntimeError("Tool call rate limit exceeded")
-    window.append(now)
+
+
+def rate_limit_counters() -> list[dict[str, Any]]:
+    """Per-session counters for operators, most recently active first."""
+    return _rate_limiter().counters()
 
 
 def build_run_limiter(settings: dict[str, int], session_id: str) -> RunLimiter:
-    profile = get_active_profile()
-    workspace = get_active_workspace()
-    profile_name = profile.get("name") if profile else None
-    workspace_name = workspace.get("name") if workspace else None
-    policy_text = ""
-    if profile and profile.get("payload", {}).get("policy_rules"):
-        policy_text += profile["payload"]["policy_rules"] + "\n"
-    if workspace and workspace.get("settings", {}).get("policy_rules"):
-        policy_text += workspace["settings"]["policy_rules"] + "\n"
-    parsed = parse_policy(policy_text) if policy_text.strip() else None
+    active = active_policy()
     limits = dict(settings)
-    if parsed and not parsed.errors:
-        limits = apply_limit_overrides(limits, parsed.limits, profile_name, workspace_name, confirmed=False)
+    if active.policy and not active.policy.errors:
+        limits = active.policy.apply_limits(limits, active.profile_name, active.workspace_name)
     return RunLimiter(
         max_tool_calls_per_message=limits["max_tool_calls_per_message"],
         max_tool_calls_per_minute=limits["max_tool_calls_per_minute"],
         max_files_read_per_run=limits["max_files_read_per_run"],
         max_bytes_read_per_run=limits["max_bytes_read_per_run"],
         max_runtime_seconds=limits["max_runtime_seconds"],
+        max_grep_matches_per_run=limits.get("max_grep_matches_per_run", 500),
         session_id=session_id,
     )
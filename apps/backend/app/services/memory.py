@@ -5,11 +5,11 @@ from __future__ import annotations
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 
 
 def list_memory() -> list[dict[str, Any]]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT id, kind, content, created_at, updated_at FROM memory_items ORDER BY updated_at DESC"
         ).fetchall()
@@ -27,7 +27,7 @@ def create_memory(kind: str, content: str) -> dict[str, Any]:
 
 
 def get_memory(memory_id: str) -> dict[str, Any] | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute(
             "SELECT id, kind, content, created_at, updated_at FROM memory_items WHERE id = ?",
             (memory_id,),
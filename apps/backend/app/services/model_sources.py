@@ -6,14 +6,15 @@ import uuid
 
 import httpx
 
-from app.db.sqlite import connection
+from app.db.async_db import run_db
+from app.db.sqlite import connection, read_connection
 from app.models.schemas import ModelOptionResponse, ModelSourceCreate, ModelSourceResponse, SourceTestResponse
 from app.services.audit import log_event
 from app.services.secret_store import get_secret, has_secret, set_secret
 
 
 def list_model_sources() -> list[ModelSourceResponse]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT id, name, base_url, is_local, created_at FROM model_sources ORDER BY created_at DESC"
         ).fetchall()
@@ -50,7 +51,7 @@ def add_model_source(payload: ModelSourceCreate) -> ModelSourceResponse:
 
 
 async def _fetch_models(source: ModelSourceResponse) -> list[str]:
-    token = get_secret(f"model_source:{source.id}:auth_token")
+    token = await run_db(get_secret, f"model_source:{source.id}:auth_token")
     headers = {"Authorization": token} if token else {}
     url = f"{source.base_url.rstrip('/')}/api/tags"
     try:
@@ -65,7 +66,7 @@ async def _fetch_models(source: ModelSourceResponse) -> list[str]:
 
 async def list_model_options() -> list[ModelOptionResponse]:
     options: list[ModelOptionResponse] = []
-    for source in list_model_sources():
+    for source in await run_db(list_model_sources):
         models = await _fetch_models(source)
         for model in models:
             options.append(
@@ -80,13 +81,13 @@ async def list_model_options() -> list[ModelOptionResponse]:
 
 
 async def test_model_source(source_id: str) -> SourceTestResponse:
-    source = next((s for s in list_model_sources() if s.id == source_id), None)
+    source = await run_db(get_source, source_id)
     if not source:
         return SourceTestResponse(ok=False, detail="Source not found")
     models = await _fetch_models(source)
     ok = len(models) > 0
     detail = f"Found {len(models)} model(s)" if ok else "Could not fetch models"
-    log_event("model.source.test", detail, {"source_id": source_id, "ok": ok})
+    await run_db(log_event, "model.source.test", detail, {"source_id": source_id, "ok": ok})
     return SourceTestResponse(ok=ok, detail=detail)
 
 
@@ -9,7 +9,8 @@ from typing import Any
 
 import httpx
 
-from app.db.sqlite import connection
+from app.db.async_db import run_db
+from app.db.sqlite import connection, read_connection
 from app.services.audit import log_event
 from app.services.settings_service import get_effective_settings
 
@@ -26,7 +27,7 @@ _status_cache: dict[str, Any] = {
 
 
 def _read_runtime_value(key: str) -> str | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute("SELECT value_json FROM app_settings WHERE key = ?", (key,)).fetchone()
     if not row:
         return None
@@ -49,7 +50,7 @@ def _write_runtime_value(key: str, value: Any) -> None:
 
 
 async def probe_local_ollama() -> dict[str, Any]:
-    settings = get_effective_settings()
+    settings = await run_db(get_effective_settings)
     installed = False
     healthy = False
     models_count = 0
@@ -2,10 +2,21 @@
 
 from __future__ import annotations
 
+import functools
 import os
 import stat
+import threading
+import time
+from collections.abc import Iterable
 from pathlib import Path
 
+REPARSE_MEMO_TTL_SECONDS = 2.0
+REPARSE_MEMO_MAX_ENTRIES = 4096
+SCOPE_TRIE_CACHE_SIZE = 128
+
+_reparse_memo: dict[str, tuple[float, bool]] = {}
+_reparse_lock = threading.Lock()
+
 
 def normalize_path(value: str) -> Path:
     return Path(value).expanduser().resolve(strict=False)
@@ -19,6 +30,28 @@ def _is_reparse_point(path: Path) -> bool:
         return False
 
 
+def _is_reparse_point_cached(path: Path) -> bool:
+    """``_is_reparse_point`` memoized per directory for a short TTL."""
+    key = str(path)
+    now = time.monotonic()
+    entry = _reparse_memo.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    result = _is_reparse_point(path)
+    with _reparse_lock:
+        if len(_reparse_memo) >= REPARSE_MEMO_MAX_ENTRIES:
+            expired = [k for k, (expires, _) in _reparse_memo.items() if expires <= now]
+            for k in expired or list(_reparse_memo)[: REPARSE_MEMO_MAX_ENTRIES // 4]:
+                _reparse_memo.pop(k, None)
+        _reparse_memo[key] = (now + REPARSE_MEMO_TTL_SECONDS, result)
+    return result
+
+
+def clear_reparse_memo() -> None:
+    with _reparse_lock:
+        _reparse_memo.clear()
+
+
 def _nearest_existing(path: Path) -> Path:
     cur = path
     while not cur.exists() and cur.parent != cur:
@@ -26,20 +59,67 @@ def _nearest_existing(path: Path) -> Path:
     return cur
 
 
-def path_within_scopes(target_raw: str, scopes: list[str]) -> tuple[bool, str]:
+def _component_key(part: str) -> str:
+    # Matches Path equality: case-insensitive on Windows, exact elsewhere.
+    return os.path.normcase(part)
+
+
+class ScopeTrie:
+    """Scopes normalized once and indexed by path component.
+
+    ``match`` walks the target's components and returns the shallowest scope
+    containing it, so the reparse-point walk covers the widest range.
+    """
+
+    _TERMINAL = "\0scope"
+
+    def __init__(self, scopes: Iterable[str]) -> None:
+        self._root: dict[str, dict] = {}
+        self.scopes: tuple[Path, ...] = tuple(normalize_path(scope) for scope in scopes)
+        for scope in self.scopes:
+            node = self._root
+            for part in scope.parts:
+                node = node.setdefault(_component_key(part), {})
+            node.setdefault(self._TERMINAL, scope)
+
+    def __bool__(self) -> bool:
+        return bool(self.scopes)
+
+    def match(self, target: Path) -> Path | None:
+        node = self._root
+        for part in target.parts:
+            node = node.get(_component_key(part))
+            if node is None:
+                return None
+            scope = node.get(self._TERMINAL)
+            if scope is not None:
+                return scope
+        return None
+
+
+@functools.lru_cache(maxsize=SCOPE_TRIE_CACHE_SIZE)
+def _compile_scopes(scopes: tuple[str, ...]) -> ScopeTrie:
+    return ScopeTrie(scopes)
+
+
+def compile_scopes(scopes: Iterable[str]) -> ScopeTrie:
+    """Return the (cached) trie for a scope list."""
+    return _compile_scopes(tuple(scopes))
+
+
+def path_within_scopes(target_raw: str, scopes: list[str] | tuple[str, ...] | ScopeTrie) -> tuple[bool, str]:
     if not scopes:
         return True, "Scope not required"
 
+    trie = scopes if isinstance(scopes, ScopeTrie) else compile_scopes(scopes)
     target = normalize_path(target_raw)
-    for scope_raw in scopes:
-        scope = normalize_path(scope_raw)
-        if target == scope or scope in target.parents:
-            # Prevent reparse point escapes inside selected scope.
-            current = _nearest_existing(target)
-            while current != scope and scope in current.parents:
-                if _is_reparse_point(current):
-                    return False, "Path contains a reparse point/junction"
-                current = current.parent
-            return True, "Path allowed"
-    return False, "Path outside allowed scopes"
-
+    scope = trie.match(target)
+    if scope is None:
+        return False, "Path outside allowed scopes"
+    # Prevent reparse point escapes inside selected scope.
+    current = _nearest_existing(target)
+    while current != scope and scope in current.parents:
+        if _is_reparse_point_cached(current):
+            return False, "Path contains a reparse point/junction"
+        current = current.parent
+    return True, "Path allowed"
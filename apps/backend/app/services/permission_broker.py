@@ -3,26 +3,120 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
 import uuid
+from dataclasses import dataclass
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 from app.models.schemas import GrantPermissionRequest, PermissionGrantResponse, PermissionType
 from app.services.audit import log_event
 from app.services.path_security import normalize_path, path_within_scopes
 
+MAX_CACHED_SESSIONS = 256
+# Other backend processes (multiple uvicorn workers) write the same table, so a
+# cached map is reloaded after this many seconds; writes in this process apply at once.
+GRANT_CACHE_TTL_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class Grant:
+    permission: str
+    scope: str
+    session_id: str | None
+    allowed_paths: tuple[str, ...]
+
+
+# Write-through cache of permission_grants: global ("always") grants plus one
+# map per session, each stored with its load time. Every write holds
+# _cache_lock across the DB commit and the cache update; lookups read the
+# dicts without locking.
+_cache_lock = threading.RLock()
+_global_grants: tuple[float, dict[str, Grant]] | None = None
+_session_grants: dict[str, tuple[float, dict[str, Grant]]] = {}
+
+_GRANT_COLUMNS = "SELECT permission, scope, session_id, allowed_paths_json FROM permission_grants"
+
+
+def _row_to_grant(row) -> Grant:
+    paths = json.loads(row["allowed_paths_json"] or "[]")
+    return Grant(
+        permission=row["permission"],
+        scope=row["scope"],
+        session_id=row["session_id"],
+        allowed_paths=tuple(str(normalize_path(p)) for p in paths),
+    )
+
+
+def _fresh(entry: tuple[float, dict[str, Grant]] | None) -> bool:
+    return entry is not None and time.monotonic() - entry[0] < GRANT_CACHE_TTL_SECONDS
+
+
+def _global_cache() -> dict[str, Grant]:
+    global _global_grants
+    entry = _global_grants
+    if not _fresh(entry):
+        with _cache_lock:
+            entry = _global_grants
+            if not _fresh(entry):
+                with read_connection() as conn:
+                    rows = conn.execute(f"{_GRANT_COLUMNS} WHERE session_id IS NULL").fetchall()
+                entry = _global_grants = (time.monotonic(), {row["permission"]: _row_to_grant(row) for row in rows})
+    return entry[1]
+
+
+def _session_cache(session_id: str) -> dict[str, Grant]:
+    entry = _session_grants.get(session_id)
+    if not _fresh(entry):
+        with _cache_lock:
+            entry = _session_grants.get(session_id)
+            if not _fresh(entry):
+                with read_connection() as conn:
+                    rows = conn.execute(f"{_GRANT_COLUMNS} WHERE session_id = ?", (session_id,)).fetchall()
+                _session_grants.pop(session_id, None)
+                while len(_session_grants) >= MAX_CACHED_SESSIONS:
+                    _session_grants.pop(next(iter(_session_grants)))
+                entry = _session_grants[session_id] = (time.monotonic(), {row["permission"]: _row_to_grant(row) for row in rows})
+    return entry[1]
+
+
+def _forget(permission: str, session_id: str) -> None:
+    """Mirror ``DELETE ... WHERE permission = ? AND (session_id = ? OR session_id IS NULL)``."""
+    if _global_grants is not None:
+        _global_grants[1].pop(permission, None)
+    session = _session_grants.get(session_id)
+    if session is not None:
+        session[1].pop(permission, None)
+
+
+def reset_grant_cache() -> None:
+    """Drop cached grants; call after writing permission_grants outside this module."""
+    global _global_grants
+    with _cache_lock:
+        _global_grants = None
+        _session_grants.clear()
+
 
 def grant_permission(payload: GrantPermissionRequest, session_id: str) -> None:
     session_value = None if payload.scope == "always" else session_id
     scopes = [str(normalize_path(p)) for p in payload.allowed_paths]
-    with connection() as conn:
-        conn.execute(
-            "DELETE FROM permission_grants WHERE permission = ? AND (session_id = ? OR session_id IS NULL)",
-            (payload.permission, session_id),
-        )
-        conn.execute(
-            "INSERT INTO permission_grants (id, permission, scope, session_id, allowed_paths_json) VALUES (?, ?, ?, ?, ?)",
-            (str(uuid.uuid4()), payload.permission, payload.scope, session_value, json.dumps(scopes)),
-        )
+    with _cache_lock:
+        with connection() as conn:
+            conn.execute(
+                "DELETE FROM permission_grants WHERE permission = ? AND (session_id = ? OR session_id IS NULL)",
+                (payload.permission, session_id),
+            )
+            conn.execute(
+                "INSERT INTO permission_grants (id, permission, scope, session_id, allowed_paths_json) VALUES (?, ?, ?, ?, ?)",
+                (str(uuid.uuid4()), payload.permission, payload.scope, session_value, json.dumps(scopes)),
+            )
+        _forget(payload.permission, session_id)
+        grant = Grant(payload.permission, payload.scope, session_value, tuple(scopes))
+        if session_value is None:
+            if _global_grants is not None:
+                _global_grants[1][payload.permission] = grant
+        elif session_id in _session_grants:
+            _session_grants[session_id][1][payload.permission] = grant
     log_event(
         "permission.grant",
         f"Granted {payload.permission} with scope {payload.scope}",
@@ -31,20 +125,9 @@ def grant_permission(payload: GrantPermissionRequest, session_id: str) -> None:
     )
 
 
-def _select_grant(permission: PermissionType, session_id: str) -> dict | None:
-    with connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT permission, scope, session_id, allowed_paths_json
-            FROM permission_grants
-            WHERE permission = ? AND (session_id = ? OR session_id IS NULL)
-            """,
-            (permission, session_id),
-        ).fetchall()
-    if not rows:
-        return None
-    selected = sorted(rows, key=lambda row: 0 if row["session_id"] == session_id else 1)[0]
-    return dict(selected)
+def _select_grant(permission: PermissionType, session_id: str) -> Grant | None:
+    # Session grants take precedence over global ones.
+    return _session_cache(session_id).get(permission) or _global_cache().get(permission)
 
 
 def check_permission(permission: PermissionType, session_id: str, path: str | None = None) -> tuple[bool, str]:
@@ -52,52 +135,56 @@ def check_permission(permission: PermissionType, session_id: str, path: str | No
     if not selected:
         return False, "No grant found"
 
-    scopes = json.loads(selected["allowed_paths_json"] or "[]")
     if path:
-        ok, reason = path_within_scopes(path, scopes)
+        ok, reason = path_within_scopes(path, selected.allowed_paths)
         if not ok:
             return False, reason
 
-    if selected["scope"] == "once":
-        with connection() as conn:
-            conn.execute(
-                "DELETE FROM permission_grants WHERE permission = ? AND scope = 'once' AND session_id = ?",
-                (permission, session_id),
-            )
+    if selected.scope == "once":
+        with _cache_lock:
+            # Consume atomically: the delete fails if a concurrent check, here or in
+            # another backend process, used the grant first.
+            with connection() as conn:
+                consumed = conn.execute(
+                    "DELETE FROM permission_grants WHERE permission = ? AND scope = 'once' AND session_id = ?",
+                    (permission, session_id),
+                ).rowcount
+            _session_cache(session_id).pop(permission, None)
+            if not consumed:
+                return False, "No grant found"
     return True, "Granted"
 
 
 def revoke_permission(permission: str, session_id: str) -> None:
-    with connection() as conn:
-        conn.execute(
-            "DELETE FROM permission_grants WHERE permission = ? AND (session_id = ? OR session_id IS NULL)",
-            (permission, session_id),
-        )
+    with _cache_lock:
+        with connection() as conn:
+            conn.execute(
+                "DELETE FROM permission_grants WHERE permission = ? AND (session_id = ? OR session_id IS NULL)",
+                (permission, session_id),
+            )
+        _forget(permission, session_id)
     log_event("permission.revoke", f"Revoked {permission}", {"permission": permission}, session_id=session_id)
 
 
 def list_grants(session_id: str) -> list[PermissionGrantResponse]:
-    with connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT permission, scope, session_id, allowed_paths_json
-            FROM permission_grants WHERE session_id = ? OR session_id IS NULL
-            """,
-            (session_id,),
-        ).fetchall()
-    results: list[PermissionGrantResponse] = []
-    for row in rows:
-        item = dict(row)
-        results.append(
-            PermissionGrantResponse(
-                permission=item["permission"],
-                scope=item["scope"],
-                session_id=item["session_id"],
-                allowed_paths=json.loads(item["allowed_paths_json"] or "[]"),
-            )
+    # Global grants first so callers building a dict let session grants win.
+    grants = [*_global_cache().values(), *_session_cache(session_id).values()]
+    return [
+        PermissionGrantResponse(
+            permission=grant.permission,
+            scope=grant.scope,
+            session_id=grant.session_id,
+            allowed_paths=list(grant.allowed_paths),
         )
-    return results
-
-
-__all__ = ["grant_permission", "check_permission", "revoke_permission", "list_grants", "path_within_scopes"]
-
+        for grant in grants
+    ]
+
+
+__all__ = [
+    "grant_permission",
+    "check_permission",
+    "revoke_permission",
+    "list_grants",
+    "reset_grant_cache",
+    "path_within_scopes",
+]
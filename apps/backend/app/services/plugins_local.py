@@ -1,58 +1,196 @@
-"""Local plugin loader from apps/backend/plugins_local."""
+"""Local plugin catalog for apps/backend/plugins_local.
+
+Each ``plugins_local/<dir>/manifest.json`` names an ``entrypoint`` file, the
+tool ``name`` and optionally ``attr`` (defaults to ``PLUGIN``), ``version``,
+``description``, ``enabled`` and ``capabilities`` (see
+``PluginCapabilities``), so the runner can plan calls without executing the
+entrypoint. Without ``capabilities`` the plugin's own attribute is used,
+which loads it. Manifests are parsed once and re-read only when their mtime
+changes. Entrypoints are not executed until the plugin is first used; each
+one runs under its own module name, is reloaded when the file changes, and
+fails to load if its ``name`` differs from the manifest's (see
+``app.plugins.loader``). Manifests written before ``name`` was read from
+them have none; their entrypoint is executed when the manifest is parsed to
+take the name from the plugin object, as earlier releases did.
+"""
 
 from __future__ import annotations
 
-import importlib.util
 import json
-from pathlib import Path
+import os
+import threading
 import uuid
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
-from app.db.sqlite import connection
-from app.plugins.base import ToolPlugin
+from app.db.sqlite import connection, read_connection
+from app.plugins.base import PluginCapabilities, ToolPlugin, plugin_capabilities
+from app.plugins.loader import LazyPlugins, PluginSpec, load_plugin, local_module_name
 
 
 PLUGINS_LOCAL_DIR = Path(__file__).resolve().parents[2] / "plugins_local"
 
 
-def _load_module(entrypoint: str):
-    spec = importlib.util.spec_from_file_location("neroai_local_plugin", entrypoint)
-    if not spec or not spec.loader:
-        raise RuntimeError("Failed to load plugin entrypoint")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)  # type: ignore
-    return module
+@dataclass(frozen=True)
+class CatalogEntry:
+    name: str
+    version: str
+    entrypoint: str
+    attr: str
+    description: str | None
+    capabilities: PluginCapabilities | None = None
+
+    def spec(self) -> PluginSpec:
+        return {"path": self.entrypoint, "attr": self.attr, "module_name": local_module_name(self.name), "name": self.name}
+
+
+class LocalPlugin:
+    """Registry entry for a local plugin; the entrypoint is executed on first use."""
+
+    def __init__(self, entry: CatalogEntry, plugins: LazyPlugins) -> None:
+        self.name = entry.name
+        self.entry = entry
+        self._plugins = plugins
+
+    def _plugin(self) -> ToolPlugin:
+        plugin = self._plugins.get(self.name)
+        if plugin is None:
+            raise RuntimeError(f"Local plugin {self.name} is no longer installed")
+        return plugin
+
+    @property
+    def description(self) -> str:
+        return self.entry.description or getattr(self._plugin(), "description", "")
+
+    @property
+    def capabilities(self) -> PluginCapabilities:
+        if self.entry.capabilities is not None:
+            return self.entry.capabilities
+        return plugin_capabilities(self._plugin())
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self._plugin().input_schema
+
+    @property
+    def permission_requirements(self) -> list:
+        return self._plugin().permission_requirements
+
+    def run(self, payload: dict[str, Any]) -> dict[str, Any]:
+        return self._plugin().run(payload)
+
+
+def _legacy_plugin_name(entrypoint: str, attr: str, directory: str) -> str | None:
+    """Name of a plugin whose manifest has none, read from the plugin object itself."""
+    spec = {"path": entrypoint, "attr": attr, "module_name": local_module_name(os.path.basename(directory))}
+    try:
+        return getattr(load_plugin(spec), "name", None)
+    except Exception:
+        return None
+
+
+class PluginCatalog:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.plugins = LazyPlugins({})
+        self._manifests: dict[str, tuple[int, CatalogEntry | None]] = {}
+        self._entries: dict[str, LocalPlugin] = {}
+        self._lock = threading.Lock()
+
+    def _parse(self, manifest: str, directory: str) -> CatalogEntry | None:
+        try:
+            data = json.loads(Path(manifest).read_text(encoding="utf-8"))
+            if not data.get("enabled", True):
+                return None
+            capabilities = data.get("capabilities")
+            entrypoint = str(Path(directory) / data["entrypoint"])
+            attr = str(data.get("attr", "PLUGIN"))
+            name = data.get("name") or _legacy_plugin_name(entrypoint, attr, directory)
+            if not name:
+                return None
+            return CatalogEntry(
+                name=str(name),
+                version=str(data.get("version", "0.0.0")),
+                entrypoint=entrypoint,
+                attr=attr,
+                description=data.get("description"),
+                capabilities=PluginCapabilities.from_dict(capabilities) if capabilities is not None else None,
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def refresh(self) -> dict[str, LocalPlugin]:
+        """Re-read changed manifests; returns the enabled plugins by name."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            manifests: dict[str, tuple[int, CatalogEntry | None]] = {}
+            with os.scandir(self.root) as iterator:
+                directories = sorted(entry.path for entry in iterator if entry.is_dir())
+            for directory in directories:
+                manifest = os.path.join(directory, "manifest.json")
+                try:
+                    mtime = os.stat(manifest).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._manifests.get(manifest)
+                manifests[manifest] = cached if cached and cached[0] == mtime else (mtime, self._parse(manifest, directory))
+            self._manifests = manifests
+
+            current: dict[str, CatalogEntry] = {}
+            for _, entry in manifests.values():
+                if entry is not None and entry.name not in current:
+                    current[entry.name] = entry
+            added = [entry for name, entry in current.items() if name not in self._entries or self._entries[name].entry != entry]
+            self.plugins.update({name: entry.spec() for name, entry in current.items()})
+            self._entries = {
+                name: self._entries[name] if name in self._entries and self._entries[name].entry == entry else LocalPlugin(entry, self.plugins)
+                for name, entry in current.items()
+            }
+            entries = dict(self._entries)
+        if added:
+            register_plugin_records(added)
+        return entries
+
+    def specs(self) -> dict[str, PluginSpec]:
+        with self._lock:
+            return {name: plugin.entry.spec() for name, plugin in self._entries.items()}
+
+
+_catalog = PluginCatalog(PLUGINS_LOCAL_DIR)
 
 
 def load_local_plugins() -> dict[str, ToolPlugin]:
-    PLUGINS_LOCAL_DIR.mkdir(parents=True, exist_ok=True)
-    registry: dict[str, BasePlugin] = {}
-    for manifest_path in PLUGINS_LOCAL_DIR.glob("*/manifest.json"):
-        data = json.loads(manifest_path.read_text(encoding="utf-8"))
-        entry = manifest_path.parent / data["entrypoint"]
-        enabled = data.get("enabled", True)
-        if not enabled:
-            continue
-        module = _load_module(str(entry))
-        plugin_obj = getattr(module, "PLUGIN", None)
-        if plugin_obj and getattr(plugin_obj, "name", None):
-            register_plugin_record(plugin_obj.name, data.get("version", "0.0.0"), str(entry))
-            registry[plugin_obj.name] = plugin_obj
-    return registry
+    return dict(_catalog.refresh())
+
+
+def local_plugin_specs() -> dict[str, PluginSpec]:
+    return _catalog.specs()
 
 
 def list_plugin_records() -> list[dict[str, Any]]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute("SELECT * FROM plugin_registry ORDER BY created_at DESC").fetchall()
     return [dict(r) for r in rows]
 
 
-def register_plugin_record(name: str, version: str, path: str) -> None:
+def register_plugin_records(entries: list[CatalogEntry]) -> None:
+    """Record new or updated plugins; one row per name and entrypoint."""
     with connection() as conn:
-        conn.execute(
-            "INSERT OR IGNORE INTO plugin_registry (id, name, version, path, enabled) VALUES (?, ?, ?, ?, 1)",
-            (str(uuid.uuid4()), name, version, path),
-        )
+        for entry in entries:
+            cursor = conn.execute(
+                "UPDATE plugin_registry SET version = ? WHERE name = ? AND path = ?",
+                (entry.version, entry.name, entry.entrypoint),
+            )
+            if cursor.rowcount == 0:
+                conn.execute(
+                    "INSERT INTO plugin_registry (id, name, version, path, enabled) VALUES (?, ?, ?, ?, 1)",
+                    (str(uuid.uuid4()), entry.name, entry.version, entry.entrypoint),
+                )
+
+
+def register_plugin_record(name: str, version: str, path: str) -> None:
+    register_plugin_records([CatalogEntry(name, version, path, "PLUGIN", None)])
 
 
 def set_plugin_enabled(plugin_id: str, enabled: bool) -> None:
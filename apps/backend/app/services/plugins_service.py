@@ -4,13 +4,15 @@ from __future__ import annotations
 
 from typing import Any
 
-from app.db.sqlite import connection
-from app.plugins.registry import PLUGIN_REGISTRY
+from app.db.sqlite import connection, read_connection
+from app.plugins.loader import BUILTIN_PLUGINS
+from app.plugins.registry import PLUGIN_REGISTRY, refresh_local_plugins
 
 
 def list_plugins() -> list[dict[str, Any]]:
-    builtins = [{"name": name, "type": "builtin", "enabled": True} for name in PLUGIN_REGISTRY.keys()]
-    with connection() as conn:
+    refresh_local_plugins()
+    builtins = [{"name": name, "type": "builtin", "enabled": True} for name in PLUGIN_REGISTRY.keys() if name in BUILTIN_PLUGINS]
+    with read_connection() as conn:
         rows = conn.execute("SELECT id, name, version, path, enabled FROM plugin_registry").fetchall()
     locals_ = [
         {"id": r["id"], "name": r["name"], "version": r["version"], "path": r["path"], "type": "local", "enabled": bool(r["enabled"])}
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import functools
+import hashlib
 import re
-from typing import Literal
+from typing import Any, Literal
 
 
 Effect = Literal["allow", "deny"]
@@ -38,6 +40,8 @@ class PolicyParseResult:
     errors: list[str]
 
 
+DECISION_CACHE_LIMIT = 1024
+
 _ACTION_RE = re.compile(r"^(allow|deny)\(([^)]+)\)\s*(.*)$", re.IGNORECASE)
 _LIMIT_RE = re.compile(r"^([a-zA-Z0-9_.]+)\s*=\s*([0-9]+)\s*(.*)$")
 
@@ -65,6 +69,59 @@ def _parse_condition(tail: str) -> Condition | None:
     return None
 
 
+Specificity = tuple[tuple[int, int], ...]
+
+
+def _action_pattern_error(pattern: str) -> str | None:
+    """Actions are dotted segments; ``*`` ends a segment, ``**`` ends the pattern."""
+    segments = pattern.split(".")
+    for idx, segment in enumerate(segments):
+        if not segment:
+            return "empty segment"
+        if "*" not in segment:
+            continue
+        if segment == "**":
+            if idx != len(segments) - 1:
+                return "'**' must be the last segment"
+        elif segment.count("*") > 1 or not segment.endswith("*"):
+            return "'*' is only allowed at the end of a segment"
+    return None
+
+
+def _segment_rank(segment: str) -> tuple[int, int]:
+    """Rank one pattern segment: literal > prefix glob (longer first) > ``*`` > ``**``."""
+    if segment == "**":
+        return (0, 0)
+    if segment == "*":
+        return (1, 0)
+    if segment.endswith("*"):
+        return (2, len(segment) - 1)
+    return (3, len(segment))
+
+
+def _pattern_specificity(pattern: str, action: str) -> Specificity | None:
+    """Return the pattern's specificity for ``action``, or None when it does not match."""
+    pattern_segments = pattern.lower().split(".")
+    action_segments = action.lower().split(".")
+    rank: list[tuple[int, int]] = []
+    for idx, segment in enumerate(pattern_segments):
+        if segment == "**":
+            if idx >= len(action_segments):
+                return None
+            rank.append(_segment_rank(segment))
+            return tuple(rank)
+        if idx >= len(action_segments):
+            return None
+        target = action_segments[idx]
+        if segment == target or segment == "*" or (segment.endswith("*") and target.startswith(segment[:-1])):
+            rank.append(_segment_rank(segment))
+            continue
+        return None
+    if len(pattern_segments) != len(action_segments):
+        return None
+    return tuple(rank)
+
+
 def parse_policy(text: str) -> PolicyParseResult:
     effects: list[EffectRule] = []
     limits: list[LimitRule] = []
@@ -78,6 +135,10 @@ def parse_policy(text: str) -> PolicyParseResult:
             effect = m.group(1).lower()
             action = m.group(2).strip()
             tail = m.group(3).strip()
+            pattern_error = _action_pattern_error(action)
+            if pattern_error:
+                errors.append(f"Line {idx}: invalid action '{action}': {pattern_error}")
+                continue
             cond = _parse_condition(tail)
             if cond is None:
                 errors.append(f"Line {idx}: invalid condition '{tail}'")
@@ -116,15 +177,23 @@ def evaluate_effect(
     workspace: str | None,
     confirmed: bool = False,
 ) -> Effect | None:
-    decision: Effect | None = None
+    """Linear reference evaluator: the most specific matching pattern decides.
+
+    Within one pattern, any matching ``deny`` wins over ``allow``.
+    """
+    tiers: dict[Specificity, Effect] = {}
     for rule in rules:
-        if rule.action.lower() != action.lower():
+        rank = _pattern_specificity(rule.action, action)
+        if rank is None:
             continue
         if _condition_matches(rule.condition, profile, workspace, confirmed):
             if rule.effect == "deny":
-                return "deny"
-            decision = "allow"
-    return decision
+                tiers[rank] = "deny"
+            else:
+                tiers.setdefault(rank, "allow")
+    if not tiers:
+        return None
+    return tiers[max(tiers)]
 
 
 def apply_limit_overrides(
@@ -141,3 +210,197 @@ def apply_limit_overrides(
         if _condition_matches(rule.condition, profile, workspace, confirmed):
             updated[rule.key] = int(rule.value)
     return updated
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """Condition with its values lowercased once at compile time."""
+
+    profile: str | None = None
+    workspace: str | None = None
+    require_confirm: bool = False
+
+    @classmethod
+    def from_condition(cls, cond: Condition) -> CompiledCondition:
+        return cls(
+            profile=cond.profile.lower() if cond.profile else None,
+            workspace=cond.workspace.lower() if cond.workspace else None,
+            require_confirm=cond.require_confirm,
+        )
+
+    def matches(self, profile: str, workspace: str, confirmed: bool) -> bool:
+        """Match against already-lowercased profile/workspace names."""
+        if self.require_confirm and not confirmed:
+            return False
+        if self.profile is not None and profile != self.profile:
+            return False
+        if self.workspace is not None and workspace != self.workspace:
+            return False
+        return True
+
+    def describe(self) -> dict[str, Any]:
+        return {"profile": self.profile, "workspace": self.workspace, "require_confirm": self.require_confirm}
+
+
+_RuleSet = tuple[tuple[Effect, CompiledCondition], ...]
+
+
+class _TrieNode:
+    __slots__ = ("children", "prefix_lengths", "rules")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.prefix_lengths: set[int] = set()
+        self.rules: _RuleSet = ()
+
+
+class ActionTrie:
+    """Segment trie over action patterns.
+
+    Children are keyed by the raw pattern segment (``file_read``, ``file_*``,
+    ``*``, ``**``), so a lookup probes a fixed set of keys per segment and
+    stays O(depth) regardless of how many rules exist.
+    """
+
+    def __init__(self, patterns: dict[str, _RuleSet]) -> None:
+        self._root = _TrieNode()
+        for pattern, rules in patterns.items():
+            node = self._root
+            for segment in pattern.split("."):
+                if segment.endswith("*") and segment not in {"*", "**"}:
+                    node.prefix_lengths.add(len(segment) - 1)
+                node = node.children.setdefault(segment, _TrieNode())
+            node.rules = node.rules + rules
+
+    def matches(self, action: str) -> list[tuple[Specificity, _RuleSet]]:
+        """All patterns matching ``action`` with their specificity, most specific first."""
+        found: list[tuple[Specificity, _RuleSet]] = []
+        frontier: list[tuple[_TrieNode, Specificity]] = [(self._root, ())]
+        for segment in action.lower().split("."):
+            next_frontier: list[tuple[_TrieNode, Specificity]] = []
+            for node, rank in frontier:
+                globstar = node.children.get("**")
+                if globstar is not None and globstar.rules:
+                    found.append((rank + (_segment_rank("**"),), globstar.rules))
+                keys = [segment, "*"]
+                keys.extend(segment[:length] + "*" for length in node.prefix_lengths if length <= len(segment))
+                for key in keys:
+                    child = node.children.get(key)
+                    if child is not None:
+                        next_frontier.append((child, rank + (_segment_rank(key),)))
+            frontier = next_frontier
+            if not frontier:
+                break
+        found.extend((rank, node.rules) for node, rank in frontier if node.rules)
+        found.sort(key=lambda item: item[0], reverse=True)
+        return found
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """Policy text compiled into an action-pattern trie.
+
+    Condition values are lowercased once at compile time; decisions and limit
+    overrides are resolved lazily and memoized per (profile, workspace, confirmed).
+    """
+
+    text_hash: str
+    errors: tuple[str, ...]
+    actions: dict[str, _RuleSet]
+    limits: tuple[tuple[str, int, CompiledCondition], ...]
+    trie: ActionTrie = field(compare=False, repr=False)
+    _decision_cache: dict[tuple[str, str, str, bool], Effect | None] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+    _limit_cache: dict[tuple[str, str, bool], dict[str, int]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def decide(self, action: str, profile: str | None, workspace: str | None, confirmed: bool = False) -> Effect | None:
+        """Most specific matching pattern decides; a matching ``deny`` short-circuits its tier."""
+        action_key = action.lower()
+        profile_key = profile.lower() if profile else ""
+        workspace_key = workspace.lower() if workspace else ""
+        cache_key = (action_key, profile_key, workspace_key, confirmed)
+        if cache_key in self._decision_cache:
+            return self._decision_cache[cache_key]
+        decision: Effect | None = None
+        for _, rules in self.trie.matches(action_key):
+            for effect, cond in rules:
+                if cond.matches(profile_key, workspace_key, confirmed):
+                    if effect == "deny":
+                        decision = "deny"
+                        break
+                    decision = "allow"
+            if decision is not None:
+                break
+        if len(self._decision_cache) >= DECISION_CACHE_LIMIT:
+            self._decision_cache.clear()
+        self._decision_cache[cache_key] = decision
+        return decision
+
+    def limit_overrides(self, profile: str | None, workspace: str | None, confirmed: bool = False) -> dict[str, int]:
+        profile_key = profile.lower() if profile else ""
+        workspace_key = workspace.lower() if workspace else ""
+        cache_key = (profile_key, workspace_key, confirmed)
+        overrides = self._limit_cache.get(cache_key)
+        if overrides is None:
+            overrides = {}
+            for key, value, cond in self.limits:
+                if cond.matches(profile_key, workspace_key, confirmed):
+                    overrides[key] = value
+            self._limit_cache[cache_key] = overrides
+        return overrides
+
+    def apply_limits(
+        self,
+        base: dict[str, int],
+        profile: str | None,
+        workspace: str | None,
+        confirmed: bool = False,
+    ) -> dict[str, int]:
+        updated = dict(base)
+        for key, value in self.limit_overrides(profile, workspace, confirmed).items():
+            if key in updated:
+                updated[key] = value
+        return updated
+
+    def plan(self) -> dict[str, Any]:
+        """JSON-friendly view of the decision table for policy authors."""
+        return {
+            "actions": {
+                action: [{"effect": effect, **cond.describe()} for effect, cond in rules]
+                for action, rules in sorted(self.actions.items())
+            },
+            "limits": [{"key": key, "value": value, **cond.describe()} for key, value, cond in self.limits],
+        }
+
+
+def policy_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_by_hash(text_hash: str, text: str) -> CompiledPolicy:
+    parsed = parse_policy(text)
+    actions: dict[str, list[tuple[Effect, CompiledCondition]]] = {}
+    for rule in parsed.effects:
+        actions.setdefault(rule.action.lower(), []).append(
+            (rule.effect, CompiledCondition.from_condition(rule.condition))
+        )
+    limits = tuple(
+        (rule.key, int(rule.value), CompiledCondition.from_condition(rule.condition)) for rule in parsed.limits
+    )
+    compiled_actions = {action: tuple(rules) for action, rules in actions.items()}
+    return CompiledPolicy(
+        text_hash=text_hash,
+        errors=tuple(parsed.errors),
+        actions=compiled_actions,
+        limits=limits,
+        trie=ActionTrie(compiled_actions),
+    )
+
+
+def compile_policy(text: str) -> CompiledPolicy:
+    """Compile policy text, reusing the cached plan for identical text."""
+    return _compile_by_hash(policy_text_hash(text), text)
@@ -2,17 +2,20 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
 from app.models.schemas import PermissionType
 from app.services.permission_broker import check_permission
 from app.services.path_security import path_within_scopes
-from app.services.policy_dsl import evaluate_effect, parse_policy
+from app.services.policy_dsl import CompiledPolicy, compile_policy
+from app.services.settings_cache import cached_snapshot
 from app.services.settings_profiles import get_active_profile
 from app.services.workspaces import get_active_workspace
 from app.services.settings_service import get_effective_settings
 
 MODE_TOOL_ALLOWLIST: dict[str, set[str]] = {
-    "chat": {"file_read"},
-    "workflow": {"file_read", "file_write", "file_list", "file_read_batch"},
+    "chat": {"file_read", "file_grep"},
+    "workflow": {"file_read", "file_write", "file_list", "file_read_batch", "file_grep"},
 }
 
 
@@ -65,18 +68,36 @@ def _load_policy_text() -> str:
     return "\n".join(parts)
 
 
-def policy_allows_action(action: str, confirmed: bool = False) -> tuple[bool, str]:
-    text = _load_policy_text()
-    if not text.strip():
-        return True, "No policy rules"
-    parsed = parse_policy(text)
-    if parsed.errors:
-        return False, f"Policy parse errors: {parsed.errors[0]}"
+@dataclass(frozen=True)
+class ActivePolicy:
+    policy: CompiledPolicy | None
+    profile_name: str | None
+    workspace_name: str | None
+
+
+def _load_active_policy() -> ActivePolicy:
     profile = get_active_profile()
     workspace = get_active_workspace()
-    profile_name = profile.get("name") if profile else None
-    workspace_name = workspace.get("name") if workspace else None
-    decision = evaluate_effect(parsed.effects, action, profile_name, workspace_name, confirmed=confirmed)
+    text = _load_policy_text()
+    return ActivePolicy(
+        policy=compile_policy(text) if text.strip() else None,
+        profile_name=profile.get("name") if profile else None,
+        workspace_name=workspace.get("name") if workspace else None,
+    )
+
+
+def active_policy() -> ActivePolicy:
+    """Compiled policy for the active profile/workspace pair (invalidated when either changes)."""
+    return cached_snapshot("active_policy", _load_active_policy)
+
+
+def policy_allows_action(action: str, confirmed: bool = False) -> tuple[bool, str]:
+    active = active_policy()
+    if active.policy is None:
+        return True, "No policy rules"
+    if active.policy.errors:
+        return False, f"Policy parse errors: {active.policy.errors[0]}"
+    decision = active.policy.decide(action, active.profile_name, active.workspace_name, confirmed=confirmed)
     if decision == "deny":
         return False, "Policy denied action"
     return True, "Allowed"
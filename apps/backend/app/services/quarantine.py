@@ -0,0 +1,243 @@
+"""Content-addressed quarantine store for out-of-scope reads.
+
+Each quarantined file becomes ``objects/<hash[:2]>/<sha256>`` under
+``QUARANTINE_DIR``, shared by every session, so identical content is stored
+once and same-named files never collide. Objects are made with a reflink
+(copy-on-write clone) when the filesystem supports it, then a hardlink, and
+only then a chunked streaming copy that hashes while it copies. Bytes are
+kept as-is, so non-UTF-8 files quarantine like any other.
+
+``quarantine_objects`` records each object's size and mtime. A hardlinked
+object shares its inode with the source, so a source edited in place no
+longer matches its record and is stored again. Objects unused for
+``QUARANTINE_TTL_SECONDS`` are garbage collected.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from app.db.sqlite import DATA_DIR, connection, read_connection
+
+QUARANTINE_DIR = DATA_DIR / "quarantine"
+QUARANTINE_TTL_SECONDS = 24 * 3600
+GC_INTERVAL_SECONDS = 3600
+COPY_CHUNK_BYTES = 1024 * 1024
+MAX_REMEMBERED_SOURCES = 4096
+# Linux FICLONE ioctl: clone src into dst sharing extents (btrfs, xfs, ...).
+_FICLONE = 0x40049409
+
+# (dev, inode, size, mtime_ns) of a source -> hash of the object made from it.
+_sources: OrderedDict[tuple[int, int, int, int], str] = OrderedDict()
+_lock = threading.Lock()
+_last_gc = 0.0
+
+
+def _objects_dir() -> Path:
+    return QUARANTINE_DIR / "objects"
+
+
+def _temp_dir() -> Path:
+    return QUARANTINE_DIR / "tmp"
+
+
+def object_path(digest: str) -> Path:
+    return _objects_dir() / digest[:2] / digest
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with src.open("rb") as source, dst.open("xb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            return True
+        except OSError:
+            pass
+    dst.unlink()
+    return False
+
+
+def _hardlink(src: Path, dst: Path) -> bool:
+    try:
+        os.link(src, dst)
+    except OSError:
+        return False
+    return True
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(COPY_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _copy_hashing(src: Path, dst: Path) -> str:
+    digest = hashlib.sha256()
+    with src.open("rb") as source, dst.open("xb") as target:
+        for block in iter(lambda: source.read(COPY_CHUNK_BYTES), b""):
+            digest.update(block)
+            target.write(block)
+    return digest.hexdigest()
+
+
+def _materialize(src: Path, temp: Path) -> tuple[str, str]:
+    """Put ``src``'s bytes at ``temp``; returns ``(hash, method)``."""
+    for method, make in (("reflink", _reflink), ("hardlink", _hardlink)):
+        if make(src, temp):
+            before = os.stat(temp)
+            digest = _hash_file(temp)
+            after = os.stat(temp)
+            # A hardlink sees writes to the source; one during hashing means the hash is stale.
+            if (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns):
+                return digest, method
+            temp.unlink()
+    return _copy_hashing(src, temp), "copy"
+
+
+def _object_valid(digest: str) -> bool:
+    with read_connection() as conn:
+        row = conn.execute("SELECT size, mtime_ns FROM quarantine_objects WHERE hash = ?", (digest,)).fetchone()
+    if row is None:
+        return False
+    try:
+        st = os.stat(object_path(digest))
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (row["size"], row["mtime_ns"])
+
+
+def _touch(digest: str) -> None:
+    with connection() as conn:
+        conn.execute("UPDATE quarantine_objects SET last_used = ? WHERE hash = ?", (time.time(), digest))
+
+
+def _store(src: Path) -> str:
+    temp_dir = _temp_dir()
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    temp = temp_dir / uuid.uuid4().hex
+    try:
+        digest, method = _materialize(src, temp)
+        if _object_valid(digest):
+            # Already stored (by any session): keep the existing object.
+            temp.unlink()
+            _touch(digest)
+            return digest
+        target = object_path(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp, target)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    st = os.stat(target)
+    now = time.time()
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO quarantine_objects (hash, size, mtime_ns, method, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET
+                size = excluded.size, mtime_ns = excluded.mtime_ns, method = excluded.method, last_used = excluded.last_used
+            """,
+            (digest, st.st_size, st.st_mtime_ns, method, now, now),
+        )
+    return digest
+
+
+def quarantine_file(path: str) -> Path:
+    """Return the quarantined copy of ``path``, storing it unless an unchanged copy already exists."""
+    src = Path(path).resolve()
+    st = os.stat(src)
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    with _lock:
+        digest = _sources.get(key)
+    if digest is not None and _object_valid(digest):
+        _touch(digest)
+    else:
+        digest = _store(src)
+        with _lock:
+            _sources[key] = digest
+            _sources.move_to_end(key)
+            while len(_sources) > MAX_REMEMBERED_SOURCES:
+                _sources.popitem(last=False)
+    return object_path(digest)
+
+
+def quarantine_paths(paths: list[str]) -> list[str]:
+    """Quarantine each path; a path that cannot be stored is passed through unchanged."""
+    maybe_gc_quarantine()
+    resolved: list[str] = []
+    for item in paths:
+        try:
+            resolved.append(str(quarantine_file(item)))
+        except Exception:
+            resolved.append(item)
+    return resolved
+
+
+def gc_quarantine(ttl_seconds: float = QUARANTINE_TTL_SECONDS) -> int:
+    """Delete objects unused for ``ttl_seconds`` plus stale temp files; returns objects removed."""
+    cutoff = time.time() - ttl_seconds
+    with read_connection() as conn:
+        expired = [row["hash"] for row in conn.execute("SELECT hash FROM quarantine_objects WHERE last_used < ?", (cutoff,))]
+    for digest in expired:
+        object_path(digest).unlink(missing_ok=True)
+    if expired:
+        with connection() as conn:
+            conn.executemany("DELETE FROM quarantine_objects WHERE hash = ? AND last_used < ?", [(d, cutoff) for d in expired])
+    if QUARANTINE_DIR.exists():
+        for entry in QUARANTINE_DIR.iterdir():
+            if entry.name == "objects":
+                continue
+            # Leftover temp files, and per-session directories from the old text-copy layout.
+            children = list(entry.iterdir()) if entry.name == "tmp" else [entry]
+            for child in children:
+                try:
+                    if child.stat().st_mtime >= cutoff:
+                        continue
+                    if child.is_dir():
+                        shutil.rmtree(child, ignore_errors=True)
+                    else:
+                        child.unlink()
+                except OSError:
+                    continue
+    return len(expired)
+
+
+def maybe_gc_quarantine() -> None:
+    global _last_gc
+    now = time.monotonic()
+    with _lock:
+        if _last_gc and now - _last_gc < GC_INTERVAL_SECONDS:
+            return
+        _last_gc = now
+    gc_quarantine()
+
+
+def reset_quarantine_memo() -> None:
+    global _last_gc
+    with _lock:
+        _sources.clear()
+        _last_gc = 0.0
+
+
+__all__ = [
+    "QUARANTINE_DIR",
+    "gc_quarantine",
+    "maybe_gc_quarantine",
+    "object_path",
+    "quarantine_file",
+    "quarantine_paths",
+    "reset_quarantine_memo",
+]
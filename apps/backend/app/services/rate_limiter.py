@@ -0,0 +1,208 @@
+"""Per-session sliding-window rate limiting with optional SQLite-shared state."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.db.sqlite import connection, read_connection
+
+WINDOW_SECONDS = 60.0
+IDLE_EVICT_SECONDS = 2 * WINDOW_SECONDS
+MAX_TRACKED_SESSIONS = 10_000
+SWEEP_INTERVAL_SECONDS = 30.0
+
+
+@dataclass
+class SessionCounter:
+    """Two fixed windows approximate a sliding window in constant memory."""
+
+    window_start: float
+    current: int = 0
+    previous: int = 0
+    allowed: int = 0
+    throttled: int = 0
+    last_seen: float = 0.0
+
+    def roll(self, now: float, window: float) -> None:
+        elapsed = int((now - self.window_start) // window)
+        if elapsed >= 1:
+            self.previous = self.current if elapsed == 1 else 0
+            self.current = 0
+            self.window_start += elapsed * window
+
+    def estimate(self, now: float, window: float) -> float:
+        """Calls in the trailing window, weighting the previous window by its overlap."""
+        overlap = max(0.0, 1.0 - (now - self.window_start) / window)
+        return self.previous * overlap + self.current
+
+    def admit(self, now: float, window: float, limit: int) -> bool:
+        self.roll(now, window)
+        self.last_seen = now
+        if self.estimate(now, window) + 1 > limit:
+            self.throttled += 1
+            return False
+        self.current += 1
+        self.allowed += 1
+        return True
+
+    def snapshot(self, session_id: str, now: float, window: float) -> dict[str, Any]:
+        self.roll(now, window)
+        return {
+            "session_id": session_id,
+            "recent_calls": round(self.estimate(now, window), 2),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "idle_seconds": round(max(0.0, now - self.last_seen), 2),
+        }
+
+
+class SlidingWindowLimiter:
+    """In-process limiter; sessions idle past ``idle_seconds`` are evicted."""
+
+    def __init__(
+        self,
+        window_seconds: float = WINDOW_SECONDS,
+        idle_seconds: float = IDLE_EVICT_SECONDS,
+        max_sessions: int = MAX_TRACKED_SESSIONS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        # Least recently seen first, so eviction pops from the front.
+        self._counters: OrderedDict[str, SessionCounter] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, session_id: str, limit: int) -> bool:
+        now = self._clock()
+        with self._lock:
+            self._evict_idle(now)
+            counter = self._counters.get(session_id)
+            if counter is None:
+                while len(self._counters) >= self.max_sessions:
+                    self._counters.popitem(last=False)
+                counter = SessionCounter(window_start=now)
+                self._counters[session_id] = counter
+            else:
+                self._counters.move_to_end(session_id)
+            return counter.admit(now, self.window_seconds, limit)
+
+    def _evict_idle(self, now: float) -> None:
+        while self._counters:
+            oldest = next(iter(self._counters.values()))
+            if now - oldest.last_seen <= self.idle_seconds:
+                break
+            self._counters.popitem(last=False)
+
+    def counters(self) -> list[dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            self._evict_idle(now)
+            return [
+                counter.snapshot(session_id, now, self.window_seconds)
+                for session_id, counter in reversed(self._counters.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class SqliteWindowLimiter:
+    """Same algorithm with state in ``rate_limit_counters``, shared by every worker process."""
+
+    def __init__(
+        self,
+        window_seconds: float = WINDOW_SECONDS,
+        idle_seconds: float = IDLE_EVICT_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def _load(row: Any, now: float) -> SessionCounter:
+        if row is None:
+            return SessionCounter(window_start=now)
+        return SessionCounter(
+            window_start=row["window_start"],
+            current=row["current_count"],
+            previous=row["previous_count"],
+            allowed=row["allowed_count"],
+            throttled=row["throttled_count"],
+            last_seen=row["last_seen"],
+        )
+
+    def hit(self, session_id: str, limit: int) -> bool:
+        now = self._clock()
+        with connection() as conn:
+            if not conn.in_transaction:
+                # Take the write lock up front so concurrent workers serialize the read-modify-write.
+                conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM rate_limit_counters WHERE session_id = ?", (session_id,)).fetchone()
+            counter = self._load(row, now)
+            allowed = counter.admit(now, self.window_seconds, limit)
+            conn.execute(
+                """
+                INSERT INTO rate_limit_counters
+                    (session_id, window_start, current_count, previous_count, allowed_count, throttled_count, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    window_start=excluded.window_start,
+                    current_count=excluded.current_count,
+                    previous_count=excluded.previous_count,
+                    allowed_count=excluded.allowed_count,
+                    throttled_count=excluded.throttled_count,
+                    last_seen=excluded.last_seen
+                """,
+                (
+                    session_id,
+                    counter.window_start,
+                    counter.current,
+                    counter.previous,
+                    counter.allowed,
+                    counter.throttled,
+                    counter.last_seen,
+                ),
+            )
+            if now >= self._next_sweep:
+                conn.execute("DELETE FROM rate_limit_counters WHERE last_seen < ?", (now - self.idle_seconds,))
+                self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        return allowed
+
+    def counters(self) -> list[dict[str, Any]]:
+        now = self._clock()
+        with read_connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM rate_limit_counters WHERE last_seen >= ? ORDER BY last_seen DESC",
+                (now - self.idle_seconds,),
+            ).fetchall()
+        return [self._load(row, now).snapshot(row["session_id"], now, self.window_seconds) for row in rows]
+
+    def reset(self) -> None:
+        with connection() as conn:
+            conn.execute("DELETE FROM rate_limit_counters")
+
+
+_LOCAL = SlidingWindowLimiter()
+_SHARED = SqliteWindowLimiter()
+
+
+def get_rate_limiter(shared: bool) -> SlidingWindowLimiter | SqliteWindowLimiter:
+    return _SHARED if shared else _LOCAL
+
+
+__all__ = [
+    "SessionCounter",
+    "SlidingWindowLimiter",
+    "SqliteWindowLimiter",
+    "get_rate_limiter",
+]
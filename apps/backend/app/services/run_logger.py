@@ -7,7 +7,8 @@ import time
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
+from app.db.write_queue import enqueue_write, flush_writes, utc_timestamp
 from app.services.audit import hash_text
 from app.services.settings_service import get_effective_settings
 
@@ -37,11 +38,10 @@ def start_run(
 
 
 def log_run_event(run_id: str, event_type: str, payload: dict[str, Any]) -> None:
-    with connection() as conn:
-        conn.execute(
-            "INSERT INTO run_events (id, run_id, event_type, payload_json) VALUES (?, ?, ?, ?)",
-            (str(uuid.uuid4()), run_id, event_type, json.dumps(payload)),
-        )
+    enqueue_write(
+        "INSERT INTO run_events (id, run_id, event_type, payload_json, created_at) VALUES (?, ?, ?, ?, ?)",
+        (str(uuid.uuid4()), run_id, event_type, json.dumps(payload), utc_timestamp()),
+    )
 
 
 def finish_run(run_id: str, start_time: float) -> None:
@@ -54,7 +54,7 @@ def finish_run(run_id: str, start_time: float) -> None:
 
 
 def list_runs(limit: int = 50) -> list[dict[str, Any]]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT * FROM runs ORDER BY created_at DESC LIMIT ?",
             (limit,),
@@ -63,7 +63,8 @@ def list_runs(limit: int = 50) -> list[dict[str, Any]]:
 
 
 def get_run(run_id: str) -> dict[str, Any] | None:
-    with connection() as conn:
+    flush_writes()
+    with read_connection() as conn:
         row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
         if not row:
             return None
@@ -4,18 +4,19 @@ from __future__ import annotations
 
 from typing import Any
 
+from app.db.async_db import run_db
 from app.services.model_sources import get_source, list_model_options
 from app.services.ollama_status import get_cached_ollama_status
 from app.services.settings_service import get_effective_settings
 
 
 async def decide_runtime_route(source_id: str, model: str) -> dict[str, Any]:
-    settings = get_effective_settings()
-    source = get_source(source_id)
+    settings = await run_db(get_effective_settings)
+    source = await run_db(get_source, source_id)
     if not source:
         return {"mode": "normal", "source_id": source_id, "model": model}
 
-    status = get_cached_ollama_status()
+    status = await run_db(get_cached_ollama_status)
     local_unavailable = bool(source.is_local and settings.ollama_required_for_local_chat and not status.get("healthy", False))
     if not local_unavailable:
         return {"mode": "normal", "source_id": source_id, "model": model}
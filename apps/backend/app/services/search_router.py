@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from app.models.schemas import ManualSearchSubmitRequest, SearchResponse
+from app.db.async_db import run_db
+from app.models.schemas import ManualSearchSubmitRequest, SearchResponse, SettingsResponse
 from app.services.audit import hash_text, log_event
 from app.services.limits import RunLimiter, enforce_rate_limit
 from app.services.policy_guard import assert_permission, policy_allows_action
@@ -15,16 +16,7 @@ from app.services.search_providers import (
 from app.services.settings_service import get_effective_settings
 
 
-async def search_with_router(
-    query: str,
-    num_results: int,
-    safe: bool,
-    session_id: str,
-    manual_payload: ManualSearchSubmitRequest | None = None,
-    safe_mode: bool = True,
-    limiter: RunLimiter | None = None,
-    run_id: str | None = None,
-) -> SearchResponse:
+def _authorize_search(session_id: str, safe_mode: bool) -> SettingsResponse:
     policy_ok, policy_reason = policy_allows_action("web.search")
     if not policy_ok:
         log_event(
@@ -45,7 +37,20 @@ async def search_with_router(
             )
             raise PermissionError("permission_required:workspace:Web search not allowed by workspace")
     assert_permission("web.search", session_id=session_id, safe_mode=safe_mode)
-    settings = get_effective_settings()
+    return get_effective_settings()
+
+
+async def search_with_router(
+    query: str,
+    num_results: int,
+    safe: bool,
+    session_id: str,
+    manual_payload: ManualSearchSubmitRequest | None = None,
+    safe_mode: bool = True,
+    limiter: RunLimiter | None = None,
+    run_id: str | None = None,
+) -> SearchResponse:
+    settings = await run_db(_authorize_search, session_id, safe_mode)
     query_hash = hash_text(query)
     manual = ManualFallbackProvider()
 
@@ -56,7 +61,8 @@ async def search_with_router(
             enforce_rate_limit(session_id, limiter.max_tool_calls_per_minute)
             limiter.record_tool_call()
         except RuntimeError as exc:
-            log_event(
+            await run_db(
+                log_event,
                 "limit.blocked",
                 "Web search blocked by limits",
                 {"tool": "web.search", "reason": str(exc)},
@@ -66,14 +72,14 @@ async def search_with_router(
 
     if manual_payload:
         parsed = manual.parse_manual(manual_payload)
-        _log_search(query, query_hash, parsed.provider, len(parsed.results), parsed.status == "ok", run_id=run_id)
+        await run_db(_log_search, query, query_hash, parsed.provider, len(parsed.results), parsed.status == "ok", run_id=run_id)
         return SearchResponse(
             status=parsed.status, provider=parsed.provider, results=parsed.results, detail=parsed.detail, manual_instructions=parsed.manual_instructions
         )
 
     if settings.search_provider == "manual":
         fallback = await manual.search(query=query, num_results=num_results, safe=safe)
-        _log_search(query, query_hash, fallback.provider, 0, False, run_id=run_id)
+        await run_db(_log_search, query, query_hash, fallback.provider, 0, False, run_id=run_id)
         return SearchResponse(
             status="manual_required",
             provider=fallback.provider,
@@ -94,11 +100,11 @@ async def search_with_router(
     for provider in providers:
         result = await provider.search(query=query, num_results=num_results, safe=safe)
         if result.status == "ok":
-            _log_search(query, query_hash, result.provider, len(result.results), True, run_id=run_id)
+            await run_db(_log_search, query, query_hash, result.provider, len(result.results), True, run_id=run_id)
             return SearchResponse(status="ok", provider=result.provider, results=result.results, detail=result.detail)
 
     fallback = await manual.search(query=query, num_results=num_results, safe=safe)
-    _log_search(query, query_hash, fallback.provider, 0, False, run_id=run_id)
+    await run_db(_log_search, query, query_hash, fallback.provider, 0, False, run_id=run_id)
     return SearchResponse(
         status="manual_required",
         provider=fallback.provider,
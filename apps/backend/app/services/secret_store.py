@@ -7,7 +7,7 @@ import ctypes
 from ctypes import wintypes
 import uuid
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 
 
 class DATA_BLOB(ctypes.Structure):
@@ -80,7 +80,7 @@ def set_secret(key_name: str, value: str) -> None:
 
 
 def get_secret(key_name: str) -> str | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute("SELECT encrypted_value FROM secrets WHERE key_name = ?", (key_name,)).fetchone()
     if not row:
         return None
@@ -93,14 +93,14 @@ def delete_secret(key_name: str) -> None:
 
 
 def has_secret(key_name: str) -> bool:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute("SELECT 1 FROM secrets WHERE key_name = ?", (key_name,)).fetchone()
     return bool(row)
 
 
 def secret_is_encrypted(key_name: str, plain: str) -> bool:
     """Test helper: ensure at-rest value differs from plain text."""
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute("SELECT encrypted_value FROM secrets WHERE key_name = ?", (key_name,)).fetchone()
     if not row:
         return False
@@ -6,6 +6,7 @@ import json
 import uuid
 
 from app.db.sqlite import connection
+from app.services.settings_cache import bump_settings_generation
 from app.services.settings_service import DEFAULTS
 
 
@@ -126,3 +127,4 @@ def seed_defaults() -> None:
                     "INSERT INTO workflows (id, name, description, definition_json) VALUES (?, ?, ?, ?)",
                     (str(uuid.uuid4()), name, description, json.dumps(definition)),
                 )
+    bump_settings_generation()
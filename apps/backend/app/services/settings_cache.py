@@ -0,0 +1,42 @@
+"""Generation-keyed snapshot cache for settings, profile and workspace reads."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_generation = 0
+_entries: dict[str, tuple[int, Any]] = {}
+_lock = threading.Lock()
+
+
+def settings_generation() -> int:
+    return _generation
+
+
+def bump_settings_generation() -> None:
+    """Invalidate every snapshot; call after the mutating transaction commits."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+
+
+def cached_snapshot(key: str, compute: Callable[[], T]) -> T:
+    """Return the snapshot for ``key``, recomputing it once per generation.
+
+    Snapshots are shared between callers and must be treated as read-only.
+    """
+    generation = _generation
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    value = compute()
+    with _lock:
+        # A write that landed while computing bumped the generation; don't cache stale data.
+        if generation == _generation:
+            _entries[key] = (generation, value)
+    return value
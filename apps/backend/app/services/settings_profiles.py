@@ -6,7 +6,8 @@ import json
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
+from app.services.settings_cache import bump_settings_generation, cached_snapshot
 from app.services.settings_registry import enforce_safe_defaults, registry_defaults, validate_payload
 
 
@@ -24,7 +25,7 @@ def _normalize_payload(payload: dict[str, Any]) -> dict[str, Any]:
 
 
 def list_profiles() -> list[dict]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT id, name, version, created_at, updated_at, is_default, is_active FROM profiles ORDER BY updated_at DESC"
         ).fetchall()
@@ -32,7 +33,7 @@ def list_profiles() -> list[dict]:
 
 
 def get_profile(profile_id: str) -> dict | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute(
             "SELECT id, name, version, created_at, updated_at, is_default, is_active FROM profiles WHERE id = ?",
             (profile_id,),
@@ -47,14 +48,18 @@ def get_profile(profile_id: str) -> dict | None:
     return {**dict(row), "payload": payload}
 
 
-def get_active_profile() -> dict | None:
-    with connection() as conn:
+def _load_active_profile() -> dict | None:
+    with read_connection() as conn:
         row = conn.execute("SELECT id FROM profiles WHERE is_active = 1").fetchone()
     if not row:
         return None
     return get_profile(row["id"])
 
 
+def get_active_profile() -> dict | None:
+    return cached_snapshot("active_profile", _load_active_profile)
+
+
 def _snapshot_profile(profile_id: str, payload: dict[str, Any] | None = None) -> None:
     profile = get_profile(profile_id)
     if not profile:
@@ -88,6 +93,7 @@ def create_profile(name: str, payload: dict[str, Any] | None = None) -> dict:
                 (profile_id, key, json.dumps(value)),
             )
     _snapshot_profile(profile_id, normalized)
+    bump_settings_generation()
     return get_profile(profile_id)  # type: ignore
 
 
@@ -113,6 +119,7 @@ def update_profile(profile_id: str, payload: dict[str, Any], name: str | None =
                 "INSERT OR REPLACE INTO profile_settings (profile_id, key, value_json) VALUES (?, ?, ?)",
                 (profile_id, key, json.dumps(value)),
             )
+    bump_settings_generation()
     return get_profile(profile_id)  # type: ignore
 
 
@@ -128,6 +135,7 @@ def delete_profile(profile_id: str) -> None:
         conn.execute("DELETE FROM profile_history WHERE profile_id = ?", (profile_id,))
         conn.execute("DELETE FROM profile_settings WHERE profile_id = ?", (profile_id,))
         conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+    bump_settings_generation()
 
 
 def export_profile(profile_id: str) -> dict:
@@ -169,11 +177,12 @@ def activate_profile(profile_id: str) -> dict:
                 """,
                 (key, json.dumps(value)),
             )
+    bump_settings_generation()
     return get_profile(profile_id)  # type: ignore
 
 
 def rollback_profile(profile_id: str) -> dict:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute(
             "SELECT snapshot_json FROM profile_history WHERE profile_id = ? ORDER BY created_at DESC LIMIT 1",
             (profile_id,),
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Any, Literal
 
 from pydantic import BaseModel, field_validator
@@ -38,8 +40,10 @@ class SettingsPayload(BaseModel):
     local_browser_engine: str = "chrome"
     max_tool_calls_per_message: int = 3
     max_tool_calls_per_minute: int = 15
+    rate_limit_shared_state: bool = False
     max_files_read_per_run: int = 20
     max_bytes_read_per_run: int = 5_000_000
+    max_grep_matches_per_run: int = 500
     max_runtime_seconds: int = 120
     write_preview_default: bool = True
     quarantine_mode: bool = True
@@ -254,6 +258,15 @@ REGISTRY: list[SettingDef] = [
         danger="advanced",
         description="Rate limit for tool calls per minute.",
     ),
+    SettingDef(
+        key="rate_limit_shared_state",
+        type="bool",
+        default=False,
+        category="Tools",
+        scope="global",
+        danger="advanced",
+        description="Keep rate limit counters in the database so multiple backend workers share them.",
+    ),
     SettingDef(
         key="max_files_read_per_run",
         type="int",
@@ -272,6 +285,15 @@ REGISTRY: list[SettingDef] = [
         danger="advanced",
         description="Maximum total bytes read per run.",
     ),
+    SettingDef(
+        key="max_grep_matches_per_run",
+        type="int",
+        default=500,
+        category="Tools",
+        scope="profile",
+        danger="advanced",
+        description="Maximum total grep matches returned per run.",
+    ),
     SettingDef(
         key="max_runtime_seconds",
         type="int",
@@ -625,13 +647,123 @@ def registry_by_key() -> dict[str, SettingDef]:
     return {item.key: item for item in REGISTRY}
 
 
-def validate_payload(payload: dict[str, Any]) -> dict[str, Any]:
-    """Validate and coerce settings via pydantic model."""
-    model = SettingsPayload(**payload)
-    return model.model_dump()
+_TRUE_STRINGS = frozenset({"1", "on", "t", "true", "y", "yes"})
+_FALSE_STRINGS = frozenset({"0", "off", "f", "false", "n", "no"})
+
+Coercer = Callable[[Any], Any]
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    raise ValueError("Input should be a valid boolean")
+
+
+def _coerce_int(value: Any) -> int:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            number = float(value.strip()) if "." in value else int(value.strip())
+        except ValueError:
+            pass
+        else:
+            if isinstance(number, int) or number.is_integer():
+                return int(number)
+    raise ValueError("Input should be a valid integer")
+
+
+def _coerce_float(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("Input should be a valid number")
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError("Input should be a valid number") from None
+
+
+def _coerce_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise ValueError("Input should be a valid string")
+
+
+def _enum_coercer(key: str, allowed: frozenset[str]) -> Coercer:
+    def coerce(value: Any) -> str:
+        if isinstance(value, str) and value in allowed:
+            return value
+        raise ValueError(f"Invalid {key.replace('_', ' ')}")
+
+    return coerce
+
+
+_TYPE_COERCERS: dict[str, Coercer] = {
+    "bool": _coerce_bool,
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "string": _coerce_string,
+}
+
+
+def compile_validators(definitions: list[SettingDef]) -> dict[str, Coercer]:
+    """Build one coercer per key; mirrors the lax coercion of ``SettingsPayload``."""
+    validators: dict[str, Coercer] = {}
+    for item in definitions:
+        if item.type == "enum" and item.enum_values:
+            validators[item.key] = _enum_coercer(item.key, frozenset(item.enum_values))
+        elif item.type == "enum":
+            validators[item.key] = _coerce_string
+        else:
+            validators[item.key] = _TYPE_COERCERS[item.type]
+    return validators
+
+
+_VALIDATORS = compile_validators(REGISTRY)
+DEFAULT_SETTINGS: Mapping[str, Any] = MappingProxyType(
+    {item.key: _VALIDATORS[item.key](item.default) for item in REGISTRY}
+)
+
+
+def validate_changes(base: Mapping[str, Any], changes: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Apply ``changes`` on top of an already-validated ``base`` and freeze the result.
+
+    Only keys whose value differs from ``base`` are coerced; unknown keys are
+    dropped, as the pydantic model did.
+    """
+    # dict(mappingproxy) goes through the generic Mapping path; copy() is ~10x faster.
+    merged = base.copy() if isinstance(base, (dict, MappingProxyType)) else dict(base)
+    for key, value in changes.items():
+        coerce = _VALIDATORS.get(key)
+        if coerce is None:
+            continue
+        current = merged.get(key)
+        if current is value or (type(current) is type(value) and current == value):
+            continue
+        try:
+            merged[key] = coerce(value)
+        except ValueError as exc:
+            raise ValueError(f"{key}: {exc}") from None
+    return MappingProxyType(merged)
+
+
+def validate_payload(payload: Mapping[str, Any]) -> dict[str, Any]:
+    """Validate and coerce settings, filling registry defaults for missing keys."""
+    return dict(validate_changes(DEFAULT_SETTINGS, payload))
 
 
-def enforce_safe_defaults(payload: dict[str, Any]) -> dict[str, Any]:
+def enforce_safe_defaults(payload: Mapping[str, Any]) -> dict[str, Any]:
     payload = dict(payload)
     payload["safe_mode_default"] = True if payload.get("safe_mode_default") is not False else False
     payload["privacy_mode"] = True if payload.get("privacy_mode") is not False else False
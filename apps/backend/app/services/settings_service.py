@@ -3,35 +3,50 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 from app.models.schemas import SettingsResponse, SettingsUpdateRequest
 from app.services.settings_registry import (
+    DEFAULT_SETTINGS,
     enforce_safe_defaults,
     registry_defaults,
-    validate_payload,
+    validate_changes,
 )
+from app.services.settings_cache import bump_settings_generation, cached_snapshot
 from app.services.workspaces import get_active_workspace
 
 DEFAULTS = registry_defaults()
 
 
-def get_settings() -> SettingsResponse:
-    merged = dict(DEFAULTS)
-    with connection() as conn:
+def _load_settings_values() -> Mapping[str, Any]:
+    with read_connection() as conn:
         rows = conn.execute("SELECT key, value_json FROM app_settings").fetchall()
-    for row in rows:
-        merged[row["key"]] = json.loads(row["value_json"])
-    merged = enforce_safe_defaults(validate_payload(merged))
-    return SettingsResponse(**merged)
+    stored = {row["key"]: json.loads(row["value_json"]) for row in rows}
+    return MappingProxyType(enforce_safe_defaults(validate_changes(DEFAULT_SETTINGS, stored)))
+
+
+def get_settings_values() -> Mapping[str, Any]:
+    """Validated, read-only app settings covering every registry key."""
+    return cached_snapshot("settings_values", _load_settings_values)
+
+
+def _load_settings() -> SettingsResponse:
+    # Values are already validated against the registry; skip pydantic revalidation.
+    return SettingsResponse.model_construct(**get_settings_values())
+
+
+def get_settings() -> SettingsResponse:
+    return cached_snapshot("settings", _load_settings)
 
 
 def update_settings(payload: SettingsUpdateRequest) -> SettingsResponse:
     updates = payload.model_dump(exclude_none=True)
     if not updates:
         return get_settings()
-    updates = enforce_safe_defaults(validate_payload({**get_settings().model_dump(), **updates}))
+    updates = enforce_safe_defaults(validate_changes(get_settings_values(), updates))
     with connection() as conn:
         for key, value in updates.items():
             conn.execute(
@@ -42,21 +57,22 @@ def update_settings(payload: SettingsUpdateRequest) -> SettingsResponse:
                 """,
                 (key, json.dumps(value)),
             )
+    bump_settings_generation()
     return get_settings()
 
 
 def get_setting(key: str, default: Any) -> Any:
-    settings = get_settings().model_dump()
-    return settings.get(key, default)
+    return get_settings_values().get(key, default)
 
 
-def get_effective_settings() -> SettingsResponse:
-    """Merge app settings with active workspace overrides."""
-    base = get_settings().model_dump()
+def _load_effective_settings() -> SettingsResponse:
+    values = get_settings_values()
     workspace = get_active_workspace()
     if workspace and workspace.get("settings"):
-        merged = dict(base)
-        merged.update(workspace["settings"])
-        merged = enforce_safe_defaults(validate_payload(merged))
-        return SettingsResponse(**merged)
-    return SettingsResponse(**base)
+        values = enforce_safe_defaults(validate_changes(values, workspace["settings"]))
+    return SettingsResponse.model_construct(**values)
+
+
+def get_effective_settings() -> SettingsResponse:
+    """Merge app settings with active workspace overrides (cached until the next settings write)."""
+    return cached_snapshot("effective_settings", _load_effective_settings)
@@ -6,6 +6,7 @@ import asyncio
 import json
 from typing import Any
 
+from app.db.async_db import run_db
 from app.models.schemas import ChatRequest, ThinkBoxMessageRequest
 from app.services.agent_runtime import stream_chat
 from app.services.model_sources import list_model_options
@@ -52,7 +53,7 @@ async def _run_thinkbox(req: ThinkBoxMessageRequest, session_id: str, run_id_hin
 
     prompt = _mode_prompt(req.mode, req.text, req.context)
     if req.mode == "research":
-        settings = get_effective_settings()
+        settings = await run_db(get_effective_settings)
         try:
             search = await search_with_router(
                 query=req.text,
@@ -0,0 +1,179 @@
+"""Result cache for tools whose capabilities allow it, validated by stat fingerprints.
+
+A tool is cacheable when its ``PluginCapabilities`` say it is pure, or
+read-only with ``cacheable_by`` path arguments. Entries are keyed on the tool
+name and its arguments, with those paths made absolute, and carry the
+``(size, mtime_ns, inode)`` of every path they name, taken before the tool
+ran. A directory argument is covered by every directory its walk visits and
+every file in them, so listings see renames and in-place edits alike.
+Pure tools depend on nothing else, so their fingerprint is empty. A lookup
+re-stats those paths and only returns the stored result if nothing changed.
+The runner consults the cache after all policy, permission, scope and limit
+checks, so a hit never skips them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from app.plugins.base import NO_CAPABILITIES, PluginCapabilities, plugin_capabilities
+from app.plugins.registry import PLUGIN_REGISTRY
+from app.services.file_walker import FileWalker
+
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+MAX_CACHE_ENTRIES = 1024
+# Listings are validated by every directory and file the walk visits; bigger trees are not cached.
+MAX_FINGERPRINT_ENTRIES = 4096
+
+Fingerprint = tuple[tuple[str, tuple[int, int, int] | None], ...]
+
+
+def _stat_key(path: str) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _tree_keys(path: str, max_depth: Any) -> list[tuple[str, tuple[int, int, int] | None]] | None:
+    # Walked like file_list walks it, so the ignore files that decide pruning count too.
+    walker = FileWalker(path, max_depth=int(max_depth) if max_depth is not None else None)
+    taken: list[tuple[str, tuple[int, int, int] | None]] = []
+    for item, st in walker.tree_stats():
+        if len(taken) >= MAX_FINGERPRINT_ENTRIES:
+            return None
+        taken.append((os.path.normcase(item), (st.st_size, st.st_mtime_ns, st.st_ino) if st else None))
+    return taken
+
+
+def _capabilities(tool: str, capabilities: PluginCapabilities | None) -> PluginCapabilities:
+    if capabilities is not None:
+        return capabilities
+    plugin = PLUGIN_REGISTRY.get(tool)
+    return plugin_capabilities(plugin) if plugin is not None else NO_CAPABILITIES
+
+
+def _absolute(path: str, cwd: str) -> str:
+    return os.path.normcase(os.path.abspath(os.path.join(cwd, path)))
+
+
+def _path_values(value: Any) -> list[str] | None:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    return None
+
+
+def _fingerprint_paths(caps: PluginCapabilities, args: dict[str, Any], cwd: str) -> Fingerprint | None:
+    taken: list[tuple[str, tuple[int, int, int] | None]] = []
+    for name in caps.cacheable_by:
+        values = _path_values(args.get(name))
+        if values is None:
+            return None
+        for value in values:
+            path = _absolute(value, cwd)
+            if not os.path.isdir(path):
+                taken.append((path, _stat_key(path)))
+                continue
+            tree = _tree_keys(path, args.get("max_depth"))
+            if tree is None:
+                return None
+            taken.extend(tree)
+    return tuple(taken)
+
+
+def cache_key(tool: str, args: dict[str, Any], cwd: str, capabilities: PluginCapabilities | None = None) -> str:
+    normalized = dict(args)
+    for name in _capabilities(tool, capabilities).cacheable_by:
+        value = args.get(name)
+        if isinstance(value, str):
+            normalized[name] = _absolute(value, cwd)
+        elif isinstance(value, list):
+            normalized[name] = [_absolute(item, cwd) if isinstance(item, str) else item for item in value]
+    return tool + ":" + json.dumps(normalized, sort_keys=True, default=str)
+
+
+def fingerprint(tool: str, args: dict[str, Any], cwd: str, capabilities: PluginCapabilities | None = None) -> Fingerprint | None:
+    """Stat every path the call depends on; ``None`` means the call is not cacheable."""
+    caps = _capabilities(tool, capabilities)
+    if not caps.cacheable:
+        return None
+    return _fingerprint_paths(caps, args, cwd)
+
+
+@dataclass
+class _Entry:
+    fingerprint: Fingerprint
+    encoded: str
+    result_hash: str
+
+
+class ToolResultCache:
+    """LRU bounded by entry count and by the encoded size of stored results."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES, max_entries: int = MAX_CACHE_ENTRIES) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, current: Fingerprint) -> tuple[dict[str, Any], str] | None:
+        """Return ``(result, result_hash)`` when the stored fingerprint still matches."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != current:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Decode outside the lock; every hit gets its own copy of the result.
+        return json.loads(entry.encoded), entry.result_hash
+
+    def store(self, key: str, taken: Fingerprint, result: dict[str, Any], result_hash: str) -> None:
+        encoded = json.dumps(result)
+        if len(encoded) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(taken, encoded, result_hash)
+            self._bytes += len(encoded)
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.encoded)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_CACHE = ToolResultCache()
+
+
+def get_tool_cache() -> ToolResultCache:
+    return _CACHE
+
+
+__all__ = ["ToolResultCache", "cache_key", "fingerprint", "get_tool_cache"]
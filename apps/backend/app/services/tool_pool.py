@@ -0,0 +1,280 @@
+"""Pool of long-lived tool worker processes.
+
+Each worker is a separate interpreter running ``tool_worker --serve`` with the
+tool runner's safe environment. Requests and responses are length-prefixed
+frames (see ``tool_protocol``); each response is read under the request's
+``output_limit``, so an oversized reply fails before it is buffered. A worker
+is recycled after ``max_calls`` requests, and killed on timeout, crash,
+protocol error or output overflow. A request's ``max_concurrency`` caps how
+many calls of its tool the pool runs at once, on top of the pool's size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import queue
+import subprocess
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from app.services.tool_protocol import MAX_FRAME_BYTES, FrameError, OutputLimitExceeded, read_response, write_frame
+
+POOL_SIZE = 2
+MAX_CALLS_PER_WORKER = 200
+SHUTDOWN_TIMEOUT_SECONDS = 2.0
+ASYNC_CALL_THREADS = 8
+# Floor for the read cap so tiny output limits still admit the error reply.
+MIN_RESPONSE_BYTES = 4096
+
+# Blocking waits for async callers; beyond POOL_SIZE they queue on the pool's slots.
+_CALL_EXECUTOR = ThreadPoolExecutor(max_workers=ASYNC_CALL_THREADS, thread_name_prefix="neroai-tool-call")
+
+
+class WorkerTimeout(RuntimeError):
+    pass
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class WorkerCancelled(RuntimeError):
+    pass
+
+
+class CallHandle:
+    """Links an in-flight call to its worker so another thread can cancel it."""
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._worker: ToolWorker | None = None
+        self._lock = threading.Lock()
+
+    def attach(self, worker: ToolWorker) -> bool:
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._worker = worker
+            return True
+
+    def cancel(self) -> None:
+        """Kill the worker running this call (or prevent it from starting)."""
+        with self._lock:
+            self.cancelled = True
+            worker = self._worker
+        if worker is not None:
+            worker.kill()
+
+
+class ToolWorker:
+    """One warm worker process; responses are read on a background thread."""
+
+    def __init__(self, command: list[str], env: dict[str, str], cwd: Path) -> None:
+        cwd.mkdir(parents=True, exist_ok=True)
+        self.proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=str(cwd),
+            env=env,
+        )
+        self.calls = 0
+        self.generation = 0
+        # One read cap per request; ``None`` stops the reader.
+        self._limits: queue.Queue[int | None] = queue.Queue()
+        self._responses: queue.Queue[dict[str, Any] | Exception | None] = queue.Queue()
+        self._reader = threading.Thread(target=self._read_loop, name=f"neroai-tool-worker-{self.proc.pid}", daemon=True)
+        self._reader.start()
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def _read_loop(self) -> None:
+        assert self.proc.stdout is not None
+        while True:
+            max_bytes = self._limits.get()
+            if max_bytes is None:
+                return
+            try:
+                response = read_response(self.proc.stdout, max_bytes)
+            except (FrameError, ValueError, OSError) as exc:
+                self._responses.put(exc)
+                return
+            self._responses.put(response)
+            if response is None:
+                return
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def call(self, request: dict[str, Any], timeout: float) -> dict[str, Any]:
+        assert self.proc.stdin is not None
+        limit = request.get("output_limit")
+        self._limits.put(max(int(limit), MIN_RESPONSE_BYTES) if limit else MAX_FRAME_BYTES)
+        try:
+            write_frame(self.proc.stdin, request)
+        except OSError as exc:
+            raise WorkerCrashed("Tool worker exited unexpectedly") from exc
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty as exc:
+            raise WorkerTimeout(f"Tool timed out after {timeout}s") from exc
+        if response is None:
+            raise WorkerCrashed(f"Tool worker exited unexpectedly (code {self.proc.poll()})")
+        if isinstance(response, OutputLimitExceeded):
+            raise response
+        if isinstance(response, Exception):
+            raise WorkerCrashed(f"Tool worker protocol error: {response}")
+        self.calls += 1
+        return response
+
+    def close(self) -> None:
+        """Ask the worker to exit by closing stdin; kill it if it lingers."""
+        self._limits.put(None)
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+            self.proc.wait(timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        except Exception:
+            self.kill()
+
+    def kill(self) -> None:
+        self._limits.put(None)
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+
+class WorkerPool:
+    """Bounded set of warm workers; at most ``size`` calls run concurrently."""
+
+    def __init__(
+        self,
+        spawn: Callable[[], ToolWorker],
+        size: int = POOL_SIZE,
+        max_calls: int = MAX_CALLS_PER_WORKER,
+    ) -> None:
+        self._spawn = spawn
+        self.size = size
+        self.max_calls = max_calls
+        self._idle: list[ToolWorker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._gates: dict[str, tuple[int, threading.BoundedSemaphore]] = {}
+        self.generation = 0
+
+    def _new_worker(self) -> ToolWorker:
+        worker = self._spawn()
+        worker.generation = self.generation
+        return worker
+
+    def _checkout(self) -> ToolWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.kill()
+        return self._new_worker()
+
+    def _checkin(self, worker: ToolWorker) -> None:
+        if worker.calls >= self.max_calls or worker.generation != self.generation or not worker.alive():
+            worker.close()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def _gate(self, request: dict[str, Any]) -> threading.BoundedSemaphore | None:
+        limit = request.get("max_concurrency")
+        if not limit:
+            return None
+        tool = str(request.get("tool"))
+        with self._lock:
+            current = self._gates.get(tool)
+            # A changed limit starts a new gate; calls holding the old one release it.
+            if current is None or current[0] != limit:
+                current = self._gates[tool] = (int(limit), threading.BoundedSemaphore(int(limit)))
+            return current[1]
+
+    def call(self, request: dict[str, Any], timeout: float, handle: CallHandle | None = None) -> dict[str, Any]:
+        gate = self._gate(request)
+        if gate is not None and not gate.acquire(timeout=timeout):
+            raise WorkerTimeout(f"Tool timed out after {timeout}s waiting for a {request.get('tool')} slot")
+        try:
+            return self._call(request, timeout, handle)
+        finally:
+            if gate is not None:
+                gate.release()
+
+    def _call(self, request: dict[str, Any], timeout: float, handle: CallHandle | None) -> dict[str, Any]:
+        if not self._slots.acquire(timeout=timeout):
+            raise WorkerTimeout(f"Tool timed out after {timeout}s waiting for a worker")
+        try:
+            worker = self._checkout()
+            if handle is not None and not handle.attach(worker):
+                self._checkin(worker)
+                raise WorkerCancelled("Tool call cancelled")
+            try:
+                response = worker.call(request, timeout)
+            except Exception:
+                worker.kill()
+                if handle is not None and handle.cancelled:
+                    raise WorkerCancelled("Tool call cancelled") from None
+                raise
+            self._checkin(worker)
+            return response
+        finally:
+            self._slots.release()
+
+    async def call_async(self, request: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """Await a call without blocking the loop; cancelling the awaiter kills its worker."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Non-asyncio loops (e.g. trio under the anyio test plugin) run inline.
+            return self.call(request, timeout)
+        handle = CallHandle()
+        future = loop.run_in_executor(_CALL_EXECUTOR, functools.partial(self.call, request, timeout, handle))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    def warm(self, count: int = 1) -> None:
+        """Start up to ``count`` idle workers ahead of the first call."""
+        with self._lock:
+            missing = min(count, self.size) - len(self._idle)
+        for _ in range(max(0, missing)):
+            worker = self._new_worker()
+            with self._lock:
+                self._idle.append(worker)
+
+    def idle_pids(self) -> list[int]:
+        with self._lock:
+            return [worker.pid for worker in self._idle]
+
+    def recycle(self) -> None:
+        """Retire every current worker: idle ones now, busy ones when their call returns."""
+        with self._lock:
+            self.generation += 1
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+__all__ = ["CallHandle", "ToolWorker", "WorkerCancelled", "WorkerCrashed", "WorkerPool", "WorkerTimeout"]
@@ -0,0 +1,134 @@
+"""Length-prefixed frames exchanged with pooled tool workers.
+
+A frame is the body length in ASCII digits, a newline, the body and a
+trailing newline. A request is one JSON frame. A response is one JSON header
+frame followed by raw byte frames ("blobs"), one per large string pulled out
+of the result, so file contents travel as UTF-8 bytes instead of escaped JSON
+text. Kept free of app imports so workers load it cheaply.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, BinaryIO
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+BLOB_MIN_BYTES = 4096
+BLOB_KEY = "$blob"
+
+
+class FrameError(RuntimeError):
+    pass
+
+
+class OutputLimitExceeded(FrameError):
+    pass
+
+
+def _frame(body: bytes) -> bytes:
+    return b"%d\n%s\n" % (len(body), body)
+
+
+def encode_frame(payload: dict[str, Any]) -> bytes:
+    return _frame(json.dumps(payload).encode("utf-8"))
+
+
+def write_frame(stream: BinaryIO, payload: dict[str, Any]) -> None:
+    stream.write(encode_frame(payload))
+    stream.flush()
+
+
+def _read_body(stream: BinaryIO, max_bytes: int) -> bytes | None:
+    header = stream.readline(32)
+    if not header:
+        return None
+    try:
+        length = int(header)
+    except ValueError as exc:
+        raise FrameError(f"Invalid frame header: {header[:32]!r}") from exc
+    if length < 0:
+        raise FrameError(f"Invalid frame length {length}")
+    if length > max_bytes:
+        raise OutputLimitExceeded(f"Tool output exceeded {max_bytes} bytes")
+    body = stream.read(length)
+    if len(body) != length or stream.read(1) != b"\n":
+        raise FrameError("Truncated frame")
+    return body
+
+
+def read_frame(stream: BinaryIO, max_bytes: int = MAX_FRAME_BYTES) -> dict[str, Any] | None:
+    """Read one JSON frame; ``None`` means the peer closed the stream."""
+    body = _read_body(stream, max_bytes)
+    return None if body is None else json.loads(body)
+
+
+def result_digest(result: Any) -> str:
+    return hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def pack_blobs(value: Any, blobs: list[bytes], min_bytes: int = BLOB_MIN_BYTES) -> Any:
+    """Replace large strings with ``{"$blob": index}`` and collect their UTF-8 bytes."""
+    if isinstance(value, str):
+        if len(value) * 4 < min_bytes:
+            return value
+        encoded = value.encode("utf-8", errors="surrogatepass")
+        if len(encoded) < min_bytes:
+            return value
+        blobs.append(encoded)
+        return {BLOB_KEY: len(blobs) - 1}
+    if isinstance(value, dict):
+        return {key: pack_blobs(item, blobs, min_bytes) for key, item in value.items()}
+    if isinstance(value, list):
+        return [pack_blobs(item, blobs, min_bytes) for item in value]
+    return value
+
+
+def unpack_blobs(value: Any, blobs: list[bytes]) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and BLOB_KEY in value:
+            return blobs[value[BLOB_KEY]].decode("utf-8", errors="surrogatepass")
+        return {key: unpack_blobs(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [unpack_blobs(item, blobs) for item in value]
+    return value
+
+
+def encode_response(response: dict[str, Any]) -> bytes:
+    """Header frame (with blob sizes) plus one raw frame per blob."""
+    blobs: list[bytes] = []
+    header = pack_blobs(response, blobs)
+    header["blobs"] = [len(blob) for blob in blobs]
+    return encode_frame(header) + b"".join(_frame(blob) for blob in blobs)
+
+
+def read_response(stream: BinaryIO, max_bytes: int = MAX_FRAME_BYTES) -> dict[str, Any] | None:
+    """Read a response, failing as soon as its total size passes ``max_bytes``."""
+    body = _read_body(stream, max_bytes)
+    if body is None:
+        return None
+    header = json.loads(body)
+    sizes = header.pop("blobs", [])
+    if len(body) + sum(sizes) > max_bytes:
+        raise OutputLimitExceeded(f"Tool output exceeded {max_bytes} bytes")
+    blobs: list[bytes] = []
+    for size in sizes:
+        blob = _read_body(stream, size)
+        if blob is None or len(blob) != size:
+            raise FrameError("Truncated blob frame")
+        blobs.append(blob)
+    return unpack_blobs(header, blobs) if blobs else header
+
+
+__all__ = [
+    "BLOB_MIN_BYTES",
+    "FrameError",
+    "MAX_FRAME_BYTES",
+    "OutputLimitExceeded",
+    "encode_frame",
+    "encode_response",
+    "read_frame",
+    "read_response",
+    "result_digest",
+    "write_frame",
+]
@@ -2,44 +2,44 @@
 
 from __future__ import annotations
 
-import hashlib
-import json
 import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-import subprocess
 import sys
+import threading
 from typing import Any
 
+from app.db.async_db import run_db
 from app.db.sqlite import DATA_DIR
-from app.plugins.registry import PLUGIN_REGISTRY
+from app.plugins.base import PluginCapabilities, plugin_capabilities
+from app.plugins.loader import write_index
+from app.plugins.registry import PLUGIN_REGISTRY, plugin_index, refresh_local_plugins
 from app.services.audit import log_event
 from app.services.path_security import path_within_scopes
 from app.services.permission_broker import list_grants
 from app.services.limits import RunLimiter, enforce_rate_limit
 from app.services.policy_guard import assert_allowed, is_tool_allowed_in_mode, is_tool_allowed_in_workspace, policy_allows_action
+from app.services.quarantine import quarantine_paths
 from app.services.settings_service import get_effective_settings
+from app.services.tool_cache import Fingerprint, cache_key, fingerprint, get_tool_cache
+from app.services.tool_pool import POOL_SIZE, ToolWorker, WorkerCancelled, WorkerCrashed, WorkerPool, WorkerTimeout
+from app.services.tool_protocol import result_digest
 from app.services.workspaces import get_active_workspace
 
 DEFAULT_TIMEOUT_SECONDS = 30
 DEFAULT_OUTPUT_LIMIT_BYTES = 262_144
 TOOL_RUN_DIR = DATA_DIR / "tool_runs"
-QUARANTINE_DIR = DATA_DIR / "quarantine"
+PLUGIN_INDEX_PATH = TOOL_RUN_DIR / "plugin_index.json"
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+# High-cost and streaming tools get their own workers so they never hold up quick reads.
+POOL_ROUTES = {"default": POOL_SIZE, "heavy": 2}
 
-
-def _apply_quarantine(paths: list[str], session_id: str) -> list[str]:
-    QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
-    session_dir = QUARANTINE_DIR / session_id
-    session_dir.mkdir(parents=True, exist_ok=True)
-    resolved: list[str] = []
-    for item in paths:
-        src = Path(item).resolve()
-        dest = session_dir / f"{src.name}"
-        try:
-            dest.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
-            resolved.append(str(dest))
-        except Exception:
-            resolved.append(item)
-    return resolved
+_pools: dict[str, WorkerPool] = {}
+_pool_lock = threading.Lock()
+_index_lock = threading.Lock()
+_index_written: dict[str, Any] | None = None
 
 
 def get_tool_runner_program_path() -> str:
@@ -65,6 +65,60 @@ def _safe_env() -> dict[str, str]:
     return keep
 
 
+def _ensure_plugin_index() -> bool:
+    """Workers import plugins from this index instead of loading the registry; rewritten when the registry changes."""
+    global _index_written
+    index = plugin_index()
+    with _index_lock:
+        if index == _index_written:
+            return False
+        write_index(PLUGIN_INDEX_PATH, index)
+        _index_written = index
+        return True
+
+
+def _spawn_worker() -> ToolWorker:
+    _ensure_plugin_index()
+    env = _safe_env()
+    # Workers run from the tool run dir, so the backend package must be importable explicitly.
+    env["PYTHONPATH"] = str(BACKEND_ROOT)
+    return ToolWorker(
+        [get_tool_runner_program_path(), "-m", "app.services.tool_worker", "--serve", "--index", str(PLUGIN_INDEX_PATH)],
+        env=env,
+        cwd=TOOL_RUN_DIR,
+    )
+
+
+def get_tool_pool(route: str = "default") -> WorkerPool:
+    pool = _pools.get(route)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(route)
+            if pool is None:
+                pool = _pools[route] = WorkerPool(_spawn_worker, size=POOL_ROUTES[route])
+    # Local plugins were added or removed: running workers hold the old index.
+    if _ensure_plugin_index():
+        for each in list(_pools.values()):
+            each.recycle()
+    return pool
+
+
+def tool_route(capabilities: PluginCapabilities) -> str:
+    return "heavy" if capabilities.expected_cost == "high" or capabilities.streams_output else "default"
+
+
+def warm_tool_pool() -> None:
+    get_tool_pool().warm()
+
+
+def shutdown_tool_pool() -> None:
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
 def _validate_path_args(tool: str, args: dict[str, Any], session_id: str) -> None:
     grants = {g.permission: g.allowed_paths for g in list_grants(session_id)}
     read_scopes = grants.get("filesystem.read", [])
@@ -76,7 +130,7 @@ def _validate_path_args(tool: str, args: dict[str, Any], session_id: str) -> Non
     if "paths" in args and isinstance(args["paths"], list):
         paths.extend([p for p in args["paths"] if isinstance(p, str)])
 
-    if tool in {"file_read", "file_list", "file_read_batch"}:
+    if tool in {"file_read", "file_list", "file_read_batch", "file_grep"}:
         for item in paths:
             ok, reason = path_within_scopes(item, read_scopes)
             if not ok:
@@ -88,16 +142,78 @@ def _validate_path_args(tool: str, args: dict[str, Any], session_id: str) -> Non
                 raise PermissionError(f"permission_required:filesystem.write:{reason}")
 
 
-def run_tool(
+def _bound_batch_bytes(args: dict[str, Any], limiter: RunLimiter) -> dict[str, Any]:
+    """Cap a batch at the run's remaining read budget when it could otherwise exceed it."""
+    remaining = max(0, limiter.max_bytes_read_per_run - limiter.bytes_read)
+    paths = args.get("paths") if isinstance(args.get("paths"), list) else []
+    # UTF-8 needs at most 4 bytes per char; leaving the arg out when it cannot bind keeps cache keys stable.
+    worst_case = len(paths) * int(args.get("max_chars_per_file", 5000)) * 4
+    if worst_case <= remaining:
+        return args
+    current = args.get("max_total_bytes")
+    bounded = dict(args)
+    bounded["max_total_bytes"] = remaining if current is None else min(int(current), remaining)
+    return bounded
+
+
+def _bound_grep(args: dict[str, Any], limiter: RunLimiter) -> dict[str, Any]:
+    """Scan at most the run's remaining read bytes and return at most its remaining matches."""
+    remaining_bytes = max(0, limiter.max_bytes_read_per_run - limiter.bytes_read)
+    remaining_matches = max(0, limiter.max_grep_matches_per_run - limiter.grep_matches)
+    if remaining_matches == 0:
+        raise RuntimeError("Grep match limit exceeded")
+    bounded = dict(args)
+    current = args.get("max_total_bytes")
+    bounded["max_total_bytes"] = remaining_bytes if current is None else min(int(current), remaining_bytes)
+    bounded["max_matches"] = min(int(args.get("max_matches", 100)), remaining_matches)
+    return bounded
+
+
+@dataclass
+class _PreparedCall:
+    tool: str
+    args: dict[str, Any]
+    session_id: str
+    request: dict[str, Any]
+    timeout_seconds: int
+    output_limit: int
+    verbose_logging: bool
+    limiter: RunLimiter | None
+    run_id: str | None
+    route: str = "default"
+    cache_key: str | None = None
+    fingerprint: Fingerprint | None = None
+    cached: dict[str, Any] | None = None
+
+
+def _probe_cache(
+    tool: str, args: dict[str, Any], cwd: str, capabilities: PluginCapabilities
+) -> tuple[str | None, Fingerprint | None, dict[str, Any] | None]:
+    """Look up a cacheable call; returns its key, fingerprint and a worker-shaped reply on a hit."""
+    taken = fingerprint(tool, args, cwd, capabilities)
+    if taken is None:
+        return None, None, None
+    key = cache_key(tool, args, cwd, capabilities)
+    hit = get_tool_cache().lookup(key, taken)
+    if hit is None:
+        return key, taken, None
+    result, digest = hit
+    return key, taken, {"ok": True, "result": result, "result_hash": digest}
+
+
+def _prepare_tool_call(
     tool: str,
     args: dict[str, Any],
     session_id: str,
-    safe_mode: bool = True,
-    mode: str = "chat",
-    limiter: RunLimiter | None = None,
-    run_id: str | None = None,
-) -> dict[str, Any]:
+    safe_mode: bool,
+    mode: str,
+    limiter: RunLimiter | None,
+    run_id: str | None,
+) -> _PreparedCall:
+    """Run every policy, permission and limit check; returns the worker request."""
     plugin = PLUGIN_REGISTRY.get(tool)
+    if not plugin and refresh_local_plugins():
+        plugin = PLUGIN_REGISTRY.get(tool)
     if not plugin:
         raise ValueError(f"Unknown tool: {tool}")
 
@@ -149,15 +265,20 @@ def run_tool(
                 paths = [p for p in args.get("paths", []) if isinstance(p, str)]
             outside = [p for p in paths if not path_within_scopes(p, scopes)[0]]
             if outside:
-                quarantined = _apply_quarantine(paths, session_id=session_id)
+                quarantined = quarantine_paths(paths)
                 args = dict(args)
                 if tool == "file_read":
                     args["path"] = quarantined[0] if quarantined else args.get("path")
                 else:
                     args["paths"] = quarantined
 
+    if limiter and tool == "file_read_batch":
+        args = _bound_batch_bytes(args, limiter)
+
     if limiter:
         try:
+            if tool == "file_grep":
+                args = _bound_grep(args, limiter)
             limiter.check_runtime()
             limiter.check_tool_call()
             enforce_rate_limit(session_id, limiter.max_tool_calls_per_minute)
@@ -174,47 +295,113 @@ def run_tool(
     TOOL_RUN_DIR.mkdir(parents=True, exist_ok=True)
     workdir = TOOL_RUN_DIR / session_id
     workdir.mkdir(parents=True, exist_ok=True)
+    capabilities = plugin_capabilities(plugin)
+    # Only after every check above, so a cached result never bypasses policy.
+    key, taken, cached = _probe_cache(tool, args, str(workdir), capabilities)
+    request = {"tool": tool, "args": args, "cwd": str(workdir), "output_limit": output_limit}
+    if capabilities.max_concurrency:
+        request["max_concurrency"] = capabilities.max_concurrency
+
+    return _PreparedCall(
+        tool=tool,
+        args=args,
+        session_id=session_id,
+        request=request,
+        timeout_seconds=timeout_seconds,
+        output_limit=output_limit,
+        verbose_logging=settings.verbose_logging,
+        limiter=limiter,
+        run_id=run_id,
+        route=tool_route(capabilities),
+        cache_key=key,
+        fingerprint=taken,
+        cached=cached,
+    )
+
 
+@contextmanager
+def _worker_errors(timeout_seconds: int) -> Iterator[None]:
     try:
-        proc = subprocess.run(
-            [get_tool_runner_program_path(), "-m", "app.services.tool_worker"],
-            input=json.dumps({"tool": tool, "args": args}),
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=timeout_seconds,
-            cwd=str(workdir),
-            env=_safe_env(),
-        )
-    except subprocess.TimeoutExpired as exc:
+        yield
+    except WorkerTimeout as exc:
         raise RuntimeError(f"Tool timed out after {timeout_seconds}s") from exc
+    except (WorkerCrashed, WorkerCancelled) as exc:
+        raise RuntimeError(str(exc) or "Tool worker failed") from exc
 
-    stdout, stdout_trunc = _truncate_output(proc.stdout or "", output_limit)
-    stderr, stderr_trunc = _truncate_output(proc.stderr or "", output_limit)
 
-    if proc.returncode != 0:
-        detail = stderr or stdout or "Tool worker failed"
-        raise RuntimeError(detail)
+def _finish_tool_call(call: _PreparedCall, parsed: dict[str, Any]) -> dict[str, Any]:
+    tool, limiter, session_id = call.tool, call.limiter, call.session_id
+    stdout, stdout_trunc = _truncate_output(parsed.get("stdout") or "", call.output_limit)
+    stderr, stderr_trunc = _truncate_output(parsed.get("stderr") or "", call.output_limit)
 
-    parsed = json.loads(stdout)
     if not parsed.get("ok", False):
-        raise RuntimeError(parsed.get("error", "Tool worker failed"))
+        raise RuntimeError(parsed.get("error") or stderr or "Tool worker failed")
 
     result = parsed["result"]
     if limiter and tool == "file_read":
         content = result.get("content", "")
         limiter.record_file_reads(1, len(str(content).encode("utf-8", errors="ignore")))
     if limiter and tool == "file_read_batch":
-        items = result.get("items", [])
-        total_bytes = sum(len(str(item.get("content", "")).encode("utf-8", errors="ignore")) for item in items if isinstance(item, dict))
-        limiter.record_file_reads(len(items), total_bytes)
-    digest = hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+        items = [item for item in result.get("files", []) if isinstance(item, dict) and "error" not in item]
+        total_bytes = result.get("bytes_read")
+        if total_bytes is None:
+            total_bytes = sum(len(str(item.get("content", "")).encode("utf-8", errors="ignore")) for item in items)
+        limiter.record_file_reads(len(items), int(total_bytes))
+    if limiter and tool == "file_grep":
+        limiter.record_grep(len(result.get("matches", [])), int(result.get("bytes_read", 0)))
+    # Pooled workers hash the result before sending it; older replies fall back to hashing here.
+    digest = parsed.get("result_hash") or result_digest(result)
     payload: dict[str, Any] = {"tool": tool, "result_hash": digest, "stdout_truncated": stdout_trunc, "stderr_truncated": stderr_trunc}
-    if settings.verbose_logging:
-        payload["args_sample"] = str(args)[:300]
+    if call.cache_key is not None:
+        cache = get_tool_cache()
+        # A walk cut short by its time budget is not repeatable, so it is not cached.
+        if call.cached is None and call.fingerprint is not None and not result.get("timed_out"):
+            cache.store(call.cache_key, call.fingerprint, result, digest)
+        stats = cache.stats()
+        payload.update(cache="hit" if call.cached else "miss", cache_hits=stats["hits"], cache_misses=stats["misses"])
+    if call.verbose_logging:
+        payload["args_sample"] = str(call.args)[:300]
         payload["result_sample"] = str(result)[:600]
     log_event("tool.call", f"Tool {tool} executed", payload, session_id=session_id)
-    if run_id:
+    if call.run_id:
         from app.services.run_logger import log_run_event
-        log_run_event(run_id, "tool.call", payload)
+        log_run_event(call.run_id, "tool.call", payload)
     return result
+
+
+def run_tool(
+    tool: str,
+    args: dict[str, Any],
+    session_id: str,
+    safe_mode: bool = True,
+    mode: str = "chat",
+    limiter: RunLimiter | None = None,
+    run_id: str | None = None,
+) -> dict[str, Any]:
+    call = _prepare_tool_call(tool, args, session_id, safe_mode, mode, limiter, run_id)
+    parsed = call.cached
+    if parsed is None:
+        with _worker_errors(call.timeout_seconds):
+            parsed = get_tool_pool(call.route).call(call.request, timeout=call.timeout_seconds)
+    return _finish_tool_call(call, parsed)
+
+
+async def run_tool_async(
+    tool: str,
+    args: dict[str, Any],
+    session_id: str,
+    safe_mode: bool = True,
+    mode: str = "chat",
+    limiter: RunLimiter | None = None,
+    run_id: str | None = None,
+) -> dict[str, Any]:
+    """``run_tool`` for async runtimes: the loop keeps serving while the tool runs.
+
+    Cancelling the awaiting task (e.g. an SSE client disconnecting) kills the worker.
+    """
+    call = await run_db(_prepare_tool_call, tool, args, session_id, safe_mode, mode, limiter, run_id)
+    parsed = call.cached
+    if parsed is None:
+        with _worker_errors(call.timeout_seconds):
+            parsed = await get_tool_pool(call.route).call_async(call.request, timeout=call.timeout_seconds)
+    return _finish_tool_call(call, parsed)
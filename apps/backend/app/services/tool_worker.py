@@ -1,12 +1,77 @@
-"""Subprocess worker for local file tools only (no network tools)."""
+"""Subprocess worker for local file tools only (no network tools).
+
+Runs one request from stdin by default, or serves length-prefixed frames
+until stdin closes when started with ``--serve`` by the worker pool. Served
+responses carry the result digest, and large strings are sent as raw blob
+frames (see ``tool_protocol``).
+
+Plugins are imported lazily from the index passed with ``--index`` (written
+by the backend, see ``app.plugins.loader``), so a worker imports only the
+plugins it runs and never loads the registry or opens the database.
+"""
 
 from __future__ import annotations
 
+import contextlib
+import io
 import json
+import os
 import traceback
 import sys
 
-from app.plugins.registry import PLUGIN_REGISTRY
+from app.plugins.loader import BUILTIN_PLUGINS, LazyPlugins, read_index
+from app.services.tool_protocol import encode_response, read_frame, result_digest
+
+_plugins = LazyPlugins(BUILTIN_PLUGINS)
+
+
+def configure(argv: list[str]) -> None:
+    """Use the plugin index named by ``--index``; built-in plugins only without one."""
+    global _plugins
+    if "--index" in argv:
+        _plugins = LazyPlugins(read_index(argv[argv.index("--index") + 1]))
+
+
+def _run(tool: str, args: dict) -> dict:
+    plugin = _plugins.get(tool)
+    if plugin is None:
+        raise ValueError(f"Unknown tool: {tool}")
+    return plugin.run(args)
+
+
+def _handle(request: dict) -> bytes:
+    out, err = io.StringIO(), io.StringIO()
+    try:
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            result = _run(request["tool"], request.get("args", {}))
+        response = {
+            "ok": True,
+            "result": result,
+            "result_hash": result_digest(result),
+            "stdout": out.getvalue(),
+            "stderr": err.getvalue(),
+        }
+    except Exception as exc:
+        response = {"ok": False, "error": str(exc), "trace": traceback.format_exc(limit=3), "stderr": err.getvalue()}
+    payload = encode_response(response)
+    limit = request.get("output_limit")
+    if limit and len(payload) > limit:
+        payload = encode_response({"ok": False, "error": f"Tool output exceeded {limit} bytes"})
+    return payload
+
+
+def serve() -> int:
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    # Stray prints must never corrupt the frame stream.
+    sys.stdout = sys.stderr
+    while True:
+        request = read_frame(stdin)
+        if request is None:
+            return 0
+        stdout.write(_handle(request))
+        stdout.flush()
 
 
 def main() -> int:
@@ -14,9 +79,7 @@ def main() -> int:
         payload = json.loads(sys.stdin.read())
         tool = payload["tool"]
         args = payload.get("args", {})
-        if tool not in PLUGIN_REGISTRY:
-            raise ValueError(f"Unknown tool: {tool}")
-        result = PLUGIN_REGISTRY[tool].run(args)
+        result = _run(tool, args)
         sys.stdout.write(json.dumps({"ok": True, "result": result}))
         return 0
     except Exception as exc:
@@ -26,4 +89,5 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    configure(sys.argv[1:])
+    raise SystemExit(serve() if "--serve" in sys.argv[1:] else main())
@@ -8,7 +8,7 @@ import uuid
 from collections import Counter
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
 from app.services.path_security import path_within_scopes
 from app.services.workspaces import get_active_workspace
 
@@ -45,7 +45,7 @@ def index_documents(workspace_id: str, items: list[dict[str, Any]]) -> int:
 
 def search_index(workspace_id: str, query: str, limit: int = 5) -> list[dict[str, Any]]:
     qvec = _embed(query)
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT path, embedding_json FROM vector_index WHERE workspace_id = ?",
             (workspace_id,),
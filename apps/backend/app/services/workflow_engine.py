@@ -1,27 +1,41 @@
-"""Workflow persistence and execution engine with if/else support."""
+"""Workflow persistence and execution engine with if/else support.
+
+Consecutive ``call_tool`` steps whose tools declare themselves read-only (see
+``PluginCapabilities``) run concurrently, as long as none reads another's
+result through ``{{ vars.<step id> }}``. Results, events and errors still
+follow step order.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import copy
 import json
 import re
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.async_db import run_db
+from app.db.sqlite import connection, read_connection
 from app.models.schemas import WorkflowResponse, WorkflowSaveRequest
+from app.plugins.base import plugin_capabilities
+from app.plugins.registry import PLUGIN_REGISTRY
 from app.services.agent_runtime import stream_chat
 from app.services.expression_eval import evaluate_condition
 from app.services.model_sources import list_model_options
-from app.services.limits import build_run_limiter
+from app.services.limits import RunLimiter, build_run_limiter
 from app.services.search_router import search_with_router
 from app.services.settings_service import get_effective_settings
-from app.services.tool_runner import run_tool
+from app.services.tool_runner import run_tool_async
 from app.services.run_logger import finish_run, log_run_event, start_run
 
+MAX_CONCURRENT_TOOL_STEPS = 4
+# Stands for every step result when a template reads ``{{ vars }}`` whole.
+_ALL_VARS = "*"
+
 
 def list_workflows() -> list[WorkflowResponse]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute("SELECT id, name, description, definition_json FROM workflows ORDER BY updated_at DESC").fetchall()
     return [
         WorkflowResponse(
@@ -78,6 +92,42 @@ def _resolve_template(value: Any, context: dict[str, Any]) -> Any:
     return re.sub(r"\{\{\s*([^\}]+)\s*\}\}", repl, value)
 
 
+def _template_refs(value: Any) -> set[str]:
+    """Names a template reads under ``vars``; ``_ALL_VARS`` when it reads ``vars`` whole."""
+    if isinstance(value, dict):
+        return set().union(*(_template_refs(v) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(_template_refs(v) for v in value))
+    if not isinstance(value, str):
+        return set()
+    refs = set()
+    for match in re.finditer(r"\{\{\s*([^\}]+)\s*\}\}", value):
+        parts = [p.strip() for p in match.group(1).split(".")]
+        if parts[0] == "vars":
+            refs.add(parts[1] if len(parts) > 1 else _ALL_VARS)
+    return refs
+
+
+def _concurrent_tool_step(step: dict[str, Any]) -> bool:
+    if step.get("type") != "call_tool" or step.get("tool_name") == "web_search":
+        return False
+    plugin = PLUGIN_REGISTRY.get(step.get("tool_name"))
+    return plugin is not None and plugin_capabilities(plugin).concurrent_safe
+
+
+def _tool_batch(steps: list[dict[str, Any]], start: int) -> list[dict[str, Any]]:
+    """Read-only tool steps from ``start`` that do not depend on one another."""
+    batch: list[dict[str, Any]] = []
+    produced: set[str] = set()
+    for step in steps[start : start + MAX_CONCURRENT_TOOL_STEPS]:
+        refs = _template_refs(step.get("input_template", {}))
+        if not _concurrent_tool_step(step) or refs & produced or (produced and _ALL_VARS in refs):
+            break
+        batch.append(step)
+        produced.add(str(step.get("id")))
+    return batch
+
+
 async def _run_prompt(prompt: str, session_id: str, model_hint: dict[str, str] | None = None) -> str:
     options = await list_model_options()
     chosen = None
@@ -109,6 +159,45 @@ async def _run_prompt(prompt: str, session_id: str, model_hint: dict[str, str] |
     return output
 
 
+def _concurrency_available() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # Non-asyncio loops (e.g. trio under the anyio test plugin) run steps one by one.
+        return False
+    return True
+
+
+async def _run_tool_batch(
+    batch: list[dict[str, Any]],
+    state: dict[str, Any],
+    session_id: str,
+    safe_mode: bool,
+    limiter: RunLimiter,
+    run_id: str,
+) -> None:
+    calls = [
+        run_tool_async(
+            tool=step.get("tool_name"),
+            args=_resolve_template(step.get("input_template", {}), state),
+            session_id=session_id,
+            safe_mode=safe_mode,
+            mode="workflow",
+            limiter=limiter,
+            run_id=run_id,
+        )
+        for step in batch
+    ]
+    # Every call finishes before the first failure (in step order) is raised.
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for step, result in zip(batch, results):
+        if isinstance(result, BaseException):
+            raise result
+        step_id = step.get("id", f"step-{uuid.uuid4()}")
+        state["vars"][step_id] = result
+        log_run_event(run_id, "step.call_tool", {"step": step_id, "tool": step.get("tool_name"), "concurrent": len(batch)})
+
+
 async def _execute_steps(
     steps: list[dict[str, Any]],
     state: dict[str, Any],
@@ -118,7 +207,10 @@ async def _execute_steps(
     run_id: str,
 ) -> Any:
     returned = None
-    for step in steps:
+    index = 0
+    while index < len(steps):
+        step = steps[index]
+        index += 1
         step_id = step.get("id", f"step-{uuid.uuid4()}")
         step_type = step.get("type")
         if step_type == "set_var":
@@ -137,6 +229,11 @@ async def _execute_steps(
             continue
 
         if step_type == "call_tool":
+            batch = _tool_batch(steps, index - 1)
+            if len(batch) > 1 and _concurrency_available():
+                await _run_tool_batch(batch, state, session_id=session_id, safe_mode=safe_mode, limiter=limiter, run_id=run_id)
+                index += len(batch) - 1
+                continue
             tool_name = step.get("tool_name")
             input_template = _resolve_template(step.get("input_template", {}), state)
             if tool_name == "web_search":
@@ -152,7 +249,7 @@ async def _execute_steps(
                 )
                 state["vars"][step_id] = result.model_dump()
             else:
-                state["vars"][step_id] = run_tool(
+                state["vars"][step_id] = await run_tool_async(
                     tool=tool_name,
                     args=input_template,
                     session_id=session_id,
@@ -204,19 +301,21 @@ async def run_workflow(workflow: WorkflowResponse, inputs: dict[str, Any], sessi
     definition = copy.deepcopy(workflow.definition)
     steps = definition.get("steps", [])
     state: dict[str, Any] = {"inputs": inputs, "vars": {}, "workflow": {"id": workflow.id, "name": workflow.name}}
-    run = start_run(session_id=session_id, mode="workflow", input_text=json.dumps(inputs), model_source_id=None, model_name=None)
-    settings = get_effective_settings()
+    run = await run_db(start_run, session_id=session_id, mode="workflow", input_text=json.dumps(inputs), model_source_id=None, model_name=None)
+    settings = await run_db(get_effective_settings)
     if settings.dry_run_mode == "always":
         plan = []
         for step in steps:
             plan.append({"id": step.get("id"), "type": step.get("type"), "tool": step.get("tool_name")})
         return {"inputs": inputs, "vars": {}, "return": {"dry_run": True, "plan": plan}, "run_id": run["id"]}
-    limiter = build_run_limiter(
+    limiter = await run_db(
+        build_run_limiter,
         {
             "max_tool_calls_per_message": settings.max_tool_calls_per_message,
             "max_tool_calls_per_minute": settings.max_tool_calls_per_minute,
             "max_files_read_per_run": settings.max_files_read_per_run,
             "max_bytes_read_per_run": settings.max_bytes_read_per_run,
+            "max_grep_matches_per_run": settings.max_grep_matches_per_run,
             "max_runtime_seconds": settings.max_runtime_seconds,
         },
         session_id=session_id,
@@ -224,5 +323,5 @@ async def run_workflow(workflow: WorkflowResponse, inputs: dict[str, Any], sessi
     try:
         returned = await _execute_steps(steps, state, session_id=session_id, safe_mode=safe_mode, limiter=limiter, run_id=run["id"])
     finally:
-        finish_run(run["id"], run["start"])
+        await run_db(finish_run, run["id"], run["start"])
     return {"inputs": inputs, "vars": state["vars"], "return": returned, "run_id": run["id"]}
@@ -6,13 +6,15 @@ import json
 import uuid
 from typing import Any
 
-from app.db.sqlite import connection
+from app.db.sqlite import connection, read_connection
+from app.services.file_index import drop_file_index
+from app.services.settings_cache import bump_settings_generation, cached_snapshot
 from app.services.settings_profiles import activate_profile
 from app.services.settings_registry import enforce_safe_defaults, registry_defaults, validate_payload
 
 
 def list_workspaces() -> list[dict]:
-    with connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             """
             SELECT id, name, description, default_profile_id, default_model_source_id, default_model,
@@ -25,7 +27,7 @@ def list_workspaces() -> list[dict]:
 
 
 def get_workspace(workspace_id: str) -> dict | None:
-    with connection() as conn:
+    with read_connection() as conn:
         row = conn.execute(
             """
             SELECT id, name, description, default_profile_id, default_model_source_id, default_model,
@@ -57,14 +59,18 @@ def get_workspace(workspace_id: str) -> dict | None:
     }
 
 
-def get_active_workspace() -> dict | None:
-    with connection() as conn:
+def _load_active_workspace() -> dict | None:
+    with read_connection() as conn:
         row = conn.execute("SELECT id FROM workspaces WHERE is_active = 1").fetchone()
     if not row:
         return None
     return get_workspace(row["id"])
 
 
+def get_active_workspace() -> dict | None:
+    return cached_snapshot("active_workspace", _load_active_workspace)
+
+
 def _normalize_settings(payload: dict[str, Any]) -> dict[str, Any]:
     if not isinstance(payload, dict):
         raise ValueError("Workspace settings must be an object")
@@ -113,6 +119,7 @@ def create_workspace(
                 "INSERT OR REPLACE INTO workspace_settings (workspace_id, key, value_json) VALUES (?, ?, ?)",
                 (workspace_id, key, json.dumps(value)),
             )
+    bump_settings_generation()
     return get_workspace(workspace_id)  # type: ignore
 
 
@@ -171,6 +178,7 @@ def update_workspace(
                     "INSERT OR REPLACE INTO workspace_settings (workspace_id, key, value_json) VALUES (?, ?, ?)",
                     (workspace_id, key, json.dumps(value)),
                 )
+    bump_settings_generation()
     return get_workspace(workspace_id)  # type: ignore
 
 
@@ -180,6 +188,8 @@ def delete_workspace(workspace_id: str) -> None:
         conn.execute("DELETE FROM workspace_tools WHERE workspace_id = ?", (workspace_id,))
         conn.execute("DELETE FROM workspace_settings WHERE workspace_id = ?", (workspace_id,))
         conn.execute("DELETE FROM workspaces WHERE id = ?", (workspace_id,))
+    drop_file_index(workspace_id)
+    bump_settings_generation()
 
 
 def activate_workspace(workspace_id: str) -> dict:
@@ -189,6 +199,7 @@ def activate_workspace(workspace_id: str) -> dict:
     with connection() as conn:
         conn.execute("UPDATE workspaces SET is_active = 0 WHERE is_active = 1")
         conn.execute("UPDATE workspaces SET is_active = 1 WHERE id = ?", (workspace_id,))
+    bump_settings_generation()
     if workspace.get("default_profile_id"):
         try:
             activate_profile(workspace["default_profile_id"])
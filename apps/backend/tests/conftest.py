@@ -1,8 +1,14 @@
 from app.db.sqlite import initialize_db, connection
+from app.db.write_queue import flush_writes
+from app.services.permission_broker import reset_grant_cache
+from app.services.quarantine import reset_quarantine_memo
+from app.services.settings_cache import bump_settings_generation
+from app.services.tool_cache import get_tool_cache
 
 
 def pytest_runtest_setup() -> None:
     initialize_db()
+    flush_writes()
     with connection() as conn:
         conn.execute("DELETE FROM permission_grants")
         conn.execute("DELETE FROM audit_logs")
@@ -21,3 +27,10 @@ def pytest_runtest_setup() -> None:
         conn.execute("DELETE FROM memory_items")
         conn.execute("DELETE FROM plugin_registry")
         conn.execute("DELETE FROM vector_index")
+        conn.execute("DELETE FROM file_index")
+        conn.execute("DELETE FROM file_index_dirs")
+        conn.execute("DELETE FROM quarantine_objects")
+    bump_settings_generation()
+    reset_grant_cache()
+    get_tool_cache().clear()
+    reset_quarantine_memo()
@@ -40,5 +40,28 @@ async def test_agent_runtime_emits_search_fallback(monkeypatch) -> None:
     assert any(item.get("type") == "token" for item in events)
 
 
+@pytest.mark.anyio
+async def test_read_file_route_reads_one_bounded_page(monkeypatch) -> None:
+    from app.services import agent_runtime
+
+    calls = []
+
+    async def fake_run_tool(tool, args, **kwargs):
+        calls.append((tool, args))
+        raise RuntimeError("stop")
+
+    monkeypatch.setattr(agent_runtime, "decide_runtime_route", lambda _source_id, _model: _async_value({"mode": "local"}))
+    monkeypatch.setattr(
+        agent_runtime,
+        "get_source",
+        lambda _sid: type("Source", (), {"id": "local-ollama", "base_url": "http://127.0.0.1:11434"})(),
+    )
+    monkeypatch.setattr(agent_runtime, "run_tool_async", fake_run_tool)
+    payload = ChatRequest(source_id="local-ollama", model="llama3", message="read file: notes.txt", mode="chat", context={"safe_mode": False})
+    events = [json.loads(chunk) async for chunk in stream_chat(payload, session_id="s-read")]
+    assert calls == [("file_read", {"path": "notes.txt", "length": agent_runtime.CHAT_FILE_PAGE_BYTES})]
+    assert events[-1] == {"type": "error", "detail": "stop"}
+
+
 async def _async_value(value):
     return value
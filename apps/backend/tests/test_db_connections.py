@@ -0,0 +1,95 @@
+import threading
+import uuid
+
+import pytest
+
+from app.db import sqlite
+from app.db.async_db import run_db
+from app.db.sqlite import connection, read_connection
+
+
+def test_connections_use_wal_and_reader_is_query_only() -> None:
+    with connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    with read_connection() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(Exception):
+            conn.execute("DELETE FROM memory_items")
+
+
+def test_reader_is_reused_per_thread_and_sees_commits() -> None:
+    with read_connection() as first, read_connection() as second:
+        assert first is second
+    seen: list[object] = []
+
+    def worker() -> None:
+        with read_connection() as conn:
+            seen.append(conn)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen and seen[0] is not first
+
+    memory_id = str(uuid.uuid4())
+    with connection() as conn:
+        conn.execute("INSERT INTO memory_items (id, kind, content) VALUES (?, 'project_fact', 'x')", (memory_id,))
+    with read_connection() as conn:
+        assert conn.execute("SELECT 1 FROM memory_items WHERE id = ?", (memory_id,)).fetchone()
+
+
+def test_writer_rolls_back_on_error() -> None:
+    memory_id = str(uuid.uuid4())
+    with pytest.raises(RuntimeError):
+        with connection() as conn:
+            conn.execute("INSERT INTO memory_items (id, kind, content) VALUES (?, 'project_fact', 'x')", (memory_id,))
+            raise RuntimeError("boom")
+    with read_connection() as conn:
+        assert conn.execute("SELECT 1 FROM memory_items WHERE id = ?", (memory_id,)).fetchone() is None
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite, "DB_PATH", tmp_path / "fresh.db")
+    monkeypatch.setattr(sqlite, "DATA_DIR", tmp_path)
+    sqlite.close_connections()
+    yield tmp_path / "fresh.db"
+    sqlite.close_connections()
+
+
+def test_migrations_apply_once_and_index_hot_paths(fresh_db) -> None:
+    sqlite.initialize_db()
+    assert sqlite.schema_version() == sqlite.SCHEMA_VERSION
+    sqlite.initialize_db()
+    assert sqlite.schema_version() == sqlite.SCHEMA_VERSION
+
+    with read_connection() as conn:
+        plan = " ".join(
+            str(row["detail"])
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT event_type FROM run_events WHERE run_id = ? ORDER BY created_at ASC",
+                ("r1",),
+            )
+        )
+        grant_plan = " ".join(
+            str(row["detail"])
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT scope, allowed_paths_json FROM permission_grants WHERE permission = ? AND session_id = ?",
+                ("filesystem.read", "s1"),
+            )
+        )
+    assert "idx_run_events_run_created" in plan
+    assert "COVERING INDEX idx_permission_grants_lookup" in grant_plan
+
+
+@pytest.mark.anyio
+async def test_run_db_offloads_from_event_loop(anyio_backend_name) -> None:
+    if anyio_backend_name != "asyncio":
+        pytest.skip("DB executor offload applies to the asyncio runtime")
+    loop_thread = threading.get_ident()
+    worker_thread = await run_db(threading.get_ident)
+    assert worker_thread != loop_thread
+    with read_connection() as conn:
+        count = await run_db(lambda: conn.execute("SELECT 1").fetchone()[0])
+    assert count == 1
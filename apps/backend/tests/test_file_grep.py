@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+from app.models.schemas import GrantPermissionRequest, SettingsUpdateRequest
+from app.plugins import file_grep
+from app.plugins.file_grep import FileGrepPlugin
+from app.services import tool_runner
+from app.services.limits import RunLimiter
+from app.services.permission_broker import grant_permission
+from app.services.settings_service import update_settings
+from app.services.tool_runner import run_tool
+
+
+def _tree(root: Path) -> None:
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("import os\n\ndef load():\n    return TODO_value\n# end\n", encoding="utf-8")
+    (root / "notes.md").write_text("todo: write docs\r\nnothing here\r\n", encoding="utf-8")
+    (root / "blob.bin").write_bytes(b"TODO\0\x01\x02")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("TODO vendored", encoding="utf-8")
+
+
+def test_grep_returns_lines_with_context(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    result = FileGrepPlugin().run({"path": str(tmp_path), "pattern": "todo", "ignore_case": True, "context_lines": 1})
+    found = {(Path(m["path"]).name, m["line"]): m for m in result["matches"]}
+    assert sorted(found) == [("app.py", 4), ("notes.md", 1)]
+    assert found[("app.py", 4)]["text"] == "    return TODO_value"
+    assert found[("app.py", 4)]["before"] == ["def load():"] and found[("app.py", 4)]["after"] == ["# end"]
+    assert found[("notes.md", 1)]["text"] == "todo: write docs" and found[("notes.md", 1)]["before"] == []
+    assert result["files_binary"] == 1 and result["files_matched"] == 2 and result["truncated"] is False
+
+    only_py = FileGrepPlugin().run({"path": str(tmp_path), "pattern": "TODO", "glob": "*.py", "context_lines": 0})
+    assert [Path(m["path"]).name for m in only_py["matches"]] == ["app.py"]
+    with pytest.raises(ValueError):
+        FileGrepPlugin().run({"path": str(tmp_path), "pattern": "("})
+    literal = FileGrepPlugin().run({"path": str(tmp_path), "pattern": "load()", "fixed_strings": True})
+    assert [m["line"] for m in literal["matches"]] == [3]
+
+
+def test_big_files_are_memory_mapped(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(file_grep, "MMAP_MIN_BYTES", 1024)
+    lines = [f"line {index}" for index in range(5000)]
+    lines[4321] = "needle here"
+    (tmp_path / "big.log").write_text("\n".join(lines), encoding="utf-8")
+    mapped = []
+    original = file_grep._scan
+
+    def tracking(buf, *args):
+        mapped.append(type(buf).__name__)
+        return original(buf, *args)
+
+    monkeypatch.setattr(file_grep, "_scan", tracking)
+    result = FileGrepPlugin().run({"path": str(tmp_path / "big.log"), "pattern": r"^needle", "context_lines": 1})
+    assert mapped == ["mmap"]
+    assert result["matches"][0]["line"] == 4322
+    assert result["matches"][0]["before"] == ["line 4320"] and result["matches"][0]["after"] == ["line 4322"]
+
+
+def test_match_and_byte_budgets(tmp_path: Path) -> None:
+    for index in range(5):
+        (tmp_path / f"{index}.txt").write_text("hit\n" * 50, encoding="utf-8")
+    capped = FileGrepPlugin().run({"path": str(tmp_path), "pattern": "hit", "max_matches": 7})
+    assert len(capped["matches"]) == 7 and capped["truncated"] is True
+    starved = FileGrepPlugin().run({"path": str(tmp_path), "pattern": "hit", "max_total_bytes": 300})
+    assert starved["bytes_read"] == 300 and starved["budget_exhausted"] is True
+
+
+def test_runner_bounds_grep_by_run_limits(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    class InlinePool:
+        def call(self, request, timeout):
+            calls.append(request["args"])
+            return {"ok": True, "result": FileGrepPlugin().run(request["args"])}
+
+    calls: list[dict] = []
+    (tmp_path / "a.txt").write_text("match\n" * 20, encoding="utf-8")
+    update_settings(SettingsUpdateRequest(safe_mode_default=False))
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="g1",
+    )
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": InlinePool())
+    limiter = RunLimiter(10, 100, 20, 10_000, 60, session_id="g1", max_grep_matches_per_run=15)
+    first = run_tool("file_grep", {"path": str(tmp_path), "pattern": "match"}, session_id="g1", safe_mode=False, mode="workflow", limiter=limiter)
+    assert calls[0]["max_matches"] == 15 and calls[0]["max_total_bytes"] == 10_000
+    assert len(first["matches"]) == 15 and limiter.grep_matches == 15
+    assert limiter.bytes_read == 120 and limiter.files_read == 0
+    with pytest.raises(RuntimeError, match="Grep match limit"):
+        run_tool("file_grep", {"path": str(tmp_path), "pattern": "match"}, session_id="g1", safe_mode=False, mode="workflow", limiter=limiter)
+    with pytest.raises(PermissionError):
+        run_tool("file_grep", {"path": str(tmp_path.parent), "pattern": "x"}, session_id="g1", safe_mode=False, mode="workflow")
@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.services import file_index, file_search
+from app.services.file_index import query_file_index, refresh_file_index
+from app.services.file_search import search_files
+from app.services.file_walker import walk_files
+from app.services.workspaces import activate_workspace, create_workspace
+
+
+def _write(root: Path, *names: str) -> None:
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name, encoding="utf-8")
+
+
+def _bump(path: Path) -> None:
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _names(result) -> list[str]:
+    return [entry.name for entry in result.entries]
+
+
+def test_index_answers_glob_and_substring_queries(tmp_path: Path) -> None:
+    _write(tmp_path, "README.md", "src/app/main.py", "src/app/helpers.py", "src/lib/Hello_World.txt", "node_modules/x/skip.py")
+    stats = refresh_file_index("ws-q", [str(tmp_path)])
+    assert stats.total_files == 4 and stats.complete
+    assert _names(query_file_index("ws-q", str(tmp_path), pattern="*.py")) == ["helpers.py", "main.py"]
+    assert _names(query_file_index("ws-q", str(tmp_path), contains="LLO_w")) == ["Hello_World.txt"]
+    assert _names(query_file_index("ws-q", str(tmp_path), pattern="help*")) == ["helpers.py"]
+    assert _names(query_file_index("ws-q", str(tmp_path), pattern="app/m*.py")) == ["main.py"]
+    assert _names(query_file_index("ws-q", str(tmp_path / "src" / "lib"))) == ["Hello_World.txt"]
+    limited = query_file_index("ws-q", str(tmp_path), max_results=2)
+    assert len(limited.entries) == 2 and limited.truncated is True
+    assert query_file_index("ws-q", str(tmp_path / "node_modules")) is None
+    entry = query_file_index("ws-q", str(tmp_path), pattern="README.md").entries[0]
+    assert entry.size == len("README.md") and entry.depth == 0
+
+
+
+def test_multi_dot_patterns_match_the_walker(tmp_path: Path) -> None:
+    _write(tmp_path, "a.tar.gz", "b.gz", "c.tar.bz2", "docs/notes.v1.md", "docs/notes.md")
+    refresh_file_index("ws-dots", [str(tmp_path)])
+    for pattern in ("*.tar.gz", "*.gz", "*.v1.md", "*.md"):
+        indexed = sorted(_names(query_file_index("ws-dots", str(tmp_path), pattern=pattern)))
+        assert indexed == sorted(_names(walk_files(str(tmp_path), pattern=pattern))), pattern
+    assert _names(query_file_index("ws-dots", str(tmp_path), pattern="*.tar.gz")) == ["a.tar.gz"]
+
+
+def test_refresh_only_rescans_changed_directories(tmp_path: Path) -> None:
+    _write(tmp_path, "a/one.txt", "a/b/two.txt", "c/three.txt")
+    first = refresh_file_index("ws-i", [str(tmp_path)])
+    assert first.dirs_scanned == 4 and first.files_updated == 3
+
+    again = refresh_file_index("ws-i", [str(tmp_path)])
+    assert (again.dirs_scanned, again.dirs_unchanged, again.files_updated) == (0, 4, 0)
+
+    _write(tmp_path, "a/b/four.txt")
+    _bump(tmp_path / "a" / "b")
+    (tmp_path / "c" / "three.txt").unlink()
+    _bump(tmp_path / "c")
+    changed = refresh_file_index("ws-i", [str(tmp_path)])
+    assert (changed.dirs_scanned, changed.files_updated, changed.files_removed) == (2, 1, 1)
+    assert _names(query_file_index("ws-i", str(tmp_path))) == ["four.txt", "two.txt", "one.txt"]
+
+    for item in (tmp_path / "a" / "b").iterdir():
+        item.unlink()
+    (tmp_path / "a" / "b").rmdir()
+    _bump(tmp_path / "a")
+    removed = refresh_file_index("ws-i", [str(tmp_path)])
+    assert removed.files_removed == 2 and removed.total_files == 1
+
+
+def test_interrupted_refresh_is_finished_by_the_next_one(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    _write(tmp_path, "top.txt", "a/a.txt", "b/b.txt", "c/c.txt")
+    ticks = iter([0.0] * 4)
+    # Deadline checks pass for the root and two subdirectories, then the budget is spent.
+    monkeypatch.setattr(file_index.time, "perf_counter", lambda: next(ticks, 10.0))
+    first = refresh_file_index("ws-cut", [str(tmp_path)], time_budget=1.0)
+    assert not first.complete and first.dirs_scanned == 3
+    monkeypatch.undo()
+
+    second = refresh_file_index("ws-cut", [str(tmp_path)])
+    assert second.complete and second.dirs_scanned == 2
+    assert sorted(_names(query_file_index("ws-cut", str(tmp_path)))) == ["a.txt", "b.txt", "c.txt", "top.txt"]
+    assert sorted(_names(query_file_index("ws-cut", str(tmp_path)))) == sorted(_names(walk_files(str(tmp_path))))
+
+
+def test_ignore_file_change_rescans_subtree(tmp_path: Path) -> None:
+    _write(tmp_path, "keep.py", "gen/out.py", "gen/deep/more.py")
+    assert refresh_file_index("ws-g", [str(tmp_path)]).total_files == 3
+    (tmp_path / ".gitignore").write_text("*.py\n!keep.py\n", encoding="utf-8")
+    _bump(tmp_path)
+    stats = refresh_file_index("ws-g", [str(tmp_path)])
+    assert _names(query_file_index("ws-g", str(tmp_path), pattern="*.py")) == ["keep.py"]
+    assert stats.dirs_scanned == 3
+
+
+def test_search_files_uses_workspace_index(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    _write(tmp_path, *[f"pkg{index // 100}/module_{index}.py" for index in range(2000)], "notes/todo.md")
+    workspace = create_workspace("indexed", scopes=[str(tmp_path)])
+    activate_workspace(workspace["id"])
+    first = search_files(str(tmp_path), pattern="*.md")
+    assert [entry.name for entry in first.entries] == ["todo.md"]
+
+    def no_walk(*args, **kwargs):
+        raise AssertionError("search should be answered from the index")
+
+    monkeypatch.setattr(file_search, "walk_files", no_walk)
+    hits = search_files(str(tmp_path), query="ule_199", max_results=50)
+    assert sorted(entry.name for entry in hits.entries) == sorted(["module_199.py"] + [f"module_{n}.py" for n in range(1990, 2000)])
+
+
+def test_search_walks_while_index_refresh_is_unfinished(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    _write(tmp_path, "a/one.py", "b/two.py")
+    workspace = create_workspace("budgeted", scopes=[str(tmp_path)])
+    activate_workspace(workspace["id"])
+    walked = []
+    real_walk = file_search.walk_files
+    monkeypatch.setattr(file_search, "walk_files", lambda *args, **kwargs: walked.append(kwargs) or real_walk(*args, **kwargs))
+    monkeypatch.setattr(file_search, "SEARCH_TIME_BUDGET_SECONDS", 0.0)
+    first = search_files(str(tmp_path), pattern="*.py")
+    assert sorted(entry.name for entry in first.entries) == ["one.py", "two.py"]
+    assert len(walked) == 1 and walked[0]["time_budget"] == file_search.MIN_WALK_BUDGET_SECONDS
+
+    monkeypatch.setattr(file_search, "SEARCH_TIME_BUDGET_SECONDS", 10.0)
+    second = search_files(str(tmp_path), pattern="*.py")
+    assert sorted(entry.name for entry in second.entries) == ["one.py", "two.py"] and len(walked) == 1
@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.plugins import file_read
+from app.plugins.file_read import FileReadPlugin
+
+
+def _lines(count: int) -> str:
+    return "".join(f"línea {index}\n" for index in range(1, count + 1))
+
+
+def test_default_read_and_byte_range(tmp_path: Path) -> None:
+    path = tmp_path / "a.txt"
+    path.write_text("héllo wörld", encoding="utf-8")
+    plugin = FileReadPlugin()
+    whole = plugin.run({"path": str(path)})
+    assert whole["content"] == "héllo wörld" and whole["continuation"] is None
+    # Offset 2 lands inside "é"; the read starts at the next character.
+    part = plugin.run({"path": str(path), "offset": 2, "length": 4})
+    assert part["offset"] == 3 and part["content"] == "llo "
+    assert part["truncated"] is True
+
+
+def test_continuation_pages_through_whole_file(tmp_path: Path) -> None:
+    path = tmp_path / "big.log"
+    text = _lines(500)
+    path.write_text(text, encoding="utf-8")
+    plugin = FileReadPlugin()
+    page = plugin.run({"path": str(path), "length": 999})
+    pages = [page["content"]]
+    while page["continuation"]:
+        page = plugin.run({"path": str(path), "continuation": page["continuation"]})
+        assert len(page["content"].encode("utf-8")) <= 999
+        pages.append(page["content"])
+    assert "".join(pages) == text and len(pages) > 5
+
+
+def test_line_window_and_paging(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(file_read, "BLOCK_BYTES", 16)
+    path = tmp_path / "lines.txt"
+    path.write_text(_lines(100), encoding="utf-8")
+    plugin = FileReadPlugin()
+    window = plugin.run({"path": str(path), "start_line": 10, "end_line": 12})
+    assert window["content"] == "línea 10\nlínea 11\nlínea 12\n"
+    assert (window["start_line"], window["end_line"]) == (10, 12)
+    following = plugin.run({"path": str(path), "continuation": window["continuation"]})
+    assert following["content"] == "línea 13\nlínea 14\nlínea 15\n"
+    assert following["start_line"] == 13
+    last = plugin.run({"path": str(path), "start_line": 99})
+    assert last["content"] == "línea 99\nlínea 100\n" and last["continuation"] is None
+
+
+def test_tail_scans_backwards_across_blocks(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(file_read, "BLOCK_BYTES", 16)
+    path = tmp_path / "tail.log"
+    path.write_text(_lines(50) + "sin salto", encoding="utf-8")
+    result = FileReadPlugin().run({"path": str(path), "tail_lines": 3})
+    assert result["content"] == "línea 49\nlínea 50\nsin salto"
+    assert result["next_offset"] == result["size"] and result["continuation"] is None
+
+
+def test_continuation_rejects_replaced_file(tmp_path: Path) -> None:
+    path = tmp_path / "a.txt"
+    path.write_text("x" * 100, encoding="utf-8")
+    token = FileReadPlugin().run({"path": str(path), "length": 10})["continuation"]
+    replacement = tmp_path / "b.txt"
+    replacement.write_text("y" * 100, encoding="utf-8")
+    os.replace(replacement, path)
+    with pytest.raises(ValueError, match="changed"):
+        FileReadPlugin().run({"path": str(path), "continuation": token})
+    with pytest.raises(ValueError, match="Invalid"):
+        FileReadPlugin().run({"path": str(path), "continuation": "!!"})
+
+
+def test_chat_route_splits_only_valid_continuation_tokens(tmp_path: Path) -> None:
+    from app.services.agent_runtime import _split_continuation
+
+    path = tmp_path / "big.txt"
+    path.write_text("x" * 50, encoding="utf-8")
+    token = FileReadPlugin().run({"path": str(path), "length": 10})["continuation"]
+    assert _split_continuation(f"{path} @{token}") == (str(path), token)
+    assert _split_continuation("C:/My @Docs/x.txt") == ("C:/My @Docs/x.txt", None)
+    assert _split_continuation("notes @draft") == ("notes @draft", None)
+    assert _split_continuation(str(path)) == (str(path), None)
+
+
+def test_tiny_length_still_advances_past_multibyte_characters(tmp_path: Path) -> None:
+    path = tmp_path / "wide.txt"
+    path.write_text("€€a", encoding="utf-8")
+    plugin = FileReadPlugin()
+    seen, args = [], {"path": str(path), "length": 1}
+    while True:
+        page = plugin.run(args)
+        seen.append(page["content"])
+        if not page["continuation"]:
+            break
+        args = {"path": str(path), "continuation": page["continuation"]}
+        assert len(seen) < 10
+    assert seen == ["€", "€", "a"]
+
+
+def test_line_endings_are_translated_without_shifting_offsets(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    path = tmp_path / "dos.txt"
+    path.write_bytes(b"one\r\ntwo\r\nthree\rfour\r\n")
+    plugin = FileReadPlugin()
+    assert plugin.run({"path": str(path)})["content"] == path.read_text(encoding="utf-8") == "one\ntwo\nthree\nfour\n"
+    pages, args = [], {"path": str(path), "length": 4}
+    while True:
+        page = plugin.run(args)
+        pages.append(page["content"])
+        if not page["continuation"]:
+            break
+        args = {"path": str(path), "continuation": page["continuation"]}
+    # A page ending in CR takes its LF too, so no pair is split into two newlines.
+    assert "".join(pages) == "one\ntwo\nthree\nfour\n" and page["next_offset"] == path.stat().st_size
+    window = plugin.run({"path": str(path), "start_line": 2, "end_line": 2})
+    assert window["content"] == "two\n" and window["next_offset"] == 10
+    # A lone CR ends a line in windows and tails too, as it does in the returned text.
+    window = plugin.run({"path": str(path), "start_line": 3, "end_line": 3})
+    assert window["content"] == "three\n" and window["end_line"] == 3 and window["next_offset"] == 16
+    assert plugin.run({"path": str(path), "tail_lines": 1})["content"] == "four\n"
+    monkeypatch.setattr(file_read, "BLOCK_BYTES", 3)
+    assert plugin.run({"path": str(path), "tail_lines": 2})["content"] == "three\nfour\n"
+    assert plugin.run({"path": str(path), "tail_lines": 3})["content"] == "two\nthree\nfour\n"
+    window = plugin.run({"path": str(path), "start_line": 2, "end_line": 3})
+    assert window["content"] == "two\nthree\n" and window["offset"] == 5
@@ -0,0 +1,95 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.models.schemas import GrantPermissionRequest
+from app.plugins import file_read_batch
+from app.plugins.file_read_batch import FileReadBatchPlugin
+from app.services import tool_runner
+from app.services.limits import RunLimiter
+from app.services.permission_broker import grant_permission
+from app.services.tool_runner import _bound_batch_bytes, run_tool
+
+
+def test_reads_stop_at_char_budget(tmp_path: Path) -> None:
+    big = tmp_path / "big.log"
+    big.write_text("é" * 200_000, encoding="utf-8")
+    small = tmp_path / "small.txt"
+    small.write_text("hi", encoding="utf-8")
+    result = FileReadBatchPlugin().run({"paths": [str(big), str(small), str(tmp_path / "nope")], "max_chars_per_file": 1000})
+    first, second, missing = result["files"]
+    assert first["content"] == "é" * 1000 and first["truncated"] is True
+    assert first["bytes_read"] <= 2 * 1000 + 4
+    assert second["content"] == "hi" and second["truncated"] is False
+    assert "error" in missing and missing["bytes_read"] == 0
+    assert all(item["elapsed_ms"] >= 0 for item in result["files"])
+    assert result["bytes_read"] == first["bytes_read"] + second["bytes_read"]
+
+
+def test_reads_translate_newlines_like_text_mode(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(file_read_batch, "READ_CHUNK_BYTES", 2)
+    target = tmp_path / "dos.txt"
+    target.write_bytes(b"a\r\nbb\rc\r\n")
+    item = FileReadBatchPlugin().run({"paths": [str(target)]})["files"][0]
+    assert item["content"] == target.read_text(encoding="utf-8") == "a\nbb\nc\n"
+    assert item["bytes_read"] == 9 and item["truncated"] is False
+    item = FileReadBatchPlugin().run({"paths": [str(target)], "max_chars_per_file": 2})["files"][0]
+    assert item["content"] == "a\n" and item["truncated"] is True
+
+
+def test_batch_byte_budget_is_shared(tmp_path: Path) -> None:
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"{index}.txt"
+        path.write_text("x" * 500, encoding="utf-8")
+        paths.append(str(path))
+    result = FileReadBatchPlugin().run({"paths": paths, "max_chars_per_file": 500, "max_total_bytes": 1200})
+    assert result["bytes_read"] == 1200
+    assert result["budget_exhausted"] is True
+    assert sum(item["truncated"] for item in result["files"]) >= 3
+
+
+def test_reads_run_concurrently(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    seen: set[int] = set()
+    original = file_read_batch._read_prefix
+
+    def tracking(path, max_chars, budget):
+        seen.add(threading.get_ident())
+        return original(path, max_chars, budget)
+
+    monkeypatch.setattr(file_read_batch, "_read_prefix", tracking)
+    paths = []
+    for index in range(4):
+        path = tmp_path / f"{index}.txt"
+        path.write_text("data", encoding="utf-8")
+        paths.append(str(path))
+    result = FileReadBatchPlugin().run({"paths": paths})
+    assert [item["content"] for item in result["files"]] == ["data"] * 4
+    assert threading.get_ident() not in seen
+
+
+def test_runner_caps_batch_at_remaining_run_budget() -> None:
+    limiter = RunLimiter(10, 10, 100, 10_000, 60, session_id="b1", bytes_read=9_000)
+    args = {"paths": ["a", "b"], "max_chars_per_file": 5000}
+    assert _bound_batch_bytes(args, limiter)["max_total_bytes"] == 1_000
+    roomy = RunLimiter(10, 10, 100, 10_000_000, 60, session_id="b1")
+    assert _bound_batch_bytes(args, roomy) is args
+
+
+def test_batch_reads_count_against_run_limits(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    class InlinePool:
+        def call(self, request, timeout):
+            return {"ok": True, "result": FileReadBatchPlugin().run(request["args"])}
+
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text("12345", encoding="utf-8")
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="b2",
+    )
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": InlinePool())
+    limiter = RunLimiter(10, 100, 100, 1_000, 60, session_id="b2")
+    paths = [str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), str(tmp_path / "missing.txt")]
+    run_tool("file_read_batch", {"paths": paths}, session_id="b2", safe_mode=False, mode="workflow", limiter=limiter)
+    assert (limiter.files_read, limiter.bytes_read) == (2, 10)
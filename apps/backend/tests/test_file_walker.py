@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import GrantPermissionRequest, SettingsUpdateRequest
+from app.plugins.file_list import FileListPlugin
+from app.services.file_walker import FileWalker, walk_files
+from app.services.permission_broker import grant_permission
+from app.services.settings_service import update_settings
+
+
+def _tree(root: Path) -> None:
+    files = [
+        "a.py",
+        "src/b.py",
+        "src/pkg/c.md",
+        "src/pkg/deep/d.py",
+        "node_modules/lib/e.py",
+        ".git/objects/f.txt",
+        "env/lib/g.py",
+        "build/h.py",
+        "x.log",
+        "keep.log",
+        "src/.gitignore",
+        "src/secret.py",
+    ]
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name, encoding="utf-8")
+    (root / "env" / "pyvenv.cfg").write_text("home = /usr", encoding="utf-8")
+    (root / ".gitignore").write_text("# build output\nbuild/\n*.log\n!keep.log\n", encoding="utf-8")
+    (root / "src" / ".gitignore").write_text("secret.py\n", encoding="utf-8")
+
+
+def _relative(root: Path, entries) -> list[str]:
+    return [os.path.relpath(entry.path, root).replace(os.sep, "/") for entry in entries]
+
+
+def test_walk_prunes_ignored_dirs_breadth_first(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    walk = walk_files(str(tmp_path))
+    assert _relative(tmp_path, walk.entries) == [
+        ".gitignore",
+        "a.py",
+        "keep.log",
+        "src/.gitignore",
+        "src/b.py",
+        "src/pkg/c.md",
+        "src/pkg/deep/d.py",
+    ]
+    entry = walk.entries[1]
+    assert entry.size == len("a.py") and entry.mtime == os.stat(entry.path).st_mtime
+    visited = [os.path.relpath(item, tmp_path) for item in FileWalker(str(tmp_path)).directories()]
+    assert "node_modules" not in visited and "env" not in visited and "build" not in visited
+
+
+def test_walk_depth_pattern_and_limits(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    assert _relative(tmp_path, walk_files(str(tmp_path), pattern="*.py", max_depth=1).entries) == ["a.py", "src/b.py"]
+    assert _relative(tmp_path, walk_files(str(tmp_path), pattern="pkg/*.md").entries) == ["src/pkg/c.md"]
+    limited = walk_files(str(tmp_path), pattern="*.py", max_files=2)
+    assert len(limited.entries) == 2 and limited.truncated is True
+    expired = walk_files(str(tmp_path), time_budget=-1)
+    assert expired.entries == [] and expired.timed_out is True
+
+
+def test_file_list_reports_entries(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    result = FileListPlugin().run({"path": str(tmp_path), "max_files": 3})
+    listed = [os.path.relpath(path, tmp_path).replace(os.sep, "/") for path in result["files"]]
+    assert listed == ["a.py", "keep.log", "src/b.py"]
+    assert result["entries"][0]["size"] == len("a.py") and result["truncated"] is True
+
+
+def test_files_search_route_returns_metadata(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    update_settings(SettingsUpdateRequest(safe_mode_default=False))
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="fs1",
+    )
+    response = TestClient(app).post(
+        "/api/v1/files/search",
+        json={"path": str(tmp_path), "pattern": "*.md"},
+        headers={"X-Session-Id": "fs1"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"] == [str((tmp_path / "src" / "pkg" / "c.md").resolve())]
+    assert body["entries"][0]["size"] == len("src/pkg/c.md") and body["truncated"] is False
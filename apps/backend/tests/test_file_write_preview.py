@@ -1,6 +1,11 @@
+import difflib
+import hashlib
 from pathlib import Path
 
-from app.plugins.file_write import FileWritePlugin
+import pytest
+
+from app.plugins import file_write
+from app.plugins.file_write import FileWritePlugin, preview_diff
 
 
 def test_file_write_preview_requires_confirm(tmp_path: Path) -> None:
@@ -9,3 +14,56 @@ def test_file_write_preview_requires_confirm(tmp_path: Path) -> None:
     plugin = FileWritePlugin()
     result = plugin.run({"path": str(path), "content": "new"})
     assert result.get("requires_confirmation") is True
+
+
+def test_file_write_is_atomic_and_checks_expected_hash(tmp_path: Path) -> None:
+    path = tmp_path / "a.txt"
+    path.write_text("old", encoding="utf-8")
+    path.chmod(0o640)
+    plugin = FileWritePlugin()
+    stale = hashlib.sha256(b"other").hexdigest()
+    with pytest.raises(ValueError, match="precondition_failed"):
+        plugin.run({"path": str(path), "content": "new", "confirm": True, "expected_sha256": stale})
+    assert path.read_text(encoding="utf-8") == "old"
+
+    result = plugin.run({"path": str(path), "content": "new", "confirm": True, "expected_sha256": hashlib.sha256(b"old").hexdigest()})
+    assert path.read_text(encoding="utf-8") == "new" and result["sha256"] == hashlib.sha256(b"new").hexdigest()
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["a.txt"]
+
+    created = plugin.run({"path": str(tmp_path / "b.txt"), "content": "x", "expected_sha256": ""})
+    assert created["prior_sha256"] is None and (tmp_path / "b.txt").read_text(encoding="utf-8") == "x"
+    with pytest.raises(ValueError, match="precondition_failed:sha256:" + hashlib.sha256(b"x").hexdigest()):
+        plugin.run({"path": str(tmp_path / "b.txt"), "content": "y", "expected_sha256": ""})
+
+
+def test_preview_diff_matches_unified_diff_for_small_edits() -> None:
+    old = "\n".join(f"line {n}" for n in range(60))
+    new = old.replace("line 5\n", "").replace("line 30", "line thirty").replace("line 59", "line 59\nline 60")
+    diff, summary = preview_diff("f.txt", old, new)
+    expected = "\n".join(difflib.unified_diff(old.splitlines(), new.splitlines(), fromfile="f.txt", tofile="f.txt", lineterm=""))
+    assert diff == expected
+    assert summary == {"strategy": "line_hash", "hunks": 3, "hunks_shown": 3, "truncated": False}
+    assert preview_diff("f.txt", old, old) == ("", {"strategy": "identical", "hunks": 0, "hunks_shown": 0, "truncated": False})
+
+
+def test_preview_diff_cost_is_bounded(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    lines = [f"row {n} " + "x" * 20 for n in range(30_000)]
+    edited = list(lines)
+    for n in range(0, 30_000, 1000):
+        edited[n] = "changed"
+    diff, summary = preview_diff("f.txt", "\n".join(lines), "\n".join(edited))
+    assert summary["hunks"] == 30 and summary["hunks_shown"] == file_write.MAX_DIFF_HUNKS and summary["truncated"]
+    assert diff.endswith("(20 of 30 hunks shown)")
+
+    rewritten = [f"other {n}" for n in range(30_000)]
+    diff, summary = preview_diff("f.txt", "\n".join(lines), "\n".join(rewritten))
+    assert summary["hunks"] == 1 and len(diff.splitlines()) == file_write.MAX_DIFF_LINES + 1
+    monkeypatch.setattr(file_write, "MAX_DIFF_REGION_LINES", 1000)
+    diff, summary = preview_diff("f.txt", "\n".join(lines), "\n".join(lines[:10] + rewritten[10:]))
+    assert summary["strategy"] == "replace" and diff.splitlines()[2] == "@@ -8,29993 +8,29993 @@"
+
+    big = tmp_path / "big.txt"
+    big.write_bytes(b"y" * (file_write.MAX_DIFF_BYTES + 1))
+    result = FileWritePlugin().run({"path": str(big), "content": "small"})
+    assert result["diff_summary"]["strategy"] == "too_large" and result["requires_confirmation"] is True
@@ -1,6 +1,12 @@
 import time
 
-from app.services.limits import RunLimiter, enforce_rate_limit
+import pytest
+
+from app.services import limits
+from app.services.limits import RunLimiter, build_run_limiter, enforce_rate_limit
+from app.services.policy_dsl import compile_policy
+from app.services.policy_guard import ActivePolicy
+from app.services.rate_limiter import SlidingWindowLimiter, SqliteWindowLimiter
 
 
 def test_run_limiter_tool_calls_and_files() -> None:
@@ -30,6 +36,22 @@ def test_run_limiter_tool_calls_and_files() -> None:
         pass
 
 
+def test_grep_match_limit_comes_from_settings_and_policy(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = {
+        "max_tool_calls_per_message": 3,
+        "max_tool_calls_per_minute": 15,
+        "max_files_read_per_run": 20,
+        "max_bytes_read_per_run": 5_000_000,
+        "max_runtime_seconds": 120,
+        "max_grep_matches_per_run": 40,
+    }
+    monkeypatch.setattr(limits, "active_policy", lambda: ActivePolicy(None, None, None))
+    assert build_run_limiter(settings, session_id="g").max_grep_matches_per_run == 40
+    policy = compile_policy("max_grep_matches_per_run = 7 in profile=LockedDown")
+    monkeypatch.setattr(limits, "active_policy", lambda: ActivePolicy(policy, "LockedDown", None))
+    assert build_run_limiter(settings, session_id="g").max_grep_matches_per_run == 7
+
+
 def test_rate_limit_window() -> None:
     session_id = "rate-test"
     for _ in range(3):
@@ -40,3 +62,35 @@ def test_rate_limit_window() -> None:
     except RuntimeError:
         pass
     time.sleep(1)
+
+
+def test_sliding_window_evicts_idle_sessions() -> None:
+    now = [1000.0]
+    limiter = SlidingWindowLimiter(window_seconds=60, idle_seconds=120, max_sessions=2, clock=lambda: now[0])
+    assert limiter.hit("a", 2) and limiter.hit("a", 2)
+    assert limiter.hit("a", 2) is False
+    assert limiter.hit("b", 2)
+    assert limiter.hit("c", 2)
+    assert {row["session_id"] for row in limiter.counters()} == {"b", "c"}
+    now[0] += 121
+    assert limiter.counters() == []
+    # Half a window later the previous window still counts at half weight.
+    limiter.hit("d", 2)
+    limiter.hit("d", 2)
+    now[0] += 90
+    assert limiter.hit("d", 2) is True
+    assert limiter.hit("d", 2) is False
+    row = limiter.counters()[0]
+    assert row["session_id"] == "d" and row["allowed"] == 3 and row["throttled"] == 1
+
+
+def test_shared_rate_limit_state_in_sqlite() -> None:
+    shared = SqliteWindowLimiter(window_seconds=60)
+    shared.reset()
+    other_worker = SqliteWindowLimiter(window_seconds=60)
+    assert shared.hit("shared", 2)
+    assert other_worker.hit("shared", 2)
+    assert shared.hit("shared", 2) is False
+    counters = other_worker.counters()
+    assert counters[0]["session_id"] == "shared"
+    assert counters[0]["throttled"] == 1
@@ -46,3 +46,98 @@ def test_symlink_escape_rejected(tmp_path: Path) -> None:
 
     ok, _ = path_within_scopes(str(link), [str(base)])
     assert ok is False
+
+
+def test_grant_cache_serves_checks_without_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.services import permission_broker
+
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="cache-session",
+    )
+    grant_permission(GrantPermissionRequest(permission="web.search", scope="always"), session_id="other-session")
+    assert check_permission("filesystem.read", session_id="cache-session", path=str(tmp_path / "a.txt"))[0] is True
+    assert check_permission("filesystem.write", session_id="cache-session")[0] is False
+
+    def no_db():
+        raise AssertionError("grant lookups should be served from the cache")
+
+    monkeypatch.setattr(permission_broker, "read_connection", no_db)
+    assert check_permission("filesystem.read", session_id="cache-session", path=str(tmp_path / "b.txt"))[0] is True
+    assert check_permission("web.search", session_id="cache-session")[0] is True
+    assert check_permission("filesystem.write", session_id="cache-session")[0] is False
+    assert {g.permission for g in permission_broker.list_grants("cache-session")} == {"filesystem.read", "web.search"}
+
+
+def test_grant_cache_write_through_on_revoke() -> None:
+    from app.services.permission_broker import list_grants, reset_grant_cache, revoke_permission
+
+    grant_permission(GrantPermissionRequest(permission="web.search", scope="always"), session_id="s-a")
+    assert check_permission("web.search", session_id="s-b")[0] is True
+    revoke_permission("web.search", session_id="s-a")
+    assert check_permission("web.search", session_id="s-b")[0] is False
+    reset_grant_cache()
+    assert list_grants("s-b") == []
+
+
+def test_grant_cache_sees_writes_from_other_processes(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.db.sqlite import connection
+    from app.services import permission_broker
+
+    grant_permission(GrantPermissionRequest(permission="web.search", scope="always"), session_id="p-a")
+    grant_permission(GrantPermissionRequest(permission="clipboard.read", scope="once"), session_id="p-b")
+    assert check_permission("web.search", session_id="p-b")[0] is True
+    assert {g.permission for g in permission_broker.list_grants("p-b")} == {"web.search", "clipboard.read"}
+    # Another worker process revokes one grant and consumes the other, bypassing this cache.
+    with connection() as conn:
+        conn.execute("DELETE FROM permission_grants")
+    assert check_permission("clipboard.read", session_id="p-b") == (False, "No grant found")
+    monkeypatch.setattr(permission_broker, "GRANT_CACHE_TTL_SECONDS", 0.0)
+    assert check_permission("web.search", session_id="p-b")[0] is False
+
+
+def test_once_grant_is_consumed_after_the_cache_reloads(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.db.sqlite import read_connection
+    from app.services import permission_broker
+
+    monkeypatch.setattr(permission_broker, "GRANT_CACHE_TTL_SECONDS", 0.0)
+    grant_permission(GrantPermissionRequest(permission="clipboard.read", scope="once"), session_id="p-c")
+    assert check_permission("clipboard.read", session_id="p-c") == (True, "Granted")
+    with read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM permission_grants WHERE session_id = 'p-c'").fetchone()[0] == 0
+    assert check_permission("clipboard.read", session_id="p-c") == (False, "No grant found")
+
+
+def test_scope_trie_matches_component_boundaries(tmp_path: Path) -> None:
+    from app.services.path_security import compile_scopes
+
+    trie = compile_scopes([str(tmp_path / "data"), str(tmp_path / "data" / "nested")])
+    assert compile_scopes([str(tmp_path / "data"), str(tmp_path / "data" / "nested")]) is trie
+    assert trie.match((tmp_path / "data" / "nested" / "a.txt").resolve()) == (tmp_path / "data").resolve()
+    assert trie.match((tmp_path / "data2" / "a.txt").resolve()) is None
+    assert path_within_scopes(str(tmp_path / "data2" / "a.txt"), trie)[0] is False
+
+
+def test_reparse_checks_memoized_across_batch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.services import path_security
+
+    nested = tmp_path / "scope" / "a" / "b"
+    nested.mkdir(parents=True)
+    files = []
+    for idx in range(50):
+        item = nested / f"f{idx}.txt"
+        item.write_text("x", encoding="utf-8")
+        files.append(item)
+    calls: list[Path] = []
+    real = path_security._is_reparse_point
+
+    def counting(path: Path) -> bool:
+        calls.append(path)
+        return real(path)
+
+    path_security.clear_reparse_memo()
+    monkeypatch.setattr(path_security, "_is_reparse_point", counting)
+    scopes = [str(tmp_path / "scope")]
+    assert all(path_within_scopes(str(item), scopes)[0] for item in files)
+    # Each file is checked once; the shared parent directories only once overall.
+    assert len(calls) == len(files) + 2
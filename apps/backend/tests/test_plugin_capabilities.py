@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.models.schemas import WorkflowResponse
+from app.plugins.base import NO_CAPABILITIES, PluginCapabilities, plugin_capabilities
+from app.plugins.registry import PLUGIN_REGISTRY, refresh_local_plugins
+from app.services import plugins_local, policy_guard, tool_runner, workflow_engine
+from app.services.plugins_local import PluginCatalog
+from app.services.tool_cache import fingerprint
+from app.services.tool_pool import WorkerPool
+from app.services.tool_runner import run_tool, tool_route
+from app.services.workflow_engine import run_workflow
+
+UPPER_SOURCE = """
+from pathlib import Path
+
+Path(__file__).with_name("loaded").write_text("yes")
+
+
+class Upper:
+    name = "upper"
+    description = "upper-case text"
+    input_schema = {"type": "object"}
+    permission_requirements = []
+
+    def run(self, payload):
+        return {"text": payload["text"].upper()}
+
+
+PLUGIN = Upper()
+"""
+
+
+def test_capabilities_parse_and_default_to_nothing() -> None:
+    caps = PluginCapabilities.from_dict({"pure": True, "cacheable_by": "path", "max_concurrency": 0, "expected_cost": "high"})
+    assert caps.read_only and caps.cacheable and caps.cacheable_by == ("path",) and caps.max_concurrency == 1
+    assert not PluginCapabilities(read_only=True).cacheable
+    assert not PluginCapabilities(pure=True, streams_output=True).cacheable
+    assert plugin_capabilities(object()) is NO_CAPABILITIES
+    assert plugin_capabilities(type("P", (), {"capabilities": {"expected_cost": "huge"}})()) is NO_CAPABILITIES
+
+
+def test_builtin_declarations_drive_cache_and_routing(tmp_path: Path) -> None:
+    caps = {name: plugin_capabilities(plugin) for name, plugin in PLUGIN_REGISTRY.items()}
+    assert all(caps[name].read_only for name in ("file_read", "file_read_batch", "file_list", "file_grep"))
+    assert caps["file_write"].max_concurrency == 1 and not caps["file_write"].read_only
+    assert tool_route(caps["file_grep"]) == "heavy" and tool_route(caps["file_read"]) == "default"
+    assert fingerprint("file_grep", {"path": str(tmp_path), "pattern": "x"}, str(tmp_path)) is None
+    assert fingerprint("file_read_batch", {"paths": ["a", "b"]}, str(tmp_path)) is not None
+    # Capabilities passed in take precedence over the registry's.
+    assert fingerprint("file_write", {"path": "a"}, str(tmp_path), PluginCapabilities(read_only=True, cacheable_by=("path",)))
+
+
+def test_local_manifest_capabilities_cache_and_route_calls(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    directory = tmp_path / "upper"
+    directory.mkdir()
+    (directory / "plugin.py").write_text(UPPER_SOURCE, encoding="utf-8")
+    capabilities = {"pure": True, "max_concurrency": 1, "expected_cost": "high"}
+    (directory / "manifest.json").write_text(json.dumps({"entrypoint": "plugin.py", "name": "upper", "capabilities": capabilities}), encoding="utf-8")
+    monkeypatch.setattr(plugins_local, "_catalog", PluginCatalog(tmp_path))
+    monkeypatch.setitem(policy_guard.MODE_TOOL_ALLOWLIST, "workflow", policy_guard.MODE_TOOL_ALLOWLIST["workflow"] | {"upper"})
+    calls: list[tuple[str, dict]] = []
+
+    class InlinePool:
+        def __init__(self, route: str) -> None:
+            self.route = route
+
+        def call(self, request, timeout):
+            calls.append((self.route, request))
+            return {"ok": True, "result": PLUGIN_REGISTRY["upper"].run(request["args"])}
+
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": InlinePool(route))
+    try:
+        refresh_local_plugins()
+        assert PLUGIN_REGISTRY["upper"].capabilities == PluginCapabilities.from_dict(capabilities)
+        assert not (directory / "loaded").exists()
+        first = run_tool("upper", {"text": "abc"}, session_id="caps", safe_mode=False, mode="workflow")
+        second = run_tool("upper", {"text": "abc"}, session_id="caps", safe_mode=False, mode="workflow")
+        assert first == second == {"text": "ABC"} and len(calls) == 1
+        route, request = calls[0]
+        assert route == "heavy" and request["max_concurrency"] == 1
+    finally:
+        for item in directory.iterdir():
+            item.unlink()
+        directory.rmdir()
+        refresh_local_plugins()
+
+
+def test_pool_gate_caps_concurrent_calls_per_tool() -> None:
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    class FakeWorker:
+        calls = 0
+        generation = 0
+
+        def alive(self) -> bool:
+            return True
+
+        def call(self, request, timeout):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return {"ok": True, "result": {}}
+
+        def close(self) -> None:
+            pass
+
+    pool = WorkerPool(FakeWorker, size=4)
+
+    def run(limit: int | None) -> int:
+        peak[0] = 0
+        request = {"tool": "file_write", "max_concurrency": limit}
+        threads = [threading.Thread(target=pool.call, args=(request, 5)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return peak[0]
+
+    assert run(1) == 1
+    assert run(None) > 1
+
+
+@pytest.mark.anyio
+async def test_workflow_runs_independent_read_only_steps_concurrently(anyio_backend_name, monkeypatch: pytest.MonkeyPatch) -> None:
+    if anyio_backend_name != "asyncio":
+        pytest.skip("Concurrent steps apply to the asyncio runtime")
+    import asyncio
+
+    active, peak, order = [0], [0], []
+
+    async def fake_run_tool(tool, args, **kwargs):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        order.append(tool)
+        return {"tool": tool, "args": args}
+
+    monkeypatch.setattr(workflow_engine, "run_tool_async", fake_run_tool)
+    workflow = WorkflowResponse(
+        id="w-caps",
+        name="concurrent",
+        description="test",
+        definition={
+            "steps": [
+                {"id": "a", "type": "call_tool", "tool_name": "file_read", "input_template": {"path": "a.txt"}},
+                {"id": "b", "type": "call_tool", "tool_name": "file_list", "input_template": {"path": "."}},
+                {"id": "c", "type": "call_tool", "tool_name": "file_read", "input_template": {"path": "{{vars.a.args.path}}"}},
+                {"id": "w", "type": "call_tool", "tool_name": "file_write", "input_template": {"path": "out.txt"}},
+            ]
+        },
+    )
+    out = await run_workflow(workflow, {}, session_id="wf-caps", safe_mode=False)
+    assert peak[0] == 2
+    assert out["vars"]["c"]["args"] == {"path": "a.txt"}
+    assert order[-2:] == ["file_read", "file_write"]
+
+
+def test_whole_vars_reference_depends_on_every_earlier_step() -> None:
+    steps = [
+        {"id": "a", "type": "call_tool", "tool_name": "file_read", "input_template": {"path": "a.txt"}},
+        {"id": "b", "type": "call_tool", "tool_name": "file_read", "input_template": {"path": "{{ vars }}"}},
+    ]
+    assert workflow_engine._template_refs(steps[1]["input_template"]) == {workflow_engine._ALL_VARS}
+    assert [step["id"] for step in workflow_engine._tool_batch(steps, 0)] == ["a"]
+    assert [step["id"] for step in workflow_engine._tool_batch(steps, 1)] == ["b"]
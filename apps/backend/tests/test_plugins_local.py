@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.db.sqlite import read_connection
+from app.plugins.registry import PLUGIN_REGISTRY, plugin_index, refresh_local_plugins
+from app.services import plugins_local
+from app.services.plugins_local import PluginCatalog
+
+PLUGIN_SOURCE = """
+from pathlib import Path
+
+Path(__file__).with_name("loaded").write_text("yes")
+
+
+class Plugin:
+    name = {name!r}
+    description = "test plugin"
+    input_schema = {{"type": "object"}}
+    permission_requirements = []
+
+    def run(self, payload):
+        return {{"value": {value!r}, "module": __name__}}
+
+
+PLUGIN = Plugin()
+"""
+
+
+def _install(root: Path, name: str, value: str = "v1", **manifest) -> Path:
+    directory = root / name
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = directory / "plugin.py"
+    entry.write_text(PLUGIN_SOURCE.format(name=name, value=value), encoding="utf-8")
+    (directory / "manifest.json").write_text(json.dumps({"entrypoint": "plugin.py", "name": name, "version": "1.0", **manifest}), encoding="utf-8")
+    return entry
+
+
+def _bump(path: Path) -> None:
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_catalog_loads_lazily_under_unique_module_names(tmp_path: Path) -> None:
+    _install(tmp_path, "alpha")
+    _install(tmp_path, "beta", value="b")
+    _install(tmp_path, "off", enabled=False)
+    catalog = PluginCatalog(tmp_path)
+    plugins = catalog.refresh()
+    assert sorted(plugins) == ["alpha", "beta"]
+    assert not (tmp_path / "alpha" / "loaded").exists()
+
+    alpha, beta = plugins["alpha"].run({}), plugins["beta"].run({})
+    assert alpha["module"] != beta["module"] and beta["value"] == "b"
+    assert alpha["module"] in sys.modules and (tmp_path / "alpha" / "loaded").exists()
+    assert catalog.plugins.loaded() == ["alpha", "beta"]
+
+
+def test_manifests_are_cached_by_mtime(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    _install(tmp_path, "alpha")
+    catalog = PluginCatalog(tmp_path)
+    parsed = []
+    original = catalog._parse
+    monkeypatch.setattr(catalog, "_parse", lambda *args: parsed.append(args[0]) or original(*args))
+    first = catalog.refresh()
+    assert catalog.refresh()["alpha"] is first["alpha"] and len(parsed) == 1
+
+    manifest = tmp_path / "alpha" / "manifest.json"
+    manifest.write_text(json.dumps({"entrypoint": "plugin.py", "name": "alpha", "version": "2.0"}), encoding="utf-8")
+    _bump(manifest)
+    assert catalog.refresh()["alpha"].entry.version == "2.0" and len(parsed) == 2
+    with read_connection() as conn:
+        rows = conn.execute("SELECT version FROM plugin_registry WHERE name = 'alpha'").fetchall()
+    assert [row["version"] for row in rows] == ["2.0"]
+
+
+def test_entrypoint_changes_hot_reload(tmp_path: Path) -> None:
+    entry = _install(tmp_path, "alpha")
+    plugin = PluginCatalog(tmp_path).refresh()["alpha"]
+    assert plugin.run({})["value"] == "v1"
+    entry.write_text(PLUGIN_SOURCE.format(name="alpha", value="v2"), encoding="utf-8")
+    _bump(entry)
+    assert plugin.run({})["value"] == "v2"
+
+
+def test_manifest_name_must_match_the_plugin(tmp_path: Path) -> None:
+    renamed = _install(tmp_path, "alpha").with_name("manifest.json")
+    renamed.write_text(json.dumps({"entrypoint": "plugin.py", "name": "renamed"}), encoding="utf-8")
+    legacy = _install(tmp_path, "legacy-dir").with_name("manifest.json")
+    legacy.write_text(json.dumps({"entrypoint": "plugin.py"}), encoding="utf-8")
+    legacy.with_name("plugin.py").write_text(PLUGIN_SOURCE.format(name="legacy", value="old"), encoding="utf-8")
+    plugins = PluginCatalog(tmp_path).refresh()
+    # Manifests without a name keep the plugin object's name, as before the catalog.
+    assert sorted(plugins) == ["legacy", "renamed"] and plugins["legacy"].run({})["value"] == "old"
+    assert not (tmp_path / "alpha" / "loaded").exists()
+    with pytest.raises(RuntimeError, match="'alpha', but its manifest says 'renamed'"):
+        plugins["renamed"].run({})
+
+
+def test_refresh_cost_stays_flat_with_many_plugins(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    for index in range(150):
+        _install(tmp_path, f"p{index}")
+    catalog = PluginCatalog(tmp_path)
+    catalog.refresh()
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("unchanged manifests should not be re-read")
+
+    monkeypatch.setattr(catalog, "_parse", no_parse)
+    assert len(catalog.refresh()) == 150
+    assert not any((tmp_path / f"p{index}" / "loaded").exists() for index in range(150))
+
+
+def test_registry_syncs_local_plugins(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(plugins_local, "_catalog", PluginCatalog(tmp_path))
+    _install(tmp_path, "gamma")
+    _install(tmp_path, "file_read")
+    try:
+        assert refresh_local_plugins() is True
+        assert PLUGIN_REGISTRY["gamma"].run({})["value"] == "v1"
+        assert type(PLUGIN_REGISTRY["file_read"]).__name__ == "FileReadPlugin"
+        assert plugin_index()["gamma"]["path"] == str(tmp_path / "gamma" / "plugin.py")
+        assert refresh_local_plugins() is False
+    finally:
+        for item in (tmp_path / "gamma").iterdir():
+            item.unlink()
+        (tmp_path / "gamma").rmdir()
+        assert refresh_local_plugins() is True
+    assert "gamma" not in PLUGIN_REGISTRY
@@ -1,4 +1,4 @@
-from app.services.policy_dsl import apply_limit_overrides, evaluate_effect, parse_policy
+from app.services.policy_dsl import apply_limit_overrides, compile_policy, evaluate_effect, parse_policy
 
 
 def test_policy_parse_and_effects() -> None:
@@ -20,3 +20,72 @@ def test_policy_limit_override() -> None:
     base = {"max_tool_calls_per_message": 5}
     updated = apply_limit_overrides(base, parsed.limits, profile="LockedDown", workspace=None)
     assert updated["max_tool_calls_per_message"] == 2
+
+
+def test_compiled_policy_matches_linear_evaluation() -> None:
+    text = """
+    allow(web.search) only in profile=Research
+    deny(Web.Search) in workspace=Locked
+    deny(process.run) unless confirm
+    max_tool_calls_per_message = 2 in profile=LockedDown
+    """
+    parsed = parse_policy(text)
+    compiled = compile_policy(text)
+    for action in ("web.search", "WEB.SEARCH", "process.run", "tool.file_read"):
+        for profile, workspace in (("research", None), ("Research", "locked"), (None, None)):
+            for confirmed in (False, True):
+                expected = evaluate_effect(parsed.effects, action, profile, workspace, confirmed=confirmed)
+                assert compiled.decide(action, profile, workspace, confirmed=confirmed) == expected
+    base = {"max_tool_calls_per_message": 5}
+    assert compiled.apply_limits(base, "lockeddown", None) == {"max_tool_calls_per_message": 2}
+    assert compiled.apply_limits(base, "Default", None) == base
+
+
+def test_compiled_policy_cached_by_text_hash() -> None:
+    text = "deny(tool.file_write) always\nmax_runtime_seconds = 30"
+    compiled = compile_policy(text)
+    assert compile_policy(str(text)) is compiled
+    plan = compiled.plan()
+    assert plan["actions"]["tool.file_write"][0]["effect"] == "deny"
+    assert plan["limits"] == [
+        {"key": "max_runtime_seconds", "value": 30, "profile": None, "workspace": None, "require_confirm": False}
+    ]
+
+
+def test_wildcard_actions_most_specific_wins() -> None:
+    text = """
+    deny(tool.*)
+    allow(tool.file_*)
+    deny(tool.file_write)
+    allow(web.**)
+    deny(web.fetch.*) in workspace=Locked
+    """
+    parsed = parse_policy(text)
+    assert parsed.errors == []
+    compiled = compile_policy(text)
+    expectations = {
+        ("tool.process_run", None): "deny",
+        ("tool.file_read", None): "allow",
+        ("tool.file_write", None): "deny",
+        ("tool.file.nested", None): None,
+        ("web.search", None): "allow",
+        ("web.fetch.page", None): "allow",
+        ("web.fetch.page", "Locked"): "deny",
+        ("web", None): None,
+    }
+    for (action, workspace), expected in expectations.items():
+        assert compiled.decide(action, None, workspace) == expected, action
+        assert evaluate_effect(parsed.effects, action, None, workspace) == expected, action
+
+
+def test_deny_short_circuits_within_same_pattern() -> None:
+    text = "allow(tool.*)\ndeny(tool.*) only in profile=LockedDown"
+    compiled = compile_policy(text)
+    assert compiled.decide("tool.file_read", "LockedDown", None) == "deny"
+    assert compiled.decide("tool.file_read", "Default", None) == "allow"
+
+
+def test_invalid_action_patterns_are_reported() -> None:
+    parsed = parse_policy("deny(web.**.search)\nallow(tool.f*le)\ndeny(tool..x)")
+    assert len(parsed.errors) == 3
+    assert parsed.effects == []
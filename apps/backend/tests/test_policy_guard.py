@@ -1,5 +1,7 @@
+from app.services.limits import build_run_limiter
 from app.services.policy_guard import policy_allows_action
-from app.services.settings_profiles import activate_profile, create_profile
+from app.services.settings_profiles import activate_profile, create_profile, update_profile
+from app.services.settings_service import get_effective_settings
 
 
 def test_policy_guard_denies_when_rule_matches() -> None:
@@ -8,3 +10,13 @@ def test_policy_guard_denies_when_rule_matches() -> None:
     allowed, reason = policy_allows_action("tool.file_write")
     assert allowed is False
     assert "Policy denied" in reason
+
+
+def test_policy_guard_recompiles_when_profile_changes() -> None:
+    prof = create_profile("GuardReload", {"policy_rules": "deny(tool.file_write) always"})
+    activate_profile(prof["id"])
+    assert policy_allows_action("tool.file_write")[0] is False
+    update_profile(prof["id"], payload={"policy_rules": "max_tool_calls_per_message = 1"})
+    assert policy_allows_action("tool.file_write")[0] is True
+    limiter = build_run_limiter(get_effective_settings().model_dump(), session_id="guard-reload")
+    assert limiter.max_tool_calls_per_message == 1
@@ -0,0 +1,113 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.db.sqlite import connection, read_connection
+from app.models.schemas import GrantPermissionRequest, SettingsUpdateRequest
+from app.plugins.file_read import FileReadPlugin
+from app.services import quarantine, tool_runner
+from app.services.permission_broker import grant_permission
+from app.services.quarantine import gc_quarantine, quarantine_file, quarantine_paths
+from app.services.settings_service import update_settings
+from app.services.tool_runner import run_tool
+from app.services.workspaces import activate_workspace, create_workspace
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    root = tmp_path / "quarantine"
+    monkeypatch.setattr(quarantine, "QUARANTINE_DIR", root)
+    return root
+
+
+def _rows() -> dict[str, str]:
+    with read_connection() as conn:
+        return {row["hash"]: row["method"] for row in conn.execute("SELECT hash, method FROM quarantine_objects")}
+
+
+def test_objects_are_content_addressed_and_deduplicated(tmp_path: Path) -> None:
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "data.bin").write_bytes(b"\xff\xfe binary \x00")
+    (tmp_path / "b" / "data.bin").write_bytes(b"other")
+    (tmp_path / "b" / "copy.bin").write_bytes(b"\xff\xfe binary \x00")
+    first, second, same = quarantine_paths([str(tmp_path / "a" / "data.bin"), str(tmp_path / "b" / "data.bin"), str(tmp_path / "b" / "copy.bin")])
+    assert first != second and first == same
+    assert Path(first).read_bytes() == b"\xff\xfe binary \x00"
+    assert len(_rows()) == 2
+    assert quarantine_paths([str(tmp_path / "missing")]) == [str(tmp_path / "missing")]
+
+
+def test_unchanged_source_is_not_rehashed(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    source = tmp_path / "big.log"
+    source.write_bytes(b"x" * (3 * quarantine.COPY_CHUNK_BYTES + 5))
+    hashed = []
+    original = quarantine._hash_file
+    monkeypatch.setattr(quarantine, "_hash_file", lambda path: hashed.append(path) or original(path))
+    assert quarantine_file(str(source)) == quarantine_file(str(source))
+    assert len(hashed) == 1
+
+
+def test_hardlink_is_preferred_and_edits_are_detected(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(quarantine, "_reflink", lambda src, dst: False)
+    source = tmp_path / "notes.txt"
+    source.write_text("v1", encoding="utf-8")
+    stored = quarantine_file(str(source))
+    assert os.stat(stored).st_ino == os.stat(source).st_ino
+    assert set(_rows().values()) == {"hardlink"}
+
+    with source.open("w", encoding="utf-8") as handle:
+        handle.write("version 2")
+    os.utime(source, ns=(time.time_ns(), time.time_ns() + 10**9))
+    updated = quarantine_file(str(source))
+    assert updated != stored and updated.read_text(encoding="utf-8") == "version 2"
+
+
+def test_streaming_copy_fallback(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(quarantine, "_reflink", lambda src, dst: False)
+    monkeypatch.setattr(quarantine, "_hardlink", lambda src, dst: False)
+    source = tmp_path / "data.bin"
+    source.write_bytes(os.urandom(2 * quarantine.COPY_CHUNK_BYTES + 17))
+    stored = quarantine_file(str(source))
+    assert stored.read_bytes() == source.read_bytes() and os.stat(stored).st_ino != os.stat(source).st_ino
+    assert set(_rows().values()) == {"copy"}
+
+
+def test_gc_removes_expired_objects_and_legacy_dirs(store: Path, tmp_path: Path) -> None:
+    (tmp_path / "old.txt").write_text("old", encoding="utf-8")
+    (tmp_path / "new.txt").write_text("new", encoding="utf-8")
+    old, new = (quarantine_file(str(tmp_path / name)) for name in ("old.txt", "new.txt"))
+    legacy = store / "session-1"
+    legacy.mkdir()
+    (legacy / "old.txt").write_text("old", encoding="utf-8")
+    stale = time.time() - quarantine.QUARANTINE_TTL_SECONDS - 60
+    os.utime(legacy, (stale, stale))
+    with connection() as conn:
+        conn.execute("UPDATE quarantine_objects SET last_used = ? WHERE hash = ?", (stale, old.name))
+    assert gc_quarantine() == 1
+    assert not old.exists() and new.exists() and not legacy.exists()
+    assert list(_rows()) == [new.name]
+
+
+def test_quarantine_mode_reads_out_of_scope_files_from_store(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    class InlinePool:
+        def call(self, request, timeout):
+            return {"ok": True, "result": FileReadPlugin().run(request["args"])}
+
+    inside = tmp_path / "inside"
+    inside.mkdir()
+    outside = tmp_path / "outside.txt"
+    outside.write_text("café", encoding="utf-8")
+    update_settings(SettingsUpdateRequest(safe_mode_default=False, quarantine_mode=True))
+    workspace = create_workspace("quarantined", scopes=[str(inside)])
+    activate_workspace(workspace["id"])
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="q1",
+    )
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": InlinePool())
+    result = run_tool("file_read", {"path": str(outside)}, session_id="q1", safe_mode=False)
+    assert Path(result["path"]).parent.parent == quarantine.QUARANTINE_DIR / "objects"
+    assert result["content"] == "café"
@@ -0,0 +1,24 @@
+from app.models.schemas import SettingsUpdateRequest
+from app.services.settings_cache import settings_generation
+from app.services.settings_service import get_effective_settings, update_settings
+from app.services.workspaces import activate_workspace, create_workspace, update_workspace
+
+
+def test_effective_settings_cached_until_write() -> None:
+    first = get_effective_settings()
+    assert get_effective_settings() is first
+
+    before = settings_generation()
+    update_settings(SettingsUpdateRequest(verbose_logging=not first.verbose_logging))
+    assert settings_generation() > before
+    updated = get_effective_settings()
+    assert updated is not first
+    assert updated.verbose_logging is (not first.verbose_logging)
+
+
+def test_workspace_changes_invalidate_effective_settings() -> None:
+    ws = create_workspace(name="Cached", settings={"max_tool_calls_per_message": 7})
+    activate_workspace(ws["id"])
+    assert get_effective_settings().max_tool_calls_per_message == 7
+    update_workspace(ws["id"], settings={"max_tool_calls_per_message": 2})
+    assert get_effective_settings().max_tool_calls_per_message == 2
@@ -0,0 +1,64 @@
+import timeit
+
+import pytest
+
+from app.services.settings_registry import (
+    DEFAULT_SETTINGS,
+    SettingsPayload,
+    registry_defaults,
+    validate_changes,
+    validate_payload,
+)
+
+
+def test_compiled_validator_matches_pydantic_coercion() -> None:
+    payload = {
+        **registry_defaults(),
+        "max_tool_calls_per_message": "7",
+        "thinkbox_size_percent": 30.0,
+        "verbose_logging": "yes",
+        "quarantine_mode": 0,
+        "search_provider": "manual",
+        "unknown_key": "dropped",
+    }
+    assert validate_payload(payload) == SettingsPayload(**payload).model_dump()
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"search_provider": "bing"},
+        {"ollama_fallback_mode": "nope"},
+        {"max_runtime_seconds": 1.5},
+        {"privacy_mode": "maybe"},
+        {"policy_rules": 5},
+    ],
+)
+def test_compiled_validator_rejects_invalid_values(changes: dict) -> None:
+    with pytest.raises(ValueError):
+        validate_payload(changes)
+
+
+def test_validate_changes_returns_immutable_snapshot() -> None:
+    snapshot = validate_changes(DEFAULT_SETTINGS, {"ui_density": "compact"})
+    assert snapshot["ui_density"] == "compact"
+    assert DEFAULT_SETTINGS["ui_density"] == "comfortable"
+    with pytest.raises(TypeError):
+        snapshot["ui_density"] = "comfortable"  # type: ignore[index]
+
+
+def test_validate_changes_matches_pydantic_round_trip() -> None:
+    full = {**registry_defaults(), "max_tool_calls_per_message": "7", "ui_density": "compact"}
+    changes = {"max_tool_calls_per_message": "7", "ui_density": "compact"}
+    assert dict(validate_changes(DEFAULT_SETTINGS, changes)) == SettingsPayload(**full).model_dump()
+
+
+def test_compiled_validator_benchmark_against_pydantic_round_trip(record_property) -> None:
+    full = {**registry_defaults(), "max_tool_calls_per_message": "7", "ui_density": "compact"}
+    changes = {"max_tool_calls_per_message": "7", "ui_density": "compact"}
+    rounds = 500
+    pydantic_time = min(timeit.repeat(lambda: SettingsPayload(**full).model_dump(), number=rounds, repeat=3))
+    compiled_time = min(timeit.repeat(lambda: validate_changes(DEFAULT_SETTINGS, changes), number=rounds, repeat=3))
+    # Recorded for the JUnit report rather than asserted, since timings vary between machines.
+    record_property("pydantic_round_trip_us", round(pydantic_time / rounds * 1e6, 1))
+    record_property("compiled_delta_us", round(compiled_time / rounds * 1e6, 1))
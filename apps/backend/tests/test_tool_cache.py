@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.models.schemas import GrantPermissionRequest
+from app.plugins.file_list import FileListPlugin
+from app.services import tool_runner
+from app.services.permission_broker import grant_permission, revoke_permission
+from app.services.tool_cache import ToolResultCache, cache_key, fingerprint, get_tool_cache
+from app.services.tool_runner import run_tool
+
+
+class CountingPool:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def call(self, request, timeout):
+        self.calls += 1
+        path = Path(request["args"]["path"])
+        content = path.read_text(encoding="utf-8")
+        return {"ok": True, "result": {"path": str(path), "content": content}, "stdout": "", "stderr": ""}
+
+
+def _grant(tmp_path: Path, session_id: str) -> None:
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id=session_id,
+    )
+
+
+def test_fingerprint_tracks_size_mtime_and_inode(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("one", encoding="utf-8")
+    args = {"path": str(target)}
+    before = fingerprint("file_read", args, str(tmp_path))
+    assert before == fingerprint("file_read", {"path": "a.txt"}, str(tmp_path))
+    target.write_text("two", encoding="utf-8")
+    os.utime(target, ns=(1, 1))
+    assert fingerprint("file_read", args, str(tmp_path)) != before
+    assert fingerprint("file_write", args, str(tmp_path)) is None
+    assert cache_key("file_read", args, str(tmp_path)) == cache_key("file_read", {"path": "a.txt"}, str(tmp_path))
+
+
+def test_listing_fingerprint_sees_nested_changes(tmp_path: Path) -> None:
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    before = fingerprint("file_list", {"path": str(tmp_path)}, str(tmp_path))
+    (nested / "new.txt").write_text("x", encoding="utf-8")
+    os.utime(nested, ns=(1, 1))
+    assert fingerprint("file_list", {"path": str(tmp_path)}, str(tmp_path)) != before
+
+
+def test_cache_evicts_by_byte_budget() -> None:
+    cache = ToolResultCache(max_bytes=100, max_entries=10)
+    taken = (("p", (1, 1, 1)),)
+    cache.store("a", taken, {"content": "x" * 40}, "ha")
+    cache.store("b", taken, {"content": "y" * 40}, "hb")
+    assert cache.lookup("a", taken) is None
+    assert cache.lookup("b", taken) == ({"content": "y" * 40}, "hb")
+    cache.store("huge", taken, {"content": "z" * 500}, "hz")
+    assert cache.stats()["entries"] == 1
+
+
+def test_repeat_read_is_served_from_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    target = tmp_path / "x.txt"
+    target.write_text("cached", encoding="utf-8")
+    _grant(tmp_path, "c1")
+    pool = CountingPool()
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": pool)
+    events: list[dict] = []
+    monkeypatch.setattr(tool_runner, "log_event", lambda kind, message, payload, session_id=None: events.append(payload))
+
+    first = run_tool("file_read", {"path": str(target)}, session_id="c1", safe_mode=False, mode="workflow")
+    second = run_tool("file_read", {"path": str(target)}, session_id="c1", safe_mode=False, mode="workflow")
+    assert first == second and pool.calls == 1
+    assert [e["cache"] for e in events] == ["miss", "hit"]
+    assert events[-1]["cache_hits"] == 1 and events[0]["result_hash"] == events[1]["result_hash"]
+
+    target.write_text("changed!", encoding="utf-8")
+    third = run_tool("file_read", {"path": str(target)}, session_id="c1", safe_mode=False, mode="workflow")
+    assert third["content"] == "changed!" and pool.calls == 2
+    assert get_tool_cache().stats()["misses"] == 2
+
+
+def test_cache_hit_still_requires_permission(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    target = tmp_path / "x.txt"
+    target.write_text("secret", encoding="utf-8")
+    _grant(tmp_path, "c2")
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": CountingPool())
+    run_tool("file_read", {"path": str(target)}, session_id="c2", safe_mode=False, mode="workflow")
+    revoke_permission("filesystem.read", "c2")
+    with pytest.raises(PermissionError):
+        run_tool("file_read", {"path": str(target)}, session_id="c2", safe_mode=False, mode="workflow")
+    assert get_tool_cache().stats()["hits"] == 0
+
+
+def test_listing_is_refreshed_after_in_place_edit(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    target = tmp_path / "notes.txt"
+    target.write_text("one", encoding="utf-8")
+    _grant(tmp_path, "c3")
+
+    class ListPool:
+        def call(self, request, timeout):
+            return {"ok": True, "result": FileListPlugin().run(request["args"])}
+
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": ListPool())
+    dir_mtime = os.stat(tmp_path).st_mtime_ns
+    first = run_tool("file_list", {"path": str(tmp_path)}, session_id="c3", safe_mode=False, mode="workflow")
+    with target.open("a", encoding="utf-8") as handle:
+        handle.write(" and two")
+    os.utime(tmp_path, ns=(dir_mtime, dir_mtime))
+    second = run_tool("file_list", {"path": str(tmp_path)}, session_id="c3", safe_mode=False, mode="workflow")
+    assert first["entries"][0]["size"] == 3 and second["entries"][0]["size"] == 11
+    assert get_tool_cache().stats()["hits"] == 0
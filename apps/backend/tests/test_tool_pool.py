@@ -0,0 +1,197 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.services import tool_runner
+from app.services.tool_pool import ToolWorker, WorkerCrashed, WorkerPool, WorkerTimeout
+from app.services.tool_protocol import (
+    FrameError,
+    OutputLimitExceeded,
+    encode_frame,
+    encode_response,
+    read_frame,
+    read_response,
+    result_digest,
+)
+
+
+def _request(path: Path) -> dict:
+    return {"tool": "file_read", "args": {"path": str(path)}, "cwd": str(path.parent), "output_limit": 10_000}
+
+
+def test_frames_round_trip_and_reject_truncation() -> None:
+    stream = io.BytesIO(encode_frame({"a": "line\nbreak"}) + encode_frame({"b": 2}))
+    assert read_frame(stream) == {"a": "line\nbreak"}
+    assert read_frame(stream) == {"b": 2}
+    assert read_frame(stream) is None
+    with pytest.raises(FrameError):
+        read_frame(io.BytesIO(b"10\n{}"))
+
+
+def test_large_strings_travel_as_raw_blob_frames() -> None:
+    content = "line \"quoted\"\n" * 2000
+    response = {"ok": True, "result": {"content": content, "items": [{"content": "small"}]}}
+    encoded = encode_response(response)
+    # Quotes and newlines are not escaped, so the wire size tracks the raw size.
+    assert len(encoded) < len(content.encode("utf-8")) + 200
+    assert read_response(io.BytesIO(encoded)) == response
+
+
+def test_read_cap_is_enforced_before_buffering() -> None:
+    encoded = encode_response({"ok": True, "result": {"content": "x" * 50_000}})
+    stream = io.BytesIO(encoded)
+    with pytest.raises(OutputLimitExceeded):
+        read_response(stream, max_bytes=10_000)
+    # Only the header frame was consumed; the oversized blob was never read.
+    assert stream.tell() < 200
+
+
+def test_worker_returns_result_digest(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("y" * 20_000, encoding="utf-8")
+    pool = WorkerPool(tool_runner._spawn_worker, size=1)
+    try:
+        request = {**_request(target), "output_limit": 100_000}
+        response = pool.call(request, timeout=30)
+        assert response["result"]["content"] == "y" * 20_000
+        assert response["result_hash"] == result_digest(response["result"])
+    finally:
+        pool.shutdown()
+
+
+def test_oversized_reply_kills_worker(tmp_path: Path) -> None:
+    flood = "import sys; sys.stdin.buffer.readline(); sys.stdout.buffer.write(b'999999\\n' + b'x' * 999999); sys.stdout.flush()"
+
+    def spawn() -> ToolWorker:
+        return ToolWorker([sys.executable, "-c", flood], env=tool_runner._safe_env(), cwd=tmp_path)
+
+    pool = WorkerPool(spawn, size=1)
+    with pytest.raises(OutputLimitExceeded):
+        pool.call({"tool": "noop", "output_limit": 10_000}, timeout=10)
+    assert pool.idle_pids() == []
+
+
+def test_pool_recycles_after_max_calls(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("hello", encoding="utf-8")
+    pool = WorkerPool(tool_runner._spawn_worker, size=1, max_calls=2)
+    try:
+        assert pool.call(_request(target), timeout=30)["result"]["content"] == "hello"
+        first_pid = pool.idle_pids()
+        pool.call(_request(target), timeout=30)
+        assert pool.idle_pids() == []  # recycled after two calls
+        pool.call(_request(target), timeout=30)
+        assert pool.idle_pids() != first_pid
+    finally:
+        pool.shutdown()
+
+
+def test_pool_replaces_crashed_worker(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("hello", encoding="utf-8")
+    pool = WorkerPool(tool_runner._spawn_worker, size=1)
+    try:
+        pool.call(_request(target), timeout=30)
+        crashed = pool._idle[0]
+        crashed.kill()
+        assert pool.call(_request(target), timeout=30)["ok"] is True
+        assert pool.idle_pids() != [crashed.pid]
+    finally:
+        pool.shutdown()
+
+
+def test_worker_errors_and_output_limit(tmp_path: Path) -> None:
+    pool = WorkerPool(tool_runner._spawn_worker, size=1)
+    try:
+        missing = pool.call(_request(tmp_path / "missing.txt"), timeout=30)
+        assert missing["ok"] is False
+        big = tmp_path / "big.txt"
+        big.write_text("x" * 50_000, encoding="utf-8")
+        over = pool.call(_request(big), timeout=30)
+        assert over["ok"] is False and "exceeded" in over["error"]
+    finally:
+        pool.shutdown()
+
+
+def test_hung_worker_is_killed_on_timeout(tmp_path: Path) -> None:
+    def spawn() -> ToolWorker:
+        return ToolWorker([sys.executable, "-c", "import time; time.sleep(60)"], env=tool_runner._safe_env(), cwd=tmp_path)
+
+    pool = WorkerPool(spawn, size=1)
+    with pytest.raises(WorkerTimeout):
+        pool.call({"tool": "noop"}, timeout=0.2)
+    assert pool.idle_pids() == []
+
+    def exiting() -> ToolWorker:
+        return ToolWorker([sys.executable, "-c", "pass"], env=tool_runner._safe_env(), cwd=tmp_path)
+
+    with pytest.raises(WorkerCrashed):
+        WorkerPool(exiting, size=1).call({"tool": "noop"}, timeout=5)
+
+
+@pytest.mark.anyio
+async def test_async_call_keeps_loop_running_and_cancel_kills_worker(anyio_backend_name, tmp_path: Path) -> None:
+    if anyio_backend_name != "asyncio":
+        pytest.skip("Worker offload and cancellation apply to the asyncio runtime")
+    import asyncio
+
+    spawned: list[ToolWorker] = []
+
+    def spawn() -> ToolWorker:
+        worker = ToolWorker([sys.executable, "-c", "import time; time.sleep(60)"], env=tool_runner._safe_env(), cwd=tmp_path)
+        spawned.append(worker)
+        return worker
+
+    pool = WorkerPool(spawn, size=1)
+    task = asyncio.create_task(pool.call_async({"tool": "noop"}, timeout=30))
+    ticks = 0
+    for _ in range(10):
+        await asyncio.sleep(0.02)
+        ticks += 1
+    assert ticks == 10 and not task.done()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    for _ in range(100):
+        if spawned and spawned[0].proc.poll() is not None:
+            break
+        await asyncio.sleep(0.02)
+    assert spawned[0].proc.poll() is not None
+    assert pool.idle_pids() == []
+
+
+@pytest.mark.anyio
+async def test_run_tool_async_reads_file(tmp_path: Path) -> None:
+    from app.models.schemas import GrantPermissionRequest
+    from app.services.permission_broker import grant_permission
+
+    target = tmp_path / "x.txt"
+    target.write_text("async", encoding="utf-8")
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="async-tool",
+    )
+    try:
+        result = await tool_runner.run_tool_async(
+            "file_read", {"path": str(target)}, session_id="async-tool", safe_mode=False, mode="workflow"
+        )
+        assert result["content"] == "async"
+    finally:
+        tool_runner.shutdown_tool_pool()
+
+
+def test_pool_recycle_retires_current_workers(tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("hello", encoding="utf-8")
+    pool = WorkerPool(tool_runner._spawn_worker, size=1)
+    try:
+        pool.call(_request(target), timeout=30)
+        old = pool.idle_pids()
+        pool.recycle()
+        assert pool.idle_pids() == []
+        assert pool.call(_request(target), timeout=30)["result"]["content"] == "hello"
+        assert pool.idle_pids() and pool.idle_pids() != old
+    finally:
+        pool.shutdown()
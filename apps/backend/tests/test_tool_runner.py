@@ -1,11 +1,13 @@
 import json
-import subprocess
 from pathlib import Path
 
 import pytest
 
 from app.models.schemas import GrantPermissionRequest
+from app.services import tool_runner
 from app.services.permission_broker import grant_permission
+from app.services.tool_cache import get_tool_cache
+from app.services.tool_pool import WorkerTimeout
 from app.services.tool_runner import _truncate_output, run_tool
 
 
@@ -22,9 +24,30 @@ def test_timeout_enforced(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> No
         session_id="t1",
     )
 
-    def fake_run(*args, **kwargs):
-        raise subprocess.TimeoutExpired(cmd="python", timeout=30)
+    class TimeoutPool:
+        def call(self, request, timeout):
+            raise WorkerTimeout(f"Tool timed out after {timeout}s")
 
-    monkeypatch.setattr(subprocess, "run", fake_run)
+    monkeypatch.setattr(tool_runner, "get_tool_pool", lambda route="default": TimeoutPool())
     with pytest.raises(RuntimeError, match="timed out"):
         run_tool("file_read", {"path": str(tmp_path / "x.txt")}, session_id="t1", safe_mode=False, mode="workflow")
+
+
+def test_run_tool_uses_warm_worker(tmp_path: Path) -> None:
+    target = tmp_path / "x.txt"
+    target.write_text("pooled", encoding="utf-8")
+    grant_permission(
+        GrantPermissionRequest(permission="filesystem.read", scope="session", allowed_paths=[str(tmp_path)]),
+        session_id="t2",
+    )
+    try:
+        first = run_tool("file_read", {"path": str(target)}, session_id="t2", safe_mode=False, mode="workflow")
+        pids = tool_runner.get_tool_pool().idle_pids()
+        # Without this the second call is a result-cache hit and never reaches the pool.
+        get_tool_cache().clear()
+        second = run_tool("file_read", {"path": str(target)}, session_id="t2", safe_mode=False, mode="workflow")
+        assert first["content"] == second["content"] == "pooled"
+        assert pids and tool_runner.get_tool_pool().idle_pids() == pids
+        assert (get_tool_cache().stats()["hits"], get_tool_cache().stats()["misses"]) == (0, 1)
+    finally:
+        tool_runner.shutdown_tool_pool()
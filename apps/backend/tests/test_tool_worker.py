@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from app.plugins.loader import BUILTIN_PLUGINS, LazyPlugins, write_index
+from app.plugins.registry import PLUGIN_REGISTRY, plugin_index
+from app.services import tool_runner
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+PROBE = """
+import json, sys
+from app.services import tool_worker
+tool_worker.configure(["--index", sys.argv[1]])
+tool_worker._handle({"tool": "file_read", "args": {"path": sys.argv[2]}})
+print(json.dumps(sorted(name for name in sys.modules if name.startswith("app.") or name == "sqlite3")))
+"""
+
+
+def test_worker_imports_only_the_requested_plugin(tmp_path: Path) -> None:
+    index = tmp_path / "index.json"
+    write_index(index, plugin_index())
+    target = tmp_path / "a.txt"
+    target.write_text("hello", encoding="utf-8")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, str(index), str(target)],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(json.loads(out.stdout))
+    assert "app.plugins.file_read" in loaded
+    assert not {"sqlite3", "app.db.sqlite", "app.plugins.registry", "app.services.plugins_local"} & loaded
+    assert not {"app.plugins.file_write", "app.plugins.file_grep", "app.plugins.file_list"} & loaded
+
+
+def test_index_covers_registry_and_local_plugins_load_lazily(tmp_path: Path) -> None:
+    assert set(plugin_index()) == set(PLUGIN_REGISTRY)
+    entry = tmp_path / "echo.py"
+    entry.write_text(
+        "class Echo:\n    name = 'echo'\n    def run(self, payload):\n        return {'echo': payload}\n\nPLUGIN = Echo()\n",
+        encoding="utf-8",
+    )
+    plugins = LazyPlugins({**BUILTIN_PLUGINS, "echo": {"path": str(entry), "attr": "PLUGIN"}})
+    assert plugins.loaded() == [] and "echo" in plugins and plugins.get("missing") is None
+    assert plugins.get("echo").run({"x": 1}) == {"echo": {"x": 1}}
+    assert plugins.get("echo") is plugins.get("echo") and plugins.loaded() == ["echo"]
+
+
+def test_worker_cold_start_benchmark(record_property, tmp_path: Path) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("hello", encoding="utf-8")
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        worker = tool_runner._spawn_worker()
+        try:
+            reply = worker.call({"tool": "file_read", "args": {"path": str(target)}, "cwd": str(tmp_path)}, timeout=30)
+        finally:
+            worker.close()
+        timings.append(time.perf_counter() - started)
+        assert reply["ok"] and reply["result"]["content"] == "hello"
+    # Spawn to first reply: interpreter start plus the worker's narrow imports. Recorded for
+    # the JUnit report rather than asserted, since wall-clock time depends on the machine.
+    record_property("cold_start_ms", [round(timing * 1000, 1) for timing in timings])
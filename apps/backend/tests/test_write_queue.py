@@ -0,0 +1,73 @@
+import logging
+import sqlite3
+import uuid
+
+from app.db import write_queue
+from app.db.sqlite import read_connection
+from app.db.write_queue import WriteBehindQueue
+from app.services.audit import list_audit_logs, log_event
+
+
+def test_queue_batches_and_flushes_on_demand() -> None:
+    writer = WriteBehindQueue(interval_seconds=10, max_rows=1000)
+    ids = [str(uuid.uuid4()) for _ in range(5)]
+    for memory_id in ids:
+        writer.submit("INSERT INTO memory_items (id, kind, content) VALUES (?, 'project_fact', 'q')", (memory_id,))
+    assert writer.flush(timeout=5)
+    with read_connection() as conn:
+        rows = conn.execute(
+            f"SELECT COUNT(1) FROM memory_items WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchone()
+    assert rows[0] == 5
+    writer.stop()
+
+
+def test_bad_row_does_not_drop_batch() -> None:
+    writer = WriteBehindQueue(interval_seconds=10, max_rows=1000)
+    good = str(uuid.uuid4())
+    writer.submit("INSERT INTO memory_items (id, kind, content) VALUES (?, 'project_fact', 'ok')", (good,))
+    writer.submit("INSERT INTO missing_table (id) VALUES (?)", ("x",))
+    writer.stop()
+    with read_connection() as conn:
+        assert conn.execute("SELECT 1 FROM memory_items WHERE id = ?", (good,)).fetchone()
+
+
+def test_audit_log_reads_own_writes() -> None:
+    log_event("test.queued", "queued event", {"tool": "file_read"}, session_id="wq")
+    logs = list_audit_logs(limit=10)
+    assert any(item["event_type"] == "test.queued" for item in logs)
+
+
+class FlakyConnection:
+    """Fails the first ``failures`` executes with a lock error, then records rows."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.rows: list[tuple] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def execute(self, sql, params):
+        if "missing_table" in sql:
+            raise sqlite3.IntegrityError("constraint failed")
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        self.rows.append(params)
+
+
+def test_locked_rows_are_retried_and_failures_are_logged(monkeypatch, caplog) -> None:
+    monkeypatch.setattr(write_queue, "ROW_RETRY_BACKOFF_SECONDS", 0)
+    writer = WriteBehindQueue()
+    conn = FlakyConnection(failures=3)
+    with caplog.at_level(logging.ERROR, logger="app.db.write_queue"):
+        writer._commit(conn, [("INSERT INTO audit_logs VALUES (?)", (1,)), ("INSERT INTO missing_table VALUES (?)", (2,))])
+    assert conn.rows == [(1,)] and writer.dropped == 1
+    assert "INSERT INTO missing_table" in caplog.text and "constraint failed" in caplog.text
+
+    writer._commit(FlakyConnection(failures=100), [("INSERT INTO audit_logs VALUES (?)", (3,))])
+    assert writer.dropped == 2
@@ -30,6 +30,7 @@ const defaults: SettingsDef = {
   max_tool_calls_per_minute: 15,
   max_files_read_per_run: 20,
   max_bytes_read_per_run: 5000000,
+  max_grep_matches_per_run: 500,
   max_runtime_seconds: 120,
   write_preview_default: true,
   quarantine_mode: true,
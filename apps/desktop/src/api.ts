@@ -50,6 +50,7 @@ export interface SettingsDef {
   max_tool_calls_per_minute: number;
   max_files_read_per_run: number;
   max_bytes_read_per_run: number;
+  max_grep_matches_per_run: number;
   max_runtime_seconds: number;
   write_preview_default: boolean;
   quarantine_mode: boolean;
@@ -231,6 +232,11 @@ export interface WorkspaceDef {
 export interface PolicyValidateResponse {
   ok: boolean;
   errors: string[];
+  text_hash?: string | null;
+  plan?: {
+    actions?: Record<string, Array<{ effect: "allow" | "deny"; profile: string | null; workspace: string | null; require_confirm: boolean }>>;
+    limits?: Array<{ key: string; value: number; profile: string | null; workspace: string | null; require_confirm: boolean }>;
+  };
 }
 
 export interface PolicyTestResponse {
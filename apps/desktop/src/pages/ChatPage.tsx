@@ -93,6 +93,12 @@ export function ChatPage({ settings }: { settings?: SettingsDef }) {
         if (event.type === "fallback_mode") {
           setMessages((m) => [...m, { role: "system", content: `Fallback mode: ${event.mode} (${event.reason ?? "runtime"})` }]);
         }
+        if (event.type === "file_continuation") {
+          setMessages((m) => [
+            ...m,
+            { role: "system", content: `Read ${event.next_offset} of ${event.size} bytes. Next page: read file: ${event.path} @${event.continuation}` },
+          ]);
+        }
         if (event.type === "review") {
           const warnings = (event.warnings || []).join("; ");
           if (warnings) {
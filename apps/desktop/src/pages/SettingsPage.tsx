@@ -18,6 +18,7 @@ const defaults: SettingsDef = {
   max_tool_calls_per_minute: 15,
   max_files_read_per_run: 20,
   max_bytes_read_per_run: 5_000_000,
+  max_grep_matches_per_run: 500,
   max_runtime_seconds: 120,
   write_preview_default: true,
   quarantine_mode: true,
@@ -75,6 +76,7 @@ export function SettingsPage() {
     max_tool_calls_per_minute: 15,
     max_files_read_per_run: 20,
     max_bytes_read_per_run: 5_000_000,
+    max_grep_matches_per_run: 500,
     max_runtime_seconds: 120
   });
   const [workspaceLogging, setWorkspaceLogging] = useState<"standard" | "strict">("standard");
@@ -117,6 +119,7 @@ export function SettingsPage() {
         max_tool_calls_per_minute: Number(wsSettings.max_tool_calls_per_minute ?? 15),
         max_files_read_per_run: Number(wsSettings.max_files_read_per_run ?? 20),
         max_bytes_read_per_run: Number(wsSettings.max_bytes_read_per_run ?? 5_000_000),
+        max_grep_matches_per_run: Number(wsSettings.max_grep_matches_per_run ?? 500),
         max_runtime_seconds: Number(wsSettings.max_runtime_seconds ?? 120)
       });
       setWorkspaceLogging(activeWs.logging_strictness || "standard");
@@ -293,6 +296,7 @@ export function SettingsPage() {
       max_tool_calls_per_minute: Number(wsSettings.max_tool_calls_per_minute ?? 15),
       max_files_read_per_run: Number(wsSettings.max_files_read_per_run ?? 20),
       max_bytes_read_per_run: Number(wsSettings.max_bytes_read_per_run ?? 5_000_000),
+      max_grep_matches_per_run: Number(wsSettings.max_grep_matches_per_run ?? 500),
       max_runtime_seconds: Number(wsSettings.max_runtime_seconds ?? 120)
     });
     setWorkspaceLogging(ws.logging_strictness || "standard");
@@ -391,7 +395,9 @@ export function SettingsPage() {
     const text = String(profilePayload.policy_rules ?? "");
     const res = await api.validatePolicy(text);
     if (res.ok) {
-      setPolicyStatus("Policy syntax OK.");
+      const actions = Object.keys(res.plan?.actions ?? {}).length;
+      const limits = res.plan?.limits?.length ?? 0;
+      setPolicyStatus(`Policy syntax OK. Compiled ${actions} action(s), ${limits} limit rule(s).`);
     } else {
       setPolicyStatus(res.errors.join(" | "));
     }
@@ -563,6 +569,8 @@ export function SettingsPage() {
           <div className="row" style={{ marginTop: 8 }}>
             <label>Max bytes/read</label>
             <input type="number" value={workspaceLimits.max_bytes_read_per_run} onChange={(e) => setWorkspaceLimits((prev) => ({ ...prev, max_bytes_read_per_run: parseInt(e.target.value, 10) }))} />
+            <label>Max grep matches</label>
+            <input type="number" value={workspaceLimits.max_grep_matches_per_run} onChange={(e) => setWorkspaceLimits((prev) => ({ ...prev, max_grep_matches_per_run: parseInt(e.target.value, 10) }))} />
             <label>Max runtime (s)</label>
             <input type="number" value={workspaceLimits.max_runtime_seconds} onChange={(e) => setWorkspaceLimits((prev) => ({ ...prev, max_runtime_seconds: parseInt(e.target.value, 10) }))} />
           </div>